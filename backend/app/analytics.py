@@ -0,0 +1,251 @@
+import os
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .schemas import Candidate, CandidateStatus, Interview, InterviewStatus, Vacancy, VacancyStatus
+
+# Length of the rolling time series
+SERIES_MONTHS = int(os.getenv("HARRY_ANALYTICS_MONTHS", "12"))
+SERIES_DAYS = int(os.getenv("HARRY_ANALYTICS_DAYS", "30"))
+
+# Score histograms use ten buckets: 0-9, 10-19, ..., 90-100
+HISTOGRAM_BUCKETS = 10
+
+
+def _score_bucket(score: Optional[int]) -> Optional[int]:
+    if score is None:
+        return None
+    return min(max(score, 0) // 10, HISTOGRAM_BUCKETS - 1)
+
+
+def _value(status) -> str:
+    return getattr(status, "value", status)
+
+
+# What each entity contributes to the aggregates, kept per id so an update
+# can subtract the previous contribution
+def _candidate_entry(candidate: Candidate) -> Tuple[str, Optional[int], datetime]:
+    return _value(candidate.status), candidate.score, candidate.created_at
+
+
+def _interview_entry(interview: Interview) -> Tuple[str, Optional[int], Optional[int], Optional[datetime]]:
+    return _value(interview.status), interview.score, interview.duration, interview.completed_at
+
+
+def _vacancy_entry(vacancy: Vacancy) -> Tuple[str, datetime]:
+    return _value(vacancy.status), vacancy.created_at
+
+
+class RollingSeries:
+    """Per-period counters for the last `size` months or days
+
+    Buckets older than the window are pruned when the series is read, so
+    memory and read cost depend on the window, not on the data.
+    """
+
+    def __init__(self, period: str, size: int):
+        self.period = period
+        self.size = size
+        self.buckets: Dict[int, Counter] = {}
+
+    def bucket(self, moment: datetime) -> int:
+        if self.period == "month":
+            return moment.year * 12 + moment.month - 1
+        return moment.toordinal()
+
+    def _label(self, bucket: int) -> str:
+        if self.period == "month":
+            return f"{bucket // 12:04d}-{bucket % 12 + 1:02d}"
+        return date.fromordinal(bucket).isoformat()
+
+    def add(self, moment: Optional[datetime], field: str, delta: int):
+        if moment is None:
+            return
+        bucket = self.bucket(moment)
+        counts = self.buckets.get(bucket)
+        if counts is None:
+            if delta < 0:
+                return  # Bucket already rolled out of the window
+            counts = self.buckets[bucket] = Counter()
+        counts[field] += delta
+        if counts[field] <= 0:
+            del counts[field]
+            if not counts:
+                del self.buckets[bucket]
+
+    def series(self, now: datetime, fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        last = self.bucket(now)
+        first = last - self.size + 1
+        for bucket in [b for b in self.buckets if b < first]:
+            del self.buckets[bucket]
+        return [
+            {"period": self._label(bucket), **{field: self.buckets.get(bucket, {}).get(field, 0) for field in fields}}
+            for bucket in range(first, last + 1)
+        ]
+
+
+class Analytics:
+    """Dashboard aggregates kept up to date on every write
+
+    Each observe_* call replaces the entity's previous contribution (kept
+    as a small tuple per id), so creates and status or score changes are
+    O(1) and reading the dashboard never scans candidates or interviews.
+    """
+
+    # Hires are counted in the month the candidate applied: candidates
+    # carry no hire date
+    SERIES_FIELDS = ("candidates", "hired", "vacancies", "interviews_completed")
+
+    def __init__(self):
+        self.candidate_status: Counter = Counter()
+        self.interview_status: Counter = Counter()
+        self.vacancy_status: Counter = Counter()
+        self.candidate_scores = [0] * HISTOGRAM_BUCKETS
+        self.interview_scores = [0] * HISTOGRAM_BUCKETS
+        self.duration_total = 0
+        self.duration_count = 0
+        self.monthly = RollingSeries("month", SERIES_MONTHS)
+        self.daily = RollingSeries("day", SERIES_DAYS)
+
+        self.candidates: Dict[str, Tuple[str, Optional[int], datetime]] = {}
+        self.interviews: Dict[str, Tuple[str, Optional[int], Optional[int], Optional[datetime]]] = {}
+        self.vacancies: Dict[str, Tuple[str, datetime]] = {}
+        # Restored state: (entity, id) -> the entity as it was counted, or None
+        self.base: Optional[Callable[[str, str], Any]] = None
+
+    def reset(self):
+        """Drop all aggregates, before observing everything again"""
+        self.__init__()
+
+    def _previous(self, entries: Dict[str, Tuple], entity: str, item_id: str, entry: Callable[[Any], Tuple]):
+        previous = entries.get(item_id)
+        if previous is None and self.base is not None:
+            model = self.base(entity, item_id)
+            if model is not None:
+                previous = entry(model)
+        return previous
+
+    def _series(self, moment: Optional[datetime], field: str, delta: int):
+        self.monthly.add(moment, field, delta)
+        self.daily.add(moment, field, delta)
+
+    def _histogram(self, histogram: List[int], score: Optional[int], delta: int):
+        bucket = _score_bucket(score)
+        if bucket is not None:
+            histogram[bucket] += delta
+
+    def observe_candidate(self, candidate: Candidate):
+        previous = self._previous(self.candidates, "candidates", candidate.id, _candidate_entry)
+        if previous is not None:
+            status, score, created_at = previous
+            self.candidate_status[status] -= 1
+            self._histogram(self.candidate_scores, score, -1)
+            self._series(created_at, "candidates", -1)
+            if status == CandidateStatus.HIRED.value:
+                self._series(created_at, "hired", -1)
+        current = _candidate_entry(candidate)
+        self.candidates[candidate.id] = current
+        self.candidate_status[current[0]] += 1
+        self._histogram(self.candidate_scores, candidate.score, 1)
+        self._series(candidate.created_at, "candidates", 1)
+        if current[0] == CandidateStatus.HIRED.value:
+            self._series(candidate.created_at, "hired", 1)
+
+    def observe_interview(self, interview: Interview):
+        previous = self._previous(self.interviews, "interviews", interview.id, _interview_entry)
+        if previous is not None:
+            status, score, duration, completed_at = previous
+            self.interview_status[status] -= 1
+            self._histogram(self.interview_scores, score, -1)
+            if duration is not None:
+                self.duration_total -= duration
+                self.duration_count -= 1
+            self._series(completed_at, "interviews_completed", -1)
+        current = _interview_entry(interview)
+        self.interviews[interview.id] = current
+        self.interview_status[current[0]] += 1
+        self._histogram(self.interview_scores, interview.score, 1)
+        if interview.duration is not None:
+            self.duration_total += interview.duration
+            self.duration_count += 1
+        self._series(interview.completed_at, "interviews_completed", 1)
+
+    def observe_vacancy(self, vacancy: Vacancy):
+        previous = self._previous(self.vacancies, "vacancies", vacancy.id, _vacancy_entry)
+        if previous is not None:
+            status, created_at = previous
+            self.vacancy_status[status] -= 1
+            self._series(created_at, "vacancies", -1)
+        current = self.vacancies[vacancy.id] = _vacancy_entry(vacancy)
+        self.vacancy_status[current[0]] += 1
+        self._series(vacancy.created_at, "vacancies", 1)
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or datetime.now()
+
+        def by_status(counter: Counter, statuses) -> Dict[str, int]:
+            return {status.value: counter.get(status.value, 0) for status in statuses}
+
+        def histogram(counts: List[int]) -> List[Dict[str, Any]]:
+            return [
+                {"range": f"{i * 10}-{i * 10 + 9 if i < HISTOGRAM_BUCKETS - 1 else 100}", "count": count}
+                for i, count in enumerate(counts)
+            ]
+
+        return {
+            "candidates": {
+                "total": sum(self.candidate_status.values()),
+                "by_status": by_status(self.candidate_status, CandidateStatus),
+                "score_histogram": histogram(self.candidate_scores),
+            },
+            "interviews": {
+                "total": sum(self.interview_status.values()),
+                "by_status": by_status(self.interview_status, InterviewStatus),
+                "score_histogram": histogram(self.interview_scores),
+                "avg_duration": self.duration_total / self.duration_count if self.duration_count else None,
+            },
+            "vacancies": {
+                "total": sum(self.vacancy_status.values()),
+                "by_status": by_status(self.vacancy_status, VacancyStatus),
+            },
+            "series": {
+                "monthly": self.monthly.series(now, self.SERIES_FIELDS),
+                "daily": self.daily.series(now, self.SERIES_FIELDS),
+            },
+        }
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-serializable aggregates, without the per-id entries"""
+        return {
+            "candidate_status": dict(self.candidate_status),
+            "interview_status": dict(self.interview_status),
+            "vacancy_status": dict(self.vacancy_status),
+            "candidate_scores": self.candidate_scores,
+            "interview_scores": self.interview_scores,
+            "duration_total": self.duration_total,
+            "duration_count": self.duration_count,
+            "monthly": {str(bucket): dict(counts) for bucket, counts in self.monthly.buckets.items()},
+            "daily": {str(bucket): dict(counts) for bucket, counts in self.daily.buckets.items()},
+        }
+
+    def restore(self, state: Dict[str, Any], base: Callable[[str, str], Any]):
+        """Start from aggregates saved by state()
+
+        The per-id entries are not saved: `base` returns an entity as it was
+        counted, and is asked the first time that entity is observed again.
+        """
+        self.__init__()
+        self.candidate_status.update(state["candidate_status"])
+        self.interview_status.update(state["interview_status"])
+        self.vacancy_status.update(state["vacancy_status"])
+        self.candidate_scores = list(state["candidate_scores"])
+        self.interview_scores = list(state["interview_scores"])
+        self.duration_total = state["duration_total"]
+        self.duration_count = state["duration_count"]
+        for series, buckets in ((self.monthly, state["monthly"]), (self.daily, state["daily"])):
+            series.buckets = {int(bucket): Counter(counts) for bucket, counts in buckets.items()}
+        self.base = base
+
+
+analytics = Analytics()
@@ -0,0 +1,342 @@
+import asyncio
+import importlib
+import math
+import os
+import uuid
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .metrics import NOMINAL_WORDS_PER_MIN, MetricsEngine
+
+# Audio arrives as binary WebSocket frames of 16-bit little-endian mono PCM
+SAMPLE_RATE = int(os.getenv("HARRY_AUDIO_SAMPLE_RATE", "16000"))
+MIN_SAMPLE_RATE, MAX_SAMPLE_RATE = 8000, 48000
+
+# Audio kept per interview; analysis that falls further behind loses the
+# oldest audio, and speaking windows are cut at half this length so the
+# transcriber always gets a window that is still buffered
+BUFFER_SEC = float(os.getenv("HARRY_AUDIO_BUFFER_SEC", "30"))
+
+# VAD frame length, and how much audio one analysis step covers
+FRAME_MS = 30
+CHUNK_MS = int(os.getenv("HARRY_AUDIO_CHUNK_MS", "480"))
+
+# Frames louder than this (dBFS) are speech; silences shorter than
+# MIN_PAUSE_MS are bridged, so they neither end a speaking window nor
+# count as pauses
+VAD_THRESHOLD_DB = float(os.getenv("HARRY_VAD_THRESHOLD_DB", "-40"))
+MIN_PAUSE_MS = int(os.getenv("HARRY_VAD_MIN_PAUSE_MS", "300"))
+
+# Threads shared by every interview for VAD and transcription
+AUDIO_WORKERS = int(os.getenv("HARRY_AUDIO_WORKERS", "4"))
+
+# `stub` or `module:Class` of a Transcriber subclass
+TRANSCRIBER = os.getenv("HARRY_TRANSCRIBER", "stub")
+
+
+class RingBuffer:
+    """Preallocated int16 ring addressed by absolute sample position"""
+
+    def __init__(self, capacity: int):
+        self.data = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.written = 0
+
+    @property
+    def oldest(self) -> int:
+        """Position of the oldest sample still buffered"""
+        return max(0, self.written - self.capacity)
+
+    def write(self, samples: np.ndarray):
+        if len(samples) > self.capacity:
+            self.written += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        start = self.written % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+        self.written += len(samples)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copy of samples [start, end), clipped to what is still buffered"""
+        start, end = max(start, self.oldest), min(end, self.written)
+        if start >= end:
+            return np.empty(0, dtype=np.int16)
+        offset = start % self.capacity
+        first = min(end - start, self.capacity - offset)
+        return np.concatenate((self.data[offset:offset + first], self.data[:end - start - first]))
+
+
+def detect_voice(samples: np.ndarray, frame: int, threshold_db: float = VAD_THRESHOLD_DB) -> np.ndarray:
+    """Per-frame speech flags from frame energy (a trailing partial frame is ignored)"""
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32) / 32768.0
+    power = np.einsum("ij,ij->i", frames, frames) / frame
+    return 10 * np.log10(power + 1e-10) > threshold_db
+
+
+class VoiceActivity:
+    """Speaking windows and pauses from per-frame speech flags
+
+    update() consumes one chunk of flags and returns the windows it closed;
+    the flags are run-length encoded first, so the Python loop runs once
+    per speech run rather than once per frame. Positions are frame numbers
+    since the start of the stream.
+    """
+
+    def __init__(self, min_pause: int, max_window: int):
+        self.min_pause = min_pause
+        self.max_window = max_window
+        self.frames = 0
+        self.speech_frames = 0
+        self.pause_frames = 0
+        self.pauses = 0
+        self.longest_pause = 0
+        self.window_start: Optional[int] = None
+        # End of the last speech run; None before any speech and after lost audio
+        self.voiced_until: Optional[int] = None
+
+    def update(self, voiced: np.ndarray) -> List[Tuple[int, int]]:
+        closed = []
+        if len(voiced):
+            edges = np.flatnonzero(np.diff(voiced.view(np.int8))) + 1
+            starts = np.concatenate(([0], edges))
+            ends = np.concatenate((edges, [len(voiced)]))
+            speech = voiced[starts]
+            for start, end in zip((starts[speech] + self.frames).tolist(), (ends[speech] + self.frames).tolist()):
+                if self.window_start is not None and start - self.voiced_until >= self.min_pause:
+                    closed.append(self._close())
+                if self.window_start is None:
+                    if self.voiced_until is not None and start - self.voiced_until >= self.min_pause:
+                        self._pause(start - self.voiced_until)
+                    self.window_start = start
+                self.voiced_until = end
+                self.speech_frames += end - start
+                if end - self.window_start >= self.max_window:
+                    closed.append(self._close())
+        self.frames += len(voiced)
+        if self.window_start is not None and self.frames - self.voiced_until >= self.min_pause:
+            closed.append(self._close())
+        return closed
+
+    def skip(self, frames: int) -> List[Tuple[int, int]]:
+        """Account for audio that was lost before analysis"""
+        closed = self.finish()
+        self.voiced_until = None
+        self.frames += frames
+        return closed
+
+    def finish(self) -> List[Tuple[int, int]]:
+        """Close the open window at the end of the stream"""
+        return [self._close()] if self.window_start is not None else []
+
+    def _close(self) -> Tuple[int, int]:
+        window = (self.window_start, self.voiced_until)
+        self.window_start = None
+        return window
+
+    def _pause(self, frames: int):
+        self.pauses += 1
+        self.pause_frames += frames
+        self.longest_pause = max(self.longest_pause, frames)
+
+
+class Transcription(NamedTuple):
+    text: str
+    confidence: float
+
+
+class Transcriber:
+    """Speech-to-text for one speaking window; called on the audio worker threads"""
+
+    def transcribe(self, samples: np.ndarray, sample_rate: int) -> Optional[Transcription]:
+        raise NotImplementedError
+
+
+class StubTranscriber(Transcriber):
+    """Offline stand-in for a speech model
+
+    Emits one placeholder word per word a speaker would say in the window
+    at the nominal rate, so transcripts, speaking rate and the rest of the
+    pipeline work without a model.
+    """
+
+    WORD = "слово"
+    CONFIDENCE = 0.9
+
+    def transcribe(self, samples, sample_rate):
+        words = max(1, round(len(samples) / sample_rate * NOMINAL_WORDS_PER_MIN / 60))
+        return Transcription(" ".join([self.WORD] * words), self.CONFIDENCE)
+
+
+def create_transcriber(spec: str = TRANSCRIBER) -> Transcriber:
+    """Pick the transcriber from HARRY_TRANSCRIBER: `stub` or `module:Class`"""
+    if spec == "stub":
+        return StubTranscriber()
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"HARRY_TRANSCRIBER must be 'stub' or 'module:Class', got {spec!r}")
+    return getattr(importlib.import_module(module), name)()
+
+
+class AudioSession:
+    """Live audio of one interview: buffered, analyzed and transcribed in the background
+
+    feed() only copies PCM into the ring buffer; one task per session runs
+    VAD chunk by chunk on the worker pool, transcribes each closed speaking
+    window and publishes the results through `publish`.
+
+    An interview can get several sessions (e.g. after a reconnect). Entry
+    ids carry a per-session token, and published times are offset by
+    `resume_at()` (called once, on the worker pool), so a session continues
+    the interview's timeline instead of restarting it at 0.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        publish: Callable[[Dict[str, Any]], Awaitable[None]],
+        executor: Executor,
+        transcriber: Transcriber,
+        sample_rate: int = SAMPLE_RATE,
+        metrics_interval: float = 5.0,
+        keyframe_every: int = 10,
+        resume_at: Optional[Callable[[], float]] = None,
+    ):
+        self.source = source
+        self.publish = publish
+        self.executor = executor
+        self.transcriber = transcriber
+        self.sample_rate = sample_rate
+        self.frame = sample_rate * FRAME_MS // 1000
+        self.chunk = max(1, CHUNK_MS // FRAME_MS) * self.frame
+        self.ring = RingBuffer(int(BUFFER_SEC * sample_rate))
+        self.vad = VoiceActivity(
+            min_pause=math.ceil(MIN_PAUSE_MS / FRAME_MS),
+            max_window=int(BUFFER_SEC * 1000 / FRAME_MS) // 2,
+        )
+        self.engine = MetricsEngine()
+        self.metrics_interval = metrics_interval
+        self.keyframe_every = keyframe_every
+        self.updates = 0
+        self.last_metrics = 0.0
+        self.analyzed = 0
+        self.lost = 0
+        self.windows = 0
+        self.session = uuid.uuid4().hex[:8]
+        self.resume_at = resume_at
+        self.offset = 0.0
+        self.partial = b""
+        self.closed = False
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def feed(self, data: bytes):
+        """Buffer one binary frame of PCM"""
+        if self.partial:
+            data = self.partial + data
+        usable = len(data) & ~1
+        self.partial = data[usable:]
+        self.ring.write(np.frombuffer(data, dtype="<i2", count=usable // 2))
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        self.wakeup.set()
+
+    async def close(self):
+        """Analyze what is left, then publish the last window and final metrics"""
+        self.closed = True
+        self.wakeup.set()
+        if self.task is not None:
+            await self.task
+
+    def seconds(self, frames: int) -> float:
+        return round(frames * FRAME_MS / 1000, 2)
+
+    def at(self, frames: int) -> float:
+        """Interview time of a frame position"""
+        return round(self.offset + frames * FRAME_MS / 1000, 2)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        if self.resume_at is not None:
+            self.offset = await loop.run_in_executor(self.executor, self.resume_at)
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            # Drain before checking `closed`: close() may come before the first pass
+            closing = self.closed
+            while True:
+                if self.analyzed < self.ring.oldest:
+                    # Analysis fell a whole buffer behind; skip what was overwritten
+                    frames = math.ceil((self.ring.oldest - self.analyzed) / self.frame)
+                    self.analyzed += frames * self.frame
+                    self.lost += frames
+                    await self._transcribe(self.vad.skip(frames))
+                available = self.ring.written - self.analyzed
+                if available >= self.chunk:
+                    size = self.chunk
+                elif self.closed and available >= self.frame:
+                    size = available - available % self.frame
+                else:
+                    break
+                samples = self.ring.read(self.analyzed, self.analyzed + size)
+                self.analyzed += size
+                voiced = await loop.run_in_executor(self.executor, detect_voice, samples, self.frame)
+                await self._transcribe(self.vad.update(voiced))
+                await self._publish_metrics(loop.time())
+            if closing:
+                break
+        await self._transcribe(self.vad.finish())
+        await self._publish_metrics(None)
+
+    async def _transcribe(self, windows: List[Tuple[int, int]]):
+        loop = asyncio.get_running_loop()
+        for start, end in windows:
+            self.windows += 1
+            window = {"start": self.at(start), "end": self.at(end), "duration": self.seconds(end - start)}
+            await self.publish({"type": "speaking_window", "data": window, "timestamp": window["start"]})
+
+            samples = self.ring.read(start * self.frame, end * self.frame)
+            result = await loop.run_in_executor(self.executor, self.transcriber.transcribe, samples, self.sample_rate)
+            if result is None or not result.text:
+                continue
+            entry = {
+                "id": f"audio-{self.session}-{self.windows}",
+                "speaker": "candidate",
+                "text": result.text,
+                "timestamp": window["start"],
+                "confidence": round(result.confidence, 2),
+            }
+            self.engine.add(entry)
+            await self.publish({"type": "transcript", "data": entry, "timestamp": entry["timestamp"]})
+
+    def voice_activity(self) -> Dict[str, float]:
+        vad = self.vad
+        return {
+            "audio_sec": self.seconds(vad.frames),
+            "speech_sec": self.seconds(vad.speech_frames),
+            "pauses_sec": self.seconds(vad.pause_frames),
+            "pause_count": vad.pauses,
+            "longest_pause_sec": self.seconds(vad.longest_pause),
+            "lost_audio_sec": self.seconds(self.lost),
+        }
+
+    async def _publish_metrics(self, now: Optional[float]):
+        """Metrics at most every metrics_interval; `now` None forces a final keyframe"""
+        if now is not None and now - self.last_metrics < self.metrics_interval:
+            return
+        self.engine.set_voice_activity(self.voice_activity())
+        keyframe = now is None or self.updates % self.keyframe_every == 0
+        data = self.engine.keyframe() if keyframe else self.engine.delta()
+        if data:
+            await self.publish({
+                "type": "metrics",
+                "data": data,
+                "delta": not keyframe,
+                "timestamp": self.at(self.vad.frames)
+            })
+            self.updates += 1
+        if now is not None:
+            self.last_metrics = now
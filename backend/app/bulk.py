@@ -0,0 +1,182 @@
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+# Rows validated and written per transaction, and per-row errors kept in
+# the import report; both bound the memory of a bulk request
+IMPORT_BATCH_SIZE = int(os.getenv("HARRY_IMPORT_BATCH_SIZE", "1000"))
+IMPORT_MAX_ERRORS = 100
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Fields computed by the server; imported values are ignored
+COMPUTED_FIELDS = ("match_percentage",)
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+class RowError(NamedTuple):
+    row: int
+    errors: List[Dict[str, str]]
+
+
+def detect_format(format: Optional[str], filename: Optional[str]) -> str:
+    """Explicit `format` wins, otherwise the upload's file extension decides"""
+    if format is None and filename:
+        format = os.path.splitext(filename)[1].lstrip(".").lower()
+        format = {"jsonl": "ndjson", "json": "ndjson"}.get(format, format)
+    if format not in FORMATS:
+        raise UnsupportedFormat("Format must be ndjson or csv")
+    return format
+
+
+def _csv_value(value: str) -> Any:
+    # List fields arrive as a JSON array or as a ";"-separated string
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def read_rows(file: BinaryIO, format: str) -> Iterator[Tuple[int, Any]]:
+    """(line number, raw row) pairs read lazily from an uploaded file
+
+    Rows that can't even be parsed are yielded as ValueError instances so
+    the caller reports them like validation errors.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if format == "ndjson":
+            for number, line in enumerate(text, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError as exc:
+                    yield number, ValueError(f"Invalid JSON: {exc}")
+            return
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty cells mean "not set", so model defaults apply
+            yield reader.line_num, {key: _csv_value(value) for key, value in row.items() if key and value}
+    finally:
+        text.detach()  # the upload owns the underlying file
+
+
+@lru_cache(maxsize=None)
+def _list_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(
+        name for name, field in model.model_fields.items()
+        if getattr(field.annotation, "__origin__", None) in (list, List)
+    )
+
+
+def build_model(model: Type[BaseModel], raw: Any) -> BaseModel:
+    """Validate one imported row, filling id and created_at when absent"""
+    if isinstance(raw, ValueError):
+        raise raw
+    if not isinstance(raw, dict):
+        raise ValueError("Row must be an object")
+    data = {key: value for key, value in raw.items() if key not in COMPUTED_FIELDS}
+    for name in _list_fields(model):
+        if isinstance(data.get(name), str):
+            data[name] = [item.strip() for item in data[name].split(";") if item.strip()]
+    data.setdefault("id", str(uuid.uuid4()))
+    data.setdefault("created_at", datetime.now())
+    return model.model_validate(data)
+
+
+def _row_errors(exc: Exception) -> List[Dict[str, str]]:
+    if isinstance(exc, ValidationError):
+        return [
+            {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+            for error in exc.errors()
+        ]
+    return [{"field": "", "message": str(exc)}]
+
+
+def validate_batch(rows: Iterator[Tuple[int, Any]], model: Type[BaseModel],
+                   size: int = IMPORT_BATCH_SIZE) -> Tuple[List[BaseModel], List[RowError], bool]:
+    """Pull up to `size` rows; return (valid models, row errors, exhausted)"""
+    models: List[BaseModel] = []
+    errors: List[RowError] = []
+    count = 0
+    for number, raw in islice(rows, size):
+        count += 1
+        try:
+            models.append(build_model(model, raw))
+        except (ValidationError, ValueError) as exc:
+            errors.append(RowError(number, _row_errors(exc)))
+    return models, errors, count < size
+
+
+class ImportReport:
+    """Running totals of a bulk import; keeps only the first errors"""
+
+    def __init__(self, max_errors: int = IMPORT_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[RowError] = []
+
+    def add(self, imported: int, errors: List[RowError]):
+        self.imported += imported
+        self.failed += len(errors)
+        self.errors.extend(errors[:self.max_errors - len(self.errors)])
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": [error._asdict() for error in self.errors],
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+async def export_lines(items: AsyncIterator[BaseModel], model: Type[BaseModel], format: str,
+                       batch: int = IMPORT_BATCH_SIZE) -> AsyncIterator[str]:
+    """Serialize `items` as NDJSON or CSV, yielding one chunk per `batch` rows"""
+    fields = list(model.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == "csv":
+        writer.writerow(fields)
+    count = 0
+    async for item in items:
+        if format == "ndjson":
+            buffer.write(item.model_dump_json())
+            buffer.write("\n")
+        else:
+            data = item.model_dump(mode="json")
+            writer.writerow([_csv_cell(data.get(field)) for field in fields])
+        count += 1
+        if count % batch == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,202 @@
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Pattern, Set, Tuple
+
+from .files import etag_matches
+
+# Bounded by entry count and total body bytes; entries also expire after the
+# TTL so other workers' writes (which this worker can't see) show up within
+# HARRY_CACHE_TTL seconds
+CACHE_SIZE = int(os.getenv("HARRY_CACHE_SIZE", "512"))
+CACHE_MAX_BYTES = int(os.getenv("HARRY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("HARRY_CACHE_TTL", "10"))
+
+# Cacheable GET routes and the tag each cached response is filed under;
+# writes invalidate by tag (see ResponseCache.invalidate). Interview details
+# carry the live transcript, so each logged entry invalidates its interview
+CACHED_ROUTES: List[Tuple[Pattern, str]] = [
+    (re.compile(r"^/api/(candidates|interviews|vacancies)$"), "{0}"),
+    # Exports are streamed and must never be buffered here; batch views span
+    # many candidates, so no single tag would invalidate them
+    (re.compile(r"^/api/(candidates|interviews|vacancies)/(?!export$|view$)([^/]+)$"), "{0}:{1}"),
+    (re.compile(r"^/api/reports/([^/]+)$"), "reports:{0}"),
+]
+
+
+# Headers the middleware sets itself rather than replaying from the app
+OWN_HEADERS = {b"content-length", b"etag", b"cache-control"}
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: List[Tuple[bytes, bytes]]
+    etag: str
+    expires: float
+    tag: str
+
+
+class ResponseCache:
+    """LRU + TTL cache of serialized GET responses with tag invalidation"""
+
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.tags: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, tag: str, body: bytes, headers: List[Tuple[bytes, bytes]]) -> CachedResponse:
+        """Store a response; one larger than the whole byte budget is returned but not kept"""
+        if key in self.entries:
+            self._remove(key)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        entry = CachedResponse(body, headers, etag, time.monotonic() + self.ttl, tag)
+        if len(body) > self.max_bytes:
+            return entry
+        self.entries[key] = entry
+        self.size += len(body)
+        self.tags.setdefault(tag, set()).add(key)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return entry
+
+    def invalidate(self, *tags: str):
+        """Drop every cached response filed under any of `tags`"""
+        for tag in tags:
+            for key in self.tags.pop(tag, ()):
+                entry = self.entries.pop(key, None)
+                if entry is not None:
+                    self.size -= len(entry.body)
+
+    def clear(self):
+        self.entries.clear()
+        self.tags.clear()
+        self.size = 0
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key)
+        self.size -= len(entry.body)
+        keys = self.tags.get(entry.tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.tags[entry.tag]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def route_tag(path: str) -> Optional[str]:
+    for pattern, template in CACHED_ROUTES:
+        match = pattern.match(path)
+        if match:
+            return template.format(*match.groups())
+    return None
+
+
+def cache_key(path: str, query_string: bytes) -> str:
+    # Parameter order doesn't change the response, so it mustn't split keys
+    params = sorted(query_string.decode("latin-1").split("&")) if query_string else []
+    return path + "?" + "&".join(params)
+
+
+class ResponseCacheMiddleware:
+    """Serves repeated GETs of cacheable routes straight from ResponseCache
+
+    Hits skip routing, validation and serialization entirely. Every cached
+    response carries a strong ETag (hash of the body), and a matching
+    If-None-Match is answered with 304. Must sit inside CORSMiddleware so
+    per-origin headers are never stored.
+    """
+
+    def __init__(self, app, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not self.cache.enabled:
+            await self.app(scope, receive, send)
+            return
+        tag = route_tag(scope["path"])
+        if tag is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = cache_key(scope["path"], scope.get("query_string", b""))
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            await self._send_entry(send, entry, if_none_match)
+            return
+
+        start: Dict = {}
+        chunks: List[bytes] = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        if start.get("status") != 200:
+            # Errors aren't cached; pass the response through unchanged
+            await send(start)
+            await send({"type": "http.response.body", "body": b"".join(chunks)})
+            return
+        headers = [(name, value) for name, value in start.get("headers", []) if name not in OWN_HEADERS]
+        entry = self.cache.put(key, tag, b"".join(chunks), headers)
+        await self._send_entry(send, entry, if_none_match)
+
+    async def _send_entry(self, send, entry: CachedResponse, if_none_match: Optional[str]):
+        headers = [(b"etag", entry.etag.encode()), (b"cache-control", b"no-cache")]
+        if etag_matches(if_none_match, entry.etag):
+            # A 304 describes the cached body but doesn't carry it
+            headers += [(name, value) for name, value in entry.headers if name != b"content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers += entry.headers
+        headers.append((b"content-length", str(len(entry.body)).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+response_cache = ResponseCache()
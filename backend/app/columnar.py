@@ -0,0 +1,175 @@
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from .schemas import Candidate, CandidateStatus
+
+# Stand-in for None in the integer columns
+NULL = -(2 ** 63)
+
+# created_at is stored as microseconds of wall-clock time since this epoch,
+# with the timezone (if any) dictionary-encoded next to it
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+FIELDS_SET = frozenset(Candidate.model_fields)
+
+
+def _nullable(value: int) -> Optional[int]:
+    return None if value == NULL else value
+
+
+class Dictionary:
+    """Dictionary encoding: each distinct value is stored once and referenced by code"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class CandidateTable(Mapping):
+    """Candidates stored column by column instead of one model per row
+
+    Scalars sit in typed arrays, status/position are dictionary-encoded and
+    skills are spans of interned skill codes in one flat array, so a row
+    costs a few hundred bytes instead of a full Pydantic model with its own
+    strings. Reading a row (`table[id]`) materializes a Candidate; filters
+    run over the columns directly.
+    """
+
+    def __init__(self):
+        self.rows: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.emails: List[str] = []
+        self.phones: List[Optional[str]] = []
+        self.resume_urls: List[Optional[str]] = []
+        self.interview_ids: List[Optional[str]] = []
+
+        self.positions = Dictionary()
+        self.position_codes = array("I")
+        self.statuses = Dictionary()
+        self.status_codes = array("B")
+        self.experience = array("q")
+        self.score = array("q")
+        self.match_percentage = array("q")
+        self.created_at = array("q")
+        # Every distinct tzinfo gets a code; fixed offsets alone can run into the thousands
+        self.timezones = Dictionary()
+        self.timezone_codes = array("I")
+
+        # Row skills are skill_codes[skill_start:skill_start + skill_count];
+        # spans outgrown by an update are left behind until compaction
+        self.skills = Dictionary()
+        self.skill_codes = array("I")
+        self.skill_start = array("Q")
+        self.skill_count = array("I")
+        self.dead_skills = 0
+
+        self._columns = (
+            self.ids, self.names, self.emails, self.phones, self.resume_urls, self.interview_ids,
+            self.position_codes, self.status_codes, self.experience, self.score, self.match_percentage,
+            self.created_at, self.timezone_codes, self.skill_start, self.skill_count,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.rows)
+
+    def __contains__(self, candidate_id) -> bool:
+        return candidate_id in self.rows
+
+    def __getitem__(self, candidate_id: str) -> Candidate:
+        return self.materialize(self.rows[candidate_id])
+
+    def put(self, candidate: Candidate):
+        """Insert or overwrite the row of `candidate.id`"""
+        row = self.rows.get(candidate.id)
+        if row is None:
+            row = self.rows[candidate.id] = len(self.ids)
+            for column in self._columns:
+                column.append(None if isinstance(column, list) else 0)
+
+        self.ids[row] = candidate.id
+        self.names[row] = candidate.name
+        self.emails[row] = candidate.email
+        self.phones[row] = candidate.phone
+        self.resume_urls[row] = candidate.resume_url
+        self.interview_ids[row] = candidate.interview_id
+        self.position_codes[row] = self.positions.encode(candidate.position)
+        self.status_codes[row] = self.statuses.encode(CandidateStatus(candidate.status))
+        self.experience[row] = candidate.experience
+        self.score[row] = NULL if candidate.score is None else candidate.score
+        self.match_percentage[row] = NULL if candidate.match_percentage is None else candidate.match_percentage
+        created_at = candidate.created_at
+        self.created_at[row] = (created_at.replace(tzinfo=None) - EPOCH) // MICROSECOND
+        self.timezone_codes[row] = self.timezones.encode(created_at.tzinfo)
+        self._put_skills(row, [self.skills.encode(skill) for skill in candidate.skills])
+
+    def _put_skills(self, row: int, codes: List[int]):
+        count = self.skill_count[row]
+        if len(codes) <= count:
+            start = self.skill_start[row]
+            self.skill_codes[start:start + len(codes)] = array("I", codes)
+            self.dead_skills += count - len(codes)
+        else:
+            self.dead_skills += count
+            self.skill_start[row] = len(self.skill_codes)
+            self.skill_codes.extend(codes)
+        self.skill_count[row] = len(codes)
+        if self.dead_skills > 1024 and self.dead_skills > len(self.skill_codes) // 2:
+            self._compact_skills()
+
+    def _compact_skills(self):
+        codes = array("I")
+        for row in range(len(self.ids)):
+            start = self.skill_start[row]
+            self.skill_start[row] = len(codes)
+            codes.extend(self.skill_codes[start:start + self.skill_count[row]])
+        self.skill_codes = codes
+        self.dead_skills = 0
+
+    def materialize(self, row: int) -> Candidate:
+        start = self.skill_start[row]
+        skills = self.skills.values
+        created_at = EPOCH + self.created_at[row] * MICROSECOND
+        timezone = self.timezones.values[self.timezone_codes[row]]
+        candidate = Candidate.__new__(Candidate)
+        # What model_construct does, minus its per-field loop: the columns
+        # only ever hold validated values
+        object.__setattr__(candidate, "__dict__", {
+            "name": self.names[row],
+            "email": self.emails[row],
+            "phone": self.phones[row],
+            "position": self.positions.values[self.position_codes[row]],
+            "experience": self.experience[row],
+            "skills": [skills[code] for code in self.skill_codes[start:start + self.skill_count[row]]],
+            "resume_url": self.resume_urls[row],
+            "status": self.statuses.values[self.status_codes[row]],
+            "id": self.ids[row],
+            "created_at": created_at.replace(tzinfo=timezone) if timezone is not None else created_at,
+            "interview_id": self.interview_ids[row],
+            "score": _nullable(self.score[row]),
+            "match_percentage": _nullable(self.match_percentage[row]),
+        })
+        object.__setattr__(candidate, "__pydantic_fields_set__", set(FIELDS_SET))
+        object.__setattr__(candidate, "__pydantic_extra__", None)
+        object.__setattr__(candidate, "__pydantic_private__", None)
+        return candidate
+
+    def has_status(self, candidate_id: str, status) -> bool:
+        row = self.rows.get(candidate_id)
+        return row is not None and self.statuses.values[self.status_codes[row]] == status
@@ -0,0 +1,127 @@
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from fastapi.responses import Response
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class FileRangeResponse(Response):
+    """Sends `count` bytes of a file starting at `offset`
+
+    Uses the ASGI zero-copy send extension when the server offers it and
+    falls back to chunked reads otherwise, so the file is never loaded into
+    memory as a whole.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, offset: int, count: int, status_code: int, headers: Dict[str, str], media_type: str):
+        headers = {**headers, "content-length": str(count)}
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.count = count
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": self.offset, "count": self.count})
+            return
+
+        remaining = self.count
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.offset)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; end the response instead of hanging
+            await send({"type": "http.response.body", "body": b""})
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match / If-Range comparison (weak, as RFC 9110 allows for GET)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == bare for tag in tags)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Resolve a single `bytes=` range to (offset, count)
+
+    Returns None for headers we don't honour (multiple ranges, other units),
+    which means "send the whole file", and raises ValueError when the range
+    can't be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = min(int(last), size)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, end - start + 1
+
+
+def not_modified(etag: str, cache_control: str = "no-cache") -> Response:
+    return Response(status_code=304, headers={"etag": etag, "cache-control": cache_control})
+
+
+def serve_file(
+    request: Request,
+    path: str,
+    etag: str,
+    media_type: str,
+    filename: Optional[str] = None,
+    cache_control: str = "no-cache",
+    disposition: str = "inline",
+) -> Response:
+    """File response with ETag revalidation and single byte-range support"""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control)
+
+    size = os.stat(path).st_size
+    headers = {"etag": etag, "accept-ranges": "bytes", "cache-control": cache_control}
+    if filename:
+        headers["content-disposition"] = f'{disposition}; filename="{filename}"'
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or etag_matches(if_range, etag)):
+        try:
+            window = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+        if window is not None:
+            offset, count = window
+            headers["content-range"] = f"bytes {offset}-{offset + count - 1}/{size}"
+            return FileRangeResponse(path, offset, count, 206, headers, media_type)
+
+    return FileRangeResponse(path, 0, size, 200, headers, media_type)
@@ -0,0 +1,329 @@
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from starlette.routing import Match
+
+# Histogram buckets (upper bounds); +Inf is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Opt-in sampling profiler: requests slower than HARRY_PROFILE_SLOW_MS get
+# their sampled stacks written to HARRY_PROFILE_DIR in folded format
+# (flamegraph.pl / speedscope / inferno); 0 disables sampling entirely
+PROFILE_SLOW_MS = float(os.getenv("HARRY_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("HARRY_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv(
+    "HARRY_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles"),
+)
+
+
+class RequestTimings:
+    """Per-request accumulator shared with code deeper in the stack"""
+
+    __slots__ = ("serialization",)
+
+    def __init__(self):
+        self.serialization = 0.0
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+def record_serialization(seconds: float):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.serialization += seconds
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_histograms(name: str, help: str, series: Iterable[Tuple[Dict[str, str], Histogram]]) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(float(bound))})} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+    return lines
+
+
+def render_samples(name: str, type: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+    lines += [f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples]
+    return lines
+
+
+class HttpMetrics:
+    """Per-route request histograms, keyed by (method, route[, status])"""
+
+    def __init__(self):
+        self.duration: Dict[Tuple[str, str, str], Histogram] = {}
+        self.handler: Dict[Tuple[str, str], Histogram] = {}
+        self.serialization: Dict[Tuple[str, str], Histogram] = {}
+        self.request_size: Dict[Tuple[str, str], Histogram] = {}
+        self.response_size: Dict[Tuple[str, str], Histogram] = {}
+
+    @staticmethod
+    def _get(table: Dict, key: tuple, buckets: Tuple[float, ...]) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(buckets)
+        return histogram
+
+    def observe(self, method: str, route: str, status: int, total: float, handler: float,
+                serialization: float, request_bytes: int, response_bytes: int):
+        key = (method, route)
+        self._get(self.duration, (method, route, str(status)), LATENCY_BUCKETS).observe(total)
+        self._get(self.handler, key, LATENCY_BUCKETS).observe(handler)
+        self._get(self.serialization, key, LATENCY_BUCKETS).observe(serialization)
+        self._get(self.request_size, key, SIZE_BUCKETS).observe(request_bytes)
+        self._get(self.response_size, key, SIZE_BUCKETS).observe(response_bytes)
+
+    def render(self) -> List[str]:
+        def series(table: Dict, names: Tuple[str, ...]):
+            return [(dict(zip(names, key)), histogram) for key, histogram in sorted(table.items())]
+
+        route = ("method", "route")
+        return (
+            render_histograms("harry_http_request_duration_seconds",
+                              "Time from request start to the last response byte",
+                              series(self.duration, route + ("status",)))
+            + render_histograms("harry_http_handler_duration_seconds",
+                                "Time until the response starts, excluding serialization",
+                                series(self.handler, route))
+            + render_histograms("harry_http_serialization_duration_seconds",
+                                "Time spent rendering response models to bytes",
+                                series(self.serialization, route))
+            + render_histograms("harry_http_request_size_bytes", "Request body size", series(self.request_size, route))
+            + render_histograms("harry_http_response_size_bytes", "Response body size", series(self.response_size, route))
+        )
+
+
+def render_metrics(http: HttpMetrics, ws_stats: Dict[str, Any], ws_latency: Histogram,
+                   cache_stats: Dict[str, int], notification_counts: Dict[str, int]) -> str:
+    """Prometheus text exposition of everything /metrics reports"""
+    interviews = ws_stats["interviews"].items()
+    lines = http.render()
+    lines += render_samples("harry_ws_connections", "gauge", "Open WebSocket connections per interview",
+                            [({"interview": i}, s["connections"]) for i, s in interviews])
+    lines += render_samples("harry_ws_queue_depth", "gauge", "Messages waiting in subscriber outboxes per interview",
+                            [({"interview": i}, s["queue_depth"]) for i, s in interviews])
+    lines += render_histograms("harry_ws_broadcast_latency_seconds",
+                               "Time from fan-out until a message is written to the socket", [({}, ws_latency)])
+    for name, key, help in (
+        ("harry_ws_sent_messages_total", "sent_messages", "WebSocket messages sent"),
+        ("harry_ws_dropped_messages_total", "dropped_messages", "Messages dropped for slow clients"),
+        ("harry_ws_slow_disconnects_total", "slow_disconnects", "Clients disconnected for being too slow"),
+    ):
+        lines += render_samples(name, "counter", help, [({}, ws_stats[key])])
+    lines += render_samples("harry_response_cache_entries", "gauge", "Cached GET responses", [({}, cache_stats["entries"])])
+    lines += render_samples("harry_response_cache_bytes", "gauge", "Body bytes held by the response cache", [({}, cache_stats["bytes"])])
+    for key in ("hits", "misses", "evictions"):
+        lines += render_samples(f"harry_response_cache_{key}_total", "counter", f"Response cache {key}", [({}, cache_stats[key])])
+    lines += render_samples("harry_notification_jobs", "gauge", "Notification jobs in the spool by status",
+                            [({"status": status}, count) for status, count in notification_counts.items()])
+    return "\n".join(lines) + "\n"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SlowRequestProfiler:
+    """Samples every thread's stack while requests are in flight
+
+    Samples are kept in a ring buffer; when a request turns out slower than
+    the threshold, the samples taken during it are written as folded stacks
+    ("thread;outer;...;inner count"). The event loop serves requests
+    concurrently, so a dump also contains whatever else ran meanwhile.
+    """
+
+    def __init__(self, threshold_sec: float, interval_sec: float, out_dir: str, max_samples: int = 20000):
+        self.threshold = threshold_sec
+        self.interval = interval_sec
+        self.out_dir = out_dir
+        self.samples: Deque[Tuple[float, Tuple[str, ...]]] = deque(maxlen=max_samples)
+        self.in_flight = 0
+        self.dumps = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def begin(self) -> float:
+        self.in_flight += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+        return time.perf_counter()
+
+    def end(self, started: float, method: str, route: str) -> Optional[str]:
+        """Dump the request's samples if it was slow; return the file path"""
+        self.in_flight -= 1
+        duration = time.perf_counter() - started
+        if duration < self.threshold:
+            return None
+        stacks: Counter = Counter()
+        # Copy first: the sampler thread keeps appending
+        for taken_at, stack in reversed(list(self.samples)):
+            if taken_at < started:
+                break
+            stacks[stack] += 1
+        if not stacks:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", f"{method} {route}").strip("_")
+        path = os.path.join(self.out_dir, f"{int(time.time() * 1000)}-{name}-{int(duration * 1000)}ms.folded")
+        with open(path, "w") as out:
+            for stack, count in stacks.most_common():
+                out.write(f"{';'.join(stack)} {count}\n")
+        self.dumps += 1
+        return path
+
+    def close(self):
+        self._stop.set()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if not self.in_flight:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples.append((now, tuple(reversed(stack))))
+
+
+class InstrumentationMiddleware:
+    """Times every HTTP request and feeds HttpMetrics (and the profiler)
+
+    Handler time runs until the response starts; serialization recorded by
+    ModelResponse during that span is subtracted and reported on its own.
+    Routes are labelled by their path template, so ids never create new
+    series. Must be the outermost middleware so cache hits count too.
+    """
+
+    def __init__(self, app, metrics: HttpMetrics, profiler: Optional[SlowRequestProfiler] = None):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+        self._paths: Optional[Dict[Any, str]] = None
+
+    def _route(self, scope) -> str:
+        router = scope.get("app")
+        if router is None:
+            return "unmatched"
+        if self._paths is None:
+            self._paths = {
+                route.endpoint: route.path for route in router.routes if hasattr(route, "endpoint")
+            }
+        endpoint = scope.get("endpoint")
+        if endpoint is not None and endpoint in self._paths:
+            return self._paths[endpoint]
+        # Answered before routing (e.g. a response cache hit)
+        for route in router.routes:
+            if hasattr(route, "endpoint") and route.matches(scope)[0] == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        profiled = self.profiler.begin() if self.profiler is not None else None
+        request_bytes = response_bytes = 0
+        status = 500
+        first_byte: Optional[float] = None
+
+        async def counting_receive():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def timed_send(message):
+            nonlocal response_bytes, status, first_byte
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                first_byte = time.perf_counter()
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, timed_send)
+        finally:
+            current_timings.reset(token)
+            finished = time.perf_counter()
+            route = self._route(scope)
+            handler = (first_byte if first_byte is not None else finished) - started - timings.serialization
+            self.metrics.observe(
+                scope["method"], route, status, finished - started, max(handler, 0.0),
+                timings.serialization, request_bytes, response_bytes,
+            )
+            if profiled is not None:
+                self.profiler.end(profiled, scope["method"], route)
+
+
+def create_profiler() -> Optional[SlowRequestProfiler]:
+    if PROFILE_SLOW_MS <= 0:
+        return None
+    return SlowRequestProfiler(PROFILE_SLOW_MS / 1000, PROFILE_INTERVAL_MS / 1000, PROFILE_DIR)
+
+
+http_metrics = HttpMetrics()
+profiler = create_profiler()
@@ -1,15 +1,42 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form
+from fastapi import Depends, FastAPI, Query, Request, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 import json
 import asyncio
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Type
 from .schemas import *
-from .data import *
+from .analytics import analytics
+from .audio import MAX_SAMPLE_RATE, MIN_SAMPLE_RATE, SAMPLE_RATE as AUDIO_SAMPLE_RATE
+from .bulk import FORMATS, ImportReport, UnsupportedFormat, detect_format, export_lines, read_rows, validate_batch
+from .cache import ResponseCacheMiddleware, response_cache
+from .files import etag_matches, not_modified, serve_file
+from .instrumentation import PROMETHEUS_CONTENT_TYPE, InstrumentationMiddleware, http_metrics, profiler, render_metrics
+from .matching import matcher
+from .notifications import notifier
+from .pagination import InvalidCursor, ListQuery, TranscriptWindow
+from .responses import ModelResponse
+from .reports import renderer, report_payload
+from .resumes import ResumeTooLarge, UnsupportedResume, resume_store
+from .storage import SnapshotStorage, storage
+from .transcripts import transcript_log
 from .websocket import manager
 
-app = FastAPI(title="HaRry AI HR API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_storage()
+    try:
+        yield
+    finally:
+        await close_storage()
+
+app = FastAPI(title="HaRry AI HR API", version="1.0.0", lifespan=lifespan)
+
+# Response cache for read-heavy GETs; added first so it runs inside CORS
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
 
 # CORS middleware
 app.add_middleware(
@@ -20,96 +47,334 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request timing, sizes and the slow-request profiler; outermost, so it
+# also sees CORS preflights and response cache hits
+app.add_middleware(InstrumentationMiddleware, metrics=http_metrics, profiler=profiler)
+
+# Serializes reloads of the matcher and analytics; created on the serving loop
+reload_lock: Optional[asyncio.Lock] = None
+
+async def load_derived():
+    """Rebuild the matcher and dashboard aggregates from storage"""
+    candidates = [candidate async for candidate in storage.scan("candidates")]
+    vacancies = [vacancy async for vacancy in storage.scan("vacancies")]
+    interviews = [interview async for interview in storage.scan("interviews")]
+    
+    # Score every candidate against the active vacancies in one batched pass
+    matcher.reset()
+    changes = matcher.load(candidates, vacancies)
+    
+    # Seed the dashboard aggregates; from here on writes update them
+    analytics.reset()
+    for candidate in candidates:
+        analytics.observe_candidate(candidate)
+    for vacancy in vacancies:
+        analytics.observe_vacancy(vacancy)
+    for interview in interviews:
+        analytics.observe_interview(interview)
+    await storage.update_match_percentages(changes)
+
+async def sync_derived():
+    """Reload matcher and analytics if another worker wrote to the shared storage
+
+    Called before they are read or used to score a write, so a worker
+    doesn't serve or store match percentages computed from stale data.
+    """
+    if reload_lock is None:
+        return
+    async with reload_lock:
+        if await storage.changed_elsewhere():
+            await load_derived()
+            response_cache.clear()
+
+async def open_storage():
+    await storage.open()
+    await manager.start()
+    await notifier.start()
+    await transcript_log.start()
+    if isinstance(storage, SnapshotStorage):
+        # Scores and aggregates were computed when the snapshot was built
+        storage.repo.restore(matcher, analytics)
+        return
+    global reload_lock
+    reload_lock = asyncio.Lock()
+    # Takes note of the data version the load starts from
+    await storage.changed_elsewhere()
+    await load_derived()
+
+async def close_storage():
+    await manager.close()
+    await notifier.close()
+    await transcript_log.close()
+    renderer.close()
+    if profiler is not None:
+        profiler.close()
+    await storage.close()
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+# Largest page a list endpoint serves
+LIST_MAX_LIMIT = 100
+
+def list_query(
+    page: int = 1,
+    limit: int = Query(10, ge=1, le=LIST_MAX_LIMIT),
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    sort_order: str = "asc",
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> ListQuery:
+    """Common list parameters; `cursor` (from `next_cursor`) takes precedence over `page`"""
+    return ListQuery(
+        status=status if status and status != 'all' else None,
+        search=search or None,
+        offset=max(page - 1, 0) * limit,
+        limit=limit,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
+        include_total=include_total,
+    )
+
 @app.get("/")
 async def root():
     return {"message": "HaRry AI HR API is running"}
 
 # Interviews endpoints
-@app.get("/api/interviews", response_model=ApiResponse)
-async def get_interviews(
-    page: int = 1,
-    limit: int = 10,
-    status: Optional[str] = None,
-    search: Optional[str] = None
-):
-    """Get list of interviews with pagination and filtering"""
-    interviews = MOCK_INTERVIEWS.copy()
-    
-    # Filter by status
-    if status and status != 'all':
-        interviews = [i for i in interviews if i.status == status]
-    
-    # Filter by search term
-    if search:
-        search_lower = search.lower()
-        interviews = [
-            i for i in interviews 
-            if search_lower in i.candidate_name.lower() or 
-               search_lower in i.position.lower()
-        ]
-    
-    # Pagination
-    start = (page - 1) * limit
-    end = start + limit
-    paginated_interviews = interviews[start:end]
-    
-    return ApiResponse(data=paginated_interviews, success=True)
-
-@app.get("/api/interviews/{interview_id}", response_model=ApiResponse)
-async def get_interview(interview_id: str):
-    """Get detailed interview information"""
-    # Check if we have detailed data
-    if interview_id in MOCK_INTERVIEW_DETAILS:
-        return ApiResponse(data=MOCK_INTERVIEW_DETAILS[interview_id], success=True)
-    
-    # Fallback to basic interview data
-    interview = next((i for i in MOCK_INTERVIEWS if i.id == interview_id), None)
+@app.get("/api/interviews", response_model=ApiResponse[List[Interview]])
+async def get_interviews(query: ListQuery = Depends(list_query)):
+    """Get list of interviews with pagination, filtering and sorting"""
+    # Filtering, sorting and pagination run in the storage backend
+    page = await storage.list_interviews(query)
+    
+    return ModelResponse(ApiResponse(data=page.items, success=True, next_cursor=page.next_cursor, total=page.total))
+
+@app.get("/api/interviews/{interview_id}", response_model=ApiResponse[InterviewDetail])
+async def get_interview(interview_id: str, include_transcript: bool = True):
+    """Get detailed interview information
+
+    With include_transcript=false only the header and metrics are returned;
+    the transcript is then loaded from /transcript in windows.
+    """
+    # Detailed data when we have it, basic interview data otherwise
+    interview = await storage.get_interview(interview_id, include_transcript)
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
+    if include_transcript:
+        interview = await with_logged_transcript(interview)
     
-    return ApiResponse(data=interview, success=True)
+    return ModelResponse(ApiResponse(data=interview, success=True))
+
+# Largest transcript window served per request, and the batch size of the
+# NDJSON stream; both bound the memory one request can hold
+TRANSCRIPT_MAX_LIMIT = 1000
+TRANSCRIPT_STREAM_BATCH = 500
+
+def transcript_window(
+    offset: int = 0,
+    limit: int = 100,
+    start: Optional[float] = None,
+    end: Optional[float] = None
+) -> TranscriptWindow:
+    """Transcript window parameters; `start`/`end` are timestamps in seconds"""
+    return TranscriptWindow(
+        offset=max(offset, 0),
+        limit=min(max(limit, 1), TRANSCRIPT_MAX_LIMIT),
+        start=start,
+        end=end,
+    )
+
+async def with_logged_transcript(interview: Interview) -> Interview:
+    """The interview with its live transcript log in place of the stored transcript, if it has one"""
+    entries = await run_in_threadpool(transcript_log.entries, interview.id)
+    if entries is None:
+        return interview
+    if isinstance(interview, InterviewDetail):
+        return interview.model_copy(update={"transcript": entries})
+    return InterviewDetail(**interview.model_dump(), transcript=entries)
+
+async def read_transcript(interview_id: str, window: TranscriptWindow):
+    """Transcript window from the interview's live log, or from storage when it has none
+
+    None if the interview doesn't exist, whatever is on disk for its id.
+    """
+    if await storage.get_interview(interview_id, include_transcript=False) is None:
+        return None
+    page = await run_in_threadpool(transcript_log.read, interview_id, window)
+    if page is None:
+        page = await storage.get_transcript(interview_id, window)
+    return page
+
+@app.get("/api/interviews/{interview_id}/transcript", response_model=ApiResponse[List[Dict[str, Any]]])
+async def get_interview_transcript(interview_id: str, window: TranscriptWindow = Depends(transcript_window)):
+    """Get a window of the interview transcript (`total` counts the whole time range)"""
+    page = await read_transcript(interview_id, window)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    
+    return ModelResponse(ApiResponse(data=page.items, success=True, total=page.total))
+
+@app.get("/api/interviews/{interview_id}/transcript/stream")
+async def stream_interview_transcript(interview_id: str, window: TranscriptWindow = Depends(transcript_window)):
+    """Stream the transcript (from `offset`, within `start`/`end`) as NDJSON"""
+    first = await read_transcript(interview_id, window._replace(limit=TRANSCRIPT_STREAM_BATCH))
+    if first is None:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    
+    async def lines():
+        page, offset = first, window.offset
+        while page is not None and page.items:
+            yield "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in page.items)
+            offset += len(page.items)
+            if len(page.items) < TRANSCRIPT_STREAM_BATCH:
+                break
+            page = await read_transcript(interview_id, window._replace(offset=offset, limit=TRANSCRIPT_STREAM_BATCH))
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 # Candidates endpoints
-@app.get("/api/candidates", response_model=ApiResponse)
-async def get_candidates(
-    page: int = 1,
-    limit: int = 10,
-    status: Optional[str] = None,
-    search: Optional[str] = None
-):
-    """Get list of candidates with pagination and filtering"""
-    candidates = MOCK_CANDIDATES.copy()
-    
-    # Filter by status
-    if status and status != 'all':
-        candidates = [c for c in candidates if c.status == status]
-    
-    # Filter by search term
-    if search:
-        search_lower = search.lower()
-        candidates = [
-            c for c in candidates 
-            if search_lower in c.name.lower() or 
-               search_lower in c.position.lower()
-        ]
-    
-    # Pagination
-    start = (page - 1) * limit
-    end = start + limit
-    paginated_candidates = candidates[start:end]
-    
-    return ApiResponse(data=paginated_candidates, success=True)
-
-@app.get("/api/candidates/{candidate_id}", response_model=ApiResponse)
+@app.get("/api/candidates", response_model=ApiResponse[List[Candidate]])
+async def get_candidates(query: ListQuery = Depends(list_query)):
+    """Get list of candidates with pagination, filtering and sorting"""
+    # Filtering, sorting and pagination run in the storage backend
+    page = await storage.list_candidates(query)
+    
+    return ModelResponse(ApiResponse(data=page.items, success=True, next_cursor=page.next_cursor, total=page.total))
+
+# Bulk import/export (declared before /{candidate_id} so the paths aren't taken as ids)
+def bulk_format(format: Optional[str], filename: Optional[str] = None) -> str:
+    try:
+        return detect_format(format, filename)
+    except UnsupportedFormat as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+
+async def bulk_import(file: UploadFile, format: Optional[str], model: Type, write: Callable[[List[Any]], Awaitable[None]]):
+    """Validate an upload batch by batch and hand each valid batch to `write`"""
+    rows = read_rows(file.file, bulk_format(format, file.filename))
+    report = ImportReport()
+    try:
+        done = False
+        while not done:
+            # Reading and validating run off the event loop
+            items, errors, done = await run_in_threadpool(validate_batch, rows, model)
+            await write(items)
+            report.add(len(items), errors)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File is not valid UTF-8; {report.imported} rows were imported before the error"
+        )
+    finally:
+        rows.close()
+        await file.close()
+    
+    summary = report.summary()
+    return ModelResponse(ApiResponse(
+        data=summary,
+        success=True,
+        message=f"Imported {summary['imported']} rows, {summary['failed']} failed"
+    ))
+
+def bulk_export(entity: str, model: Type, format: str, status: Optional[str]):
+    fmt = bulk_format(format)
+    items = storage.scan(entity, status=status if status and status != 'all' else None)
+    return StreamingResponse(
+        export_lines(items, model, fmt),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{fmt}"'}
+    )
+
+@app.post("/api/candidates/import", response_model=ApiResponse[Dict[str, Any]])
+async def import_candidates(file: UploadFile = File(...), format: Optional[str] = None):
+    """Bulk import candidates from NDJSON or CSV; invalid rows are reported, not imported"""
+    async def write(candidates: List[Candidate]):
+        await sync_derived()
+        for candidate in candidates:
+            candidate.match_percentage = matcher.set_candidate(candidate)
+        await storage.add_candidates(candidates)
+        for candidate in candidates:
+            analytics.observe_candidate(candidate)
+        response_cache.invalidate("candidates", *(f"candidates:{c.id}" for c in candidates))
+    
+    return await bulk_import(file, format, Candidate, write)
+
+@app.get("/api/candidates/export")
+async def export_candidates(format: str = "ndjson", status: Optional[str] = None):
+    """Stream every candidate as NDJSON or CSV"""
+    return bulk_export("candidates", Candidate, format, status)
+
+# Candidate page data in one round trip
+VIEW_FIELDS = ("candidate", "interview", "report")
+VIEW_MAX_IDS = 100
+
+def view_fields(fields: Optional[str] = None) -> Set[str]:
+    """Comma-separated subset of VIEW_FIELDS to resolve (all by default)"""
+    if not fields:
+        return set(VIEW_FIELDS)
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected.difference(VIEW_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return selected
+
+async def candidate_view(candidate_id: str, fields: Set[str], include_transcript: bool) -> Optional[CandidateView]:
+    """Candidate with its interview and report; None if the candidate doesn't exist"""
+    async def skipped():
+        return None
+    
+    # The report is keyed by candidate id, so it loads alongside the candidate;
+    # the interview has to wait for candidate.interview_id
+    candidate, report = await asyncio.gather(
+        storage.get_candidate(candidate_id),
+        storage.get_report_for_candidate(candidate_id) if "report" in fields else skipped()
+    )
+    if candidate is None:
+        return None
+    interview = None
+    if "interview" in fields and candidate.interview_id:
+        interview = await storage.get_interview(candidate.interview_id, include_transcript)
+        if interview is not None and include_transcript:
+            interview = await with_logged_transcript(interview)
+    
+    return CandidateView(
+        candidate=candidate if "candidate" in fields else None,
+        interview=interview,
+        report=report
+    )
+
+@app.get("/api/candidates/view", response_model=ApiResponse[List[CandidateView]])
+async def get_candidate_views(ids: str, fields: Set[str] = Depends(view_fields), include_transcript: bool = False):
+    """Views of several candidates (`ids` comma-separated); unknown ids are skipped"""
+    candidate_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if len(candidate_ids) > VIEW_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {VIEW_MAX_IDS} ids per request")
+    
+    views = await asyncio.gather(*(candidate_view(i, fields, include_transcript) for i in candidate_ids))
+    return ModelResponse(ApiResponse(data=[view for view in views if view is not None], success=True))
+
+@app.get("/api/candidates/{candidate_id}/view", response_model=ApiResponse[CandidateView])
+async def get_candidate_view(candidate_id: str, fields: Set[str] = Depends(view_fields), include_transcript: bool = False):
+    """Candidate, linked interview (without transcript unless asked) and report"""
+    view = await candidate_view(candidate_id, fields, include_transcript)
+    if view is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    
+    return ModelResponse(ApiResponse(data=view, success=True))
+
+@app.get("/api/candidates/{candidate_id}", response_model=ApiResponse[Candidate])
 async def get_candidate(candidate_id: str):
     """Get candidate by ID"""
-    candidate = next((c for c in MOCK_CANDIDATES if c.id == candidate_id), None)
+    candidate = await storage.get_candidate(candidate_id)
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
     
-    return ApiResponse(data=candidate, success=True)
+    return ModelResponse(ApiResponse(data=candidate, success=True))
 
-@app.post("/api/candidates", response_model=ApiResponse)
+@app.post("/api/candidates", response_model=ApiResponse[Candidate])
 async def create_candidate(
     name: str = Form(...),
     email: str = Form(...),
@@ -126,6 +391,18 @@ async def create_candidate(
     # Parse skills from JSON string
     skills_list = json.loads(skills) if skills else []
     
+    # Stream the resume into the content-addressed store
+    stored_resume = None
+    if resume is not None:
+        try:
+            stored_resume = await resume_store.save(resume)
+        except ResumeTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+        except UnsupportedResume as exc:
+            raise HTTPException(status_code=415, detail=str(exc))
+        finally:
+            await resume.close()
+    
     # Create new candidate
     new_candidate = Candidate(
         id=str(uuid.uuid4()),
@@ -135,48 +412,46 @@ async def create_candidate(
         position=position,
         experience=experience,
         skills=skills_list,
-        resume_url=f"/api/resumes/{candidate_id}.pdf" if resume else None,
+        resume_url=stored_resume.url if stored_resume else None,
         status="new",
         created_at=datetime.now()
     )
+    await sync_derived()
+    new_candidate.match_percentage = matcher.set_candidate(new_candidate)
     
-    # Add to mock data
-    MOCK_CANDIDATES.append(new_candidate)
+    # Persist through the storage backend
+    await storage.add_candidate(new_candidate)
+    analytics.observe_candidate(new_candidate)
+    response_cache.invalidate("candidates")
     
-    return ApiResponse(data=new_candidate, success=True, message="Candidate created successfully")
+    return ModelResponse(ApiResponse(data=new_candidate, success=True, message="Candidate created successfully"))
+
+@app.get("/api/resumes/{name}")
+async def download_resume(name: str, request: Request):
+    """Serve a stored resume (supports Range and If-None-Match)"""
+    stored = resume_store.get(name)
+    if not stored:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    # Content-addressed: the bytes behind a name never change
+    return serve_file(
+        request,
+        stored.path,
+        etag=stored.etag,
+        media_type=stored.media_type,
+        cache_control="public, max-age=31536000, immutable"
+    )
 
 # Vacancies endpoints
-@app.get("/api/vacancies", response_model=ApiResponse)
-async def get_vacancies(
-    page: int = 1,
-    limit: int = 10,
-    status: Optional[str] = None,
-    search: Optional[str] = None
-):
-    """Get list of vacancies with pagination and filtering"""
-    vacancies = MOCK_VACANCIES.copy()
-    
-    # Filter by status
-    if status and status != 'all':
-        vacancies = [v for v in vacancies if v.status == status]
-    
-    # Filter by search term
-    if search:
-        search_lower = search.lower()
-        vacancies = [
-            v for v in vacancies 
-            if search_lower in v.title.lower() or 
-               search_lower in v.department.lower()
-        ]
-    
-    # Pagination
-    start = (page - 1) * limit
-    end = start + limit
-    paginated_vacancies = vacancies[start:end]
-    
-    return ApiResponse(data=paginated_vacancies, success=True)
-
-@app.post("/api/vacancies", response_model=ApiResponse)
+@app.get("/api/vacancies", response_model=ApiResponse[List[Vacancy]])
+async def get_vacancies(query: ListQuery = Depends(list_query)):
+    """Get list of vacancies with pagination, filtering and sorting"""
+    # Filtering, sorting and pagination run in the storage backend
+    page = await storage.list_vacancies(query)
+    
+    return ModelResponse(ApiResponse(data=page.items, success=True, next_cursor=page.next_cursor, total=page.total))
+
+@app.post("/api/vacancies", response_model=ApiResponse[Vacancy])
 async def create_vacancy(vacancy_data: VacancyCreate):
     """Create new vacancy"""
     import uuid
@@ -198,59 +473,197 @@ async def create_vacancy(vacancy_data: VacancyCreate):
         applicants_count=0
     )
     
-    # Add to mock data
-    MOCK_VACANCIES.append(new_vacancy)
+    # Persist through the storage backend
+    await sync_derived()
+    await storage.add_vacancy(new_vacancy)
+    analytics.observe_vacancy(new_vacancy)
+    
+    # A new vacancy can raise candidates' best match
+    changes = matcher.set_vacancy(new_vacancy)
+    await storage.update_match_percentages(changes)
+    response_cache.invalidate("vacancies", "candidates", *(f"candidates:{i}" for i in changes))
+    
+    return ModelResponse(ApiResponse(data=new_vacancy, success=True, message="Vacancy created successfully"))
+
+@app.post("/api/vacancies/import", response_model=ApiResponse[Dict[str, Any]])
+async def import_vacancies(file: UploadFile = File(...), format: Optional[str] = None):
+    """Bulk import vacancies from NDJSON or CSV; invalid rows are reported, not imported"""
+    async def write(vacancies: List[Vacancy]):
+        await sync_derived()
+        await storage.add_vacancies(vacancies)
+        for vacancy in vacancies:
+            analytics.observe_vacancy(vacancy)
+        # One batched matching pass per batch instead of one per vacancy
+        changes = matcher.load([], vacancies)
+        await storage.update_match_percentages(changes)
+        response_cache.invalidate("vacancies", "candidates", *(f"candidates:{i}" for i in changes))
+    
+    return await bulk_import(file, format, Vacancy, write)
+
+@app.get("/api/vacancies/export")
+async def export_vacancies(format: str = "ndjson", status: Optional[str] = None):
+    """Stream every vacancy as NDJSON or CSV"""
+    return bulk_export("vacancies", Vacancy, format, status)
+
+@app.get("/api/vacancies/{vacancy_id}/matches", response_model=ApiResponse[List[CandidateMatch]])
+async def get_vacancy_matches(vacancy_id: str, limit: int = 20):
+    """Get the best matching candidates for a vacancy, highest match first"""
+    vacancy = await storage.get_vacancy(vacancy_id)
+    if not vacancy:
+        raise HTTPException(status_code=404, detail="Vacancy not found")
     
-    return ApiResponse(data=new_vacancy, success=True, message="Vacancy created successfully")
+    await sync_derived()
+    results = matcher.rank(vacancy, min(max(limit, 1), 100))
+    candidates = await asyncio.gather(*(storage.get_candidate(r.candidate_id) for r in results))
+    matches = [
+        CandidateMatch(candidate=candidate, match_percentage=r.match_percentage, matched_skills=r.matched_skills)
+        for r, candidate in zip(results, candidates) if candidate is not None
+    ]
+    return ModelResponse(ApiResponse(data=matches, success=True))
 
 # Reports endpoints
-@app.get("/api/reports/{candidate_id}", response_model=ApiResponse)
+@app.get("/api/reports/{candidate_id}", response_model=ApiResponse[Report])
 async def get_report(candidate_id: str):
     """Get report for candidate"""
-    report = next((r for r in MOCK_REPORTS if r.candidate_id == candidate_id), None)
+    report = await storage.get_report_for_candidate(candidate_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    return ApiResponse(data=report, success=True)
+    return ModelResponse(ApiResponse(data=report, success=True))
 
 @app.get("/api/reports/{candidate_id}/pdf")
-async def download_report_pdf(candidate_id: str):
-    """Download report PDF (mock)"""
-    # In a real implementation, this would generate and return a PDF
-    # For now, we'll return a mock PDF response
-    return Response(
-        content=b"Mock PDF content for report",
+async def download_report_pdf(candidate_id: str, request: Request):
+    """Download report PDF (rendered once per report version, then cached)"""
+    report = await storage.get_report_for_candidate(candidate_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    candidate, interview = await asyncio.gather(
+        storage.get_candidate(candidate_id),
+        storage.get_interview(report.interview_id, include_transcript=False)
+    )
+    payload = report_payload(report, candidate, interview)
+    
+    # Revalidation needs only the content hash, not the rendered file
+    cached = renderer.locate(payload)
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return not_modified(cached.etag)
+    
+    rendered = await renderer.render(payload)
+    return serve_file(
+        request,
+        rendered.path,
+        etag=rendered.etag,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=report_{candidate_id}.pdf"}
+        filename=f"report_{candidate_id}.pdf",
+        disposition="attachment"
     )
 
-# Notifications endpoint
-@app.post("/api/notifications", response_model=ApiResponse)
+# Analytics endpoint
+@app.get("/api/analytics", response_model=ApiResponse[Dict[str, Any]])
+async def get_analytics():
+    """Dashboard aggregates: status counts, score histograms, durations and time series"""
+    await sync_derived()
+    return ModelResponse(ApiResponse(data=analytics.snapshot(), success=True))
+
+# Notifications endpoints
+async def notification_jobs(notifications: List[NotificationData]) -> List[tuple]:
+    """(candidate id, recipient, subject, body) for each notification"""
+    candidates = await asyncio.gather(*(storage.get_candidate(n.candidate_id) for n in notifications))
+    missing = [n.candidate_id for n, candidate in zip(notifications, candidates) if candidate is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Candidate not found: {', '.join(missing[:10])}")
+    return [(n.candidate_id, c.email, n.subject, n.body) for n, c in zip(notifications, candidates)]
+
+@app.post("/api/notifications", response_model=ApiResponse[Dict[str, Any]], status_code=202)
 async def send_notification(notification_data: NotificationData):
-    """Send notification (mock)"""
-    # In a real implementation, this would send an actual notification
-    return ApiResponse(
-        data={"sent": True, "notification_id": "mock_id"},
+    """Queue a notification; delivery happens in the background"""
+    job_ids = await notifier.enqueue(await notification_jobs([notification_data]))
+    return ModelResponse(ApiResponse(
+        data={"job_id": job_ids[0], "status": NotificationStatus.QUEUED},
+        success=True,
+        message="Notification queued"
+    ), status_code=202)
+
+@app.post("/api/notifications/batch", response_model=ApiResponse[Dict[str, Any]], status_code=202)
+async def send_notifications(notifications: List[NotificationData]):
+    """Queue a campaign of notifications in one spool transaction"""
+    job_ids = await notifier.enqueue(await notification_jobs(notifications))
+    return ModelResponse(ApiResponse(
+        data={"job_ids": job_ids, "status": NotificationStatus.QUEUED},
         success=True,
-        message="Notification sent successfully"
+        message=f"{len(job_ids)} notifications queued"
+    ), status_code=202)
+
+@app.get("/api/notifications/{job_id}", response_model=ApiResponse[NotificationJob])
+async def get_notification(job_id: str):
+    """Get delivery status of a queued notification"""
+    job = await notifier.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    
+    return ModelResponse(ApiResponse(data=job, success=True))
+
+# WebSocket endpoints
+@app.get("/api/ws/stats", response_model=ApiResponse[Dict[str, Any]])
+async def get_websocket_stats():
+    """Live stream fan-out statistics (queue depth, drops, send latency)"""
+    return ModelResponse(ApiResponse(data=manager.stats(), success=True))
+
+# Metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics: per-route latency and sizes, WebSocket fan-out, cache and queue"""
+    body = render_metrics(
+        http_metrics,
+        manager.stats(),
+        manager.delivery_latency,
+        response_cache.stats(),
+        await notifier.stats()
     )
+    return Response(body, media_type=PROMETHEUS_CONTENT_TYPE)
 
-# WebSocket endpoint
 @app.websocket("/ws/interviews/{interview_id}")
-async def websocket_endpoint(websocket: WebSocket, interview_id: str):
-    await manager.connect(websocket, interview_id)
+async def websocket_endpoint(
+    websocket: WebSocket,
+    interview_id: str,
+    since: Optional[int] = None,
+    sample_rate: int = AUDIO_SAMPLE_RATE
+):
+    # The first subscriber starts the interview stream, the last one stops it.
+    # `since` is the last `seq` the client saw; only the gap is replayed.
+    if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+        await websocket.close(code=1003)
+        return
+    # Unknown ids get no stream: no simulation, no transcript log on disk
+    if await storage.get_interview(interview_id, include_transcript=False) is None:
+        await websocket.close(code=1008)
+        return
+    await manager.connect(websocket, interview_id, since)
+    audio_rejected = False
     try:
-        # Start simulation in background
-        asyncio.create_task(manager.simulate_interview(interview_id))
-        
         while True:
-            # Keep connection alive and handle any incoming messages
-            data = await websocket.receive_text()
-            # Echo back any received data
-            await manager.send_personal_message(f"Echo: {data}", websocket)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                # Binary frames carry the interview audio (16-bit mono PCM)
+                if not manager.feed_audio(websocket, interview_id, message["bytes"], sample_rate) and not audio_rejected:
+                    audio_rejected = True
+                    await manager.send_personal_message(json.dumps({
+                        "type": "error",
+                        "data": {"message": "Another connection is already streaming audio for this interview"},
+                        "timestamp": time.time()
+                    }), websocket)
+                continue
+            # Echo back any received text
+            await manager.send_personal_message(f"Echo: {message.get('text')}", websocket)
             
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, interview_id)
+        await manager.end_audio(websocket, interview_id)
 
 if __name__ == "__main__":
     import uvicorn
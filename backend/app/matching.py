@@ -0,0 +1,414 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from .schemas import Candidate, Vacancy, VacancyStatus
+from .search import tokenize
+
+# Share of the match coming from skill overlap vs. meeting the experience bar
+SKILL_WEIGHT = 0.8
+EXPERIENCE_WEIGHT = 0.2
+
+# Candidates scored per vectorized step; bounds the (chunk, vacancies, words)
+# temporary to a few tens of MB
+CHUNK_SIZE = 4096
+
+# "3+ лет опыта", "5 years of experience": a minimum experience, not a skill
+_EXPERIENCE_RE = re.compile(r"(\d+)\s*\+?\s*(?:лет|год|years?)", re.IGNORECASE)
+# Filler in front of the actual skill: "Опыт с Redux", "Experience with Go"
+_REQUIREMENT_PREFIXES = (
+    ("опыт", "работы", "с"), ("опыт", "с"), ("опыт", "в"), ("знание",), ("владение",),
+    ("experience", "with"), ("experience", "in"), ("knowledge", "of"),
+)
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        return _BYTE_BITS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def skill_key(skill: str) -> str:
+    """Normalized skill name ("Node.js" and "node js" are the same skill)"""
+    return " ".join(tokenize(skill))
+
+
+def parse_requirements(requirements: Iterable[str]) -> Tuple[List[str], int]:
+    """Split vacancy requirements into skill keys and a minimum experience"""
+    skills: Dict[str, None] = {}
+    min_experience = 0
+    for requirement in requirements:
+        match = _EXPERIENCE_RE.search(requirement)
+        if match:
+            min_experience = max(min_experience, int(match.group(1)))
+            continue
+        tokens = tokenize(requirement)
+        for prefix in _REQUIREMENT_PREFIXES:
+            if tuple(tokens[:len(prefix)]) == prefix and len(tokens) > len(prefix):
+                tokens = tokens[len(prefix):]
+                break
+        if tokens:
+            skills[" ".join(tokens)] = None
+    return list(skills), min_experience
+
+
+class MatchResult(NamedTuple):
+    candidate_id: str
+    match_percentage: int
+    matched_skills: List[str]
+
+
+class CandidateMatcher:
+    """Scores candidates against active vacancies with packed skill bitsets
+
+    Every skill some vacancy requires gets a bit in a vocabulary; candidates
+    and vacancies are rows of uint64 words. A match is the popcount of
+    candidate & vacancy, so all pairs are scored in batched NumPy passes.
+    Each candidate's best score over active vacancies is its
+    `match_percentage`.
+    """
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.skill_names: List[str] = []
+        self.display_names: Dict[str, str] = {}  # skill key -> name as first written
+        # Rows holding each skill, including skills no vacancy asks for yet,
+        # so a new vocabulary bit can be filled in without rescanning
+        self.skill_rows: Dict[str, Dict[int, None]] = defaultdict(dict)
+        self.words = 1
+
+        self.candidate_ids: List[str] = []
+        self.candidate_row: Dict[str, int] = {}
+        self.candidate_skills: Dict[int, List[str]] = {}
+        self.bits = np.zeros((0, self.words), dtype=np.uint64)
+        self.experience = np.zeros(0, dtype=np.float32)
+        self.best = np.zeros(0, dtype=np.int16)  # -1: no active vacancy
+
+        # Vacancy rows grow geometrically like candidate rows; only the first
+        # len(vacancy_ids) are in use
+        self.vacancy_ids: List[str] = []
+        self.vacancy_row: Dict[str, int] = {}
+        self.req_bits = np.zeros((0, self.words), dtype=np.uint64)
+        self.req_counts = np.zeros(0, dtype=np.float32)
+        self.min_experience = np.zeros(0, dtype=np.float32)
+
+        # After restore(): rows holding each skill key when the state was
+        # exported (key -> base_rows[base_offsets[i]:base_offsets[i + 1]]);
+        # rows updated since then are tracked in skill_rows instead
+        self.base_skills: Dict[str, int] = {}
+        self.base_offsets = np.zeros(1, dtype=np.uint64)
+        self.base_rows = np.zeros(0, dtype=np.uint32)
+        self.rewritten: Set[int] = set()
+
+    def __len__(self):
+        return len(self.candidate_ids)
+
+    def reset(self):
+        """Forget every candidate and vacancy, before loading them again"""
+        self.__init__()
+
+    # Vocabulary and bit rows
+
+    def _bit(self, key: str) -> int:
+        bit = self.vocabulary.get(key)
+        if bit is not None:
+            return bit
+        bit = self.vocabulary[key] = len(self.skill_names)
+        self.skill_names.append(key)
+        if bit >= self.words * 64:
+            extra = self.words
+            self.bits = np.pad(self.bits, ((0, 0), (0, extra)))
+            self.req_bits = np.pad(self.req_bits, ((0, 0), (0, extra)))
+            self.words += extra
+        word, mask = bit // 64, np.uint64(1 << (bit % 64))
+        rows = self._skill_rows(key)
+        if len(rows):
+            self.bits[rows, word] |= mask
+        return bit
+
+    def _skill_rows(self, key: str) -> np.ndarray:
+        rows = np.fromiter(self.skill_rows.get(key, {}), dtype=np.int64)
+        i = self.base_skills.get(key)
+        if i is not None:
+            base = self.base_rows[self.base_offsets[i]:self.base_offsets[i + 1]].astype(np.int64)
+            if self.rewritten:
+                base = base[~np.isin(base, np.fromiter(self.rewritten, dtype=np.int64))]
+            rows = np.concatenate((base, rows))
+        return rows
+
+    def _row_bits(self, keys: Iterable[str]) -> np.ndarray:
+        row = np.zeros(self.words, dtype=np.uint64)
+        for key in keys:
+            bit = self.vocabulary.get(key)
+            if bit is not None:
+                row[bit // 64] |= np.uint64(1 << (bit % 64))
+        return row
+
+    def _requirement_row(self, vacancy: Vacancy, register: bool = False) -> Tuple[np.ndarray, int, int, List[str]]:
+        """Requirement bits, required skill count and minimum experience of a vacancy
+
+        Only indexed vacancies `register` their skills in the vocabulary. A
+        skill without a bit still counts as required; no candidate has it.
+        """
+        skills, min_experience = parse_requirements(vacancy.requirements)
+        if register:
+            for key in skills:
+                self._bit(key)
+        return self._row_bits(skills), len(skills), min_experience, skills
+
+    def _grow(self, array: np.ndarray, size: int) -> np.ndarray:
+        if size <= len(array):
+            return array
+        capacity = max(size, 2 * len(array), 64)
+        grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    # Scoring
+
+    def _score(self, bits: np.ndarray, experience: np.ndarray,
+               req_bits: np.ndarray, req_counts: np.ndarray, min_experience: np.ndarray) -> np.ndarray:
+        """(candidates, vacancies) matrix of match percentages"""
+        shape = (len(bits), len(req_bits))
+        # One 2-D AND + popcount per 64-skill word: far cheaper than a
+        # (candidates, vacancies, words) temporary reduced over its last axis
+        overlap = np.zeros(shape, dtype=np.uint16)
+        pair = np.empty(shape, dtype=np.uint64)
+        for word in range(bits.shape[1]):
+            np.bitwise_and(bits[:, word, None], req_bits[None, :, word], out=pair)
+            overlap += _popcount(pair)
+
+        skill_scale = np.where(req_counts > 0, 100 * SKILL_WEIGHT / np.maximum(req_counts, 1), 0).astype(np.float32)
+        score = overlap * skill_scale
+        score += np.where(req_counts > 0, 0, 100 * SKILL_WEIGHT).astype(np.float32)
+        experience_fit = np.minimum(1, experience[:, None] / np.maximum(min_experience, 1))
+        score += 100 * EXPERIENCE_WEIGHT * np.where(min_experience > 0, experience_fit, 1).astype(np.float32)
+        return np.rint(score).astype(np.int16)
+
+    def _best(self, start: int, stop: int) -> np.ndarray:
+        """Best score over active vacancies for candidate rows [start, stop)"""
+        vacancies = len(self.vacancy_ids)
+        if not vacancies:
+            return np.full(stop - start, -1, dtype=np.int16)
+        best = np.empty(stop - start, dtype=np.int16)
+        for lo in range(start, stop, CHUNK_SIZE):
+            hi = min(lo + CHUNK_SIZE, stop)
+            scores = self._score(
+                self.bits[lo:hi], self.experience[lo:hi],
+                self.req_bits[:vacancies], self.req_counts[:vacancies], self.min_experience[:vacancies],
+            )
+            best[lo - start:hi - start] = scores.max(axis=1)
+        return best
+
+    def _apply(self, best: np.ndarray) -> Dict[str, Optional[int]]:
+        """Store new best scores; return the candidates whose score changed"""
+        count = len(self.candidate_ids)
+        changed = np.flatnonzero(best != self.best[:count])
+        self.best[:count] = best
+        return {
+            self.candidate_ids[row]: (int(best[row]) if best[row] >= 0 else None)
+            for row in changed
+        }
+
+    # Updates
+
+    def load(self, candidates: Iterable[Candidate], vacancies: Iterable[Vacancy]) -> Dict[str, Optional[int]]:
+        """Index everything, then score all candidates in one batched pass
+
+        Returns the candidates whose stored match_percentage is now stale.
+        """
+        for vacancy in vacancies:
+            self._put_vacancy(vacancy)
+        for candidate in candidates:
+            self._put_candidate(candidate)
+        return self._apply(self._best(0, len(self.candidate_ids)))
+
+    def _put_candidate(self, candidate: Candidate) -> int:
+        keys = []
+        for skill in candidate.skills:
+            key = skill_key(skill)
+            if key and key not in keys:
+                keys.append(key)
+                self.display_names.setdefault(key, skill)
+        row = self.candidate_row.get(candidate.id)
+        if row is None:
+            row = self.candidate_row[candidate.id] = len(self.candidate_ids)
+            self.candidate_ids.append(candidate.id)
+            self.candidate_skills[row] = keys
+            size = len(self.candidate_ids)
+            self.bits = self._grow(self.bits, size)
+            self.experience = self._grow(self.experience, size)
+            self.best = self._grow(self.best, size)
+            stored = candidate.match_percentage
+            self.best[row] = -1 if stored is None else stored
+        else:
+            previous = self.candidate_skills.get(row)
+            if previous is None:
+                self.rewritten.add(row)  # Restored row; its base skills no longer apply
+            for key in previous or ():
+                self.skill_rows[key].pop(row, None)
+            self.candidate_skills[row] = keys
+        for key in keys:
+            self.skill_rows[key][row] = None
+        self.bits[row] = self._row_bits(keys)
+        self.experience[row] = candidate.experience
+        return row
+
+    def set_candidate(self, candidate: Candidate) -> Optional[int]:
+        """Add or update a candidate and return its match_percentage"""
+        row = self._put_candidate(candidate)
+        best = int(self._best(row, row + 1)[0])
+        self.best[row] = best
+        return best if best >= 0 else None
+
+    def _put_vacancy(self, vacancy: Vacancy) -> bool:
+        """Index an active vacancy (or drop an inactive one); True if it was indexed before"""
+        existed = vacancy.id in self.vacancy_row
+        if existed:
+            self._drop_vacancy(vacancy.id)
+        if vacancy.status != VacancyStatus.ACTIVE:
+            return existed
+        row_bits, required, min_experience, _ = self._requirement_row(vacancy, register=True)
+        row = self.vacancy_row[vacancy.id] = len(self.vacancy_ids)
+        self.vacancy_ids.append(vacancy.id)
+        size = len(self.vacancy_ids)
+        self.req_bits = self._grow(self.req_bits, size)
+        self.req_counts = self._grow(self.req_counts, size)
+        self.min_experience = self._grow(self.min_experience, size)
+        self.req_bits[row] = row_bits
+        self.req_counts[row] = required
+        self.min_experience[row] = min_experience
+        return existed
+
+    def _drop_vacancy(self, vacancy_id: str):
+        row = self.vacancy_row.pop(vacancy_id)
+        del self.vacancy_ids[row]
+        size = len(self.vacancy_ids)
+        # Shift the later rows up in place; the freed last row is spare capacity
+        for array in (self.req_bits, self.req_counts, self.min_experience):
+            array[row:size] = array[row + 1:size + 1]
+            array[size] = 0
+        for i, other in enumerate(self.vacancy_ids[row:], start=row):
+            self.vacancy_row[other] = i
+
+    def set_vacancy(self, vacancy: Vacancy) -> Dict[str, Optional[int]]:
+        """Add or update a vacancy; return candidates whose match_percentage changed
+
+        A new active vacancy can only raise scores, so only its own column
+        is computed. Replacing or closing one can lower them, which needs
+        a full pass.
+        """
+        existed = self._put_vacancy(vacancy)
+        count = len(self.candidate_ids)
+        if existed:
+            return self._apply(self._best(0, count))
+        if vacancy.id not in self.vacancy_row:
+            return {}
+        row = self.vacancy_row[vacancy.id]
+        best = self.best[:count].copy()
+        for lo in range(0, count, CHUNK_SIZE):
+            hi = min(lo + CHUNK_SIZE, count)
+            column = self._score(
+                self.bits[lo:hi], self.experience[lo:hi],
+                self.req_bits[row:row + 1], self.req_counts[row:row + 1], self.min_experience[row:row + 1],
+            )[:, 0]
+            np.maximum(best[lo:hi], column, out=best[lo:hi])
+        return self._apply(best)
+
+    def rank(self, vacancy: Vacancy, limit: int) -> List[MatchResult]:
+        """Top candidates for one vacancy (active or not), best first"""
+        row_bits, required, min_experience, _ = self._requirement_row(vacancy)
+        count = len(self.candidate_ids)
+        if count == 0 or limit <= 0:
+            return []
+        scores = np.empty(count, dtype=np.int16)
+        for lo in range(0, count, CHUNK_SIZE):
+            hi = min(lo + CHUNK_SIZE, count)
+            scores[lo:hi] = self._score(
+                self.bits[lo:hi], self.experience[lo:hi],
+                row_bits[None, :], np.array([required], dtype=np.float32),
+                np.array([min_experience], dtype=np.float32),
+            )[:, 0]
+
+        limit = min(limit, count)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        # Highest score first; ties keep insertion order
+        top = top[np.lexsort((top, -scores[top]))]
+        matches = []
+        for row in top:
+            common = self.bits[row] & row_bits
+            matched = [
+                self.display_names.get(self.skill_names[word * 64 + bit], self.skill_names[word * 64 + bit])
+                for word in np.flatnonzero(common)
+                for bit in range(64) if int(common[word]) >> bit & 1
+            ]
+            matches.append(MatchResult(self.candidate_ids[row], int(scores[row]), matched))
+        return matches
+
+    # Snapshots
+
+    def export(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """State of a matcher filled by load(), as JSON-serializable fields and arrays
+
+        Candidate ids are left out: restore() gets them in row order from
+        wherever the candidates themselves are stored.
+        """
+        count = len(self.candidate_ids)
+        vacancies = len(self.vacancy_ids)
+        keys = [key for key, rows in self.skill_rows.items() if rows]
+        postings = [np.fromiter(sorted(self.skill_rows[key]), dtype=np.uint32) for key in keys]
+        offsets = np.zeros(len(keys) + 1, dtype=np.uint64)
+        offsets[1:] = np.cumsum([len(rows) for rows in postings], dtype=np.uint64)
+        state = {
+            "skill_names": self.skill_names,
+            "display_names": self.display_names,
+            "words": self.words,
+            "vacancy_ids": self.vacancy_ids,
+            "skill_keys": keys,
+        }
+        arrays = {
+            "bits": self.bits[:count],
+            "experience": self.experience[:count],
+            "best": self.best[:count],
+            "req_bits": self.req_bits[:vacancies],
+            "req_counts": self.req_counts[:vacancies],
+            "min_experience": self.min_experience[:vacancies],
+            "skill_offsets": offsets,
+            "skill_rows": np.concatenate(postings) if postings else np.zeros(0, dtype=np.uint32),
+        }
+        return state, arrays
+
+    def restore(self, state: Dict[str, Any], arrays: Dict[str, np.ndarray], candidate_ids, candidate_row):
+        """Start from an export(); arrays are used as given, without copying
+
+        `candidate_ids` and `candidate_row` only need the list/dict operations
+        used here (indexing, append, get, item assignment), so they can be
+        views over wherever the ids are stored. Candidates not updated since
+        keep no per-row Python objects, and restoring costs the same whatever
+        the number of candidates.
+        """
+        self.__init__()
+        self.skill_names = list(state["skill_names"])
+        self.vocabulary = {key: bit for bit, key in enumerate(self.skill_names)}
+        self.display_names = dict(state["display_names"])
+        self.words = state["words"]
+        self.candidate_ids = candidate_ids
+        self.candidate_row = candidate_row
+        self.bits = arrays["bits"].reshape(-1, self.words)
+        self.experience = arrays["experience"]
+        self.best = arrays["best"]
+        self.vacancy_ids = list(state["vacancy_ids"])
+        self.vacancy_row = {vacancy_id: row for row, vacancy_id in enumerate(self.vacancy_ids)}
+        self.req_bits = arrays["req_bits"].reshape(-1, self.words)
+        self.req_counts = arrays["req_counts"]
+        self.min_experience = arrays["min_experience"]
+        self.base_skills = {key: i for i, key in enumerate(state["skill_keys"])}
+        self.base_offsets = arrays["skill_offsets"]
+        self.base_rows = arrays["skill_rows"]
+
+
+matcher = CandidateMatcher()
@@ -0,0 +1,157 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .search import tokenize
+
+# Technical vocabulary the keyword matcher looks for in candidate answers
+DEFAULT_KEYWORDS = [
+    "React", "TypeScript", "JavaScript", "CSS", "HTML", "Node.js", "Redux", "Vue", "Angular",
+    "Python", "Django", "FastAPI", "PostgreSQL", "SQL", "Redis", "Docker", "Kubernetes",
+    "AWS", "Terraform", "CI/CD", "Git", "REST", "GraphQL", "API", "Figma", "Sketch",
+    "Adobe XD", "React Hook Form", "Zod",
+]
+
+# Small sentiment lexicon (folded stems matched as token prefixes)
+POSITIVE_STEMS = ("отличн", "хорош", "нрав", "интересн", "успешн", "рад", "great", "good", "love", "enjoy")
+NEGATIVE_STEMS = ("плох", "сложн", "проблем", "трудн", "ошибк", "bad", "hard", "problem", "difficult")
+
+# Speech rate assumed when estimating how long an utterance took to say
+NOMINAL_WORDS_PER_MIN = 140.0
+# Keywords needed for the full technical score
+TARGET_KEYWORDS = 6
+
+
+class KeywordMatcher:
+    """Streaming multi-word keyword matcher over tokens
+
+    Keywords are stored in a token trie; feeding a token advances every
+    partial match by one step, so the cost per token is bounded by the
+    longest keyword, not by how much text came before.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.trie: Dict[str, Any] = {}
+        for keyword in keywords:
+            tokens = tokenize(keyword)
+            if not tokens:
+                continue
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[None] = keyword  # terminal marker
+        self.active: List[Dict[str, Any]] = []
+
+    def feed(self, tokens: Iterable[str]) -> List[str]:
+        """Advance over `tokens`; return keywords completed by them"""
+        found = []
+        for token in tokens:
+            advanced = []
+            for node in self.active + [self.trie]:
+                child = node.get(token)
+                if child is not None:
+                    if None in child:
+                        found.append(child[None])
+                    advanced.append(child)
+            self.active = advanced
+        return found
+
+    def reset(self):
+        """Drop partial matches (keywords never span utterances)"""
+        self.active = []
+
+
+class MetricsEngine:
+    """Interview metrics maintained incrementally from transcript entries
+
+    add() updates running aggregates in O(1) per entry (plus the entry's own
+    length); snapshot() and delta() only read them, so live scores never
+    rescan the transcript.
+    """
+
+    def __init__(self, keywords: Optional[Iterable[str]] = None):
+        self.matcher = KeywordMatcher(DEFAULT_KEYWORDS if keywords is None else keywords)
+        self.entries = 0
+        self.confidence_total = 0.0
+        self.candidate_words = 0
+        self.candidate_seconds = 0.0
+        self.pauses_sec = 0.0
+        self.positive = 0
+        self.negative = 0
+        self.keywords: Dict[str, None] = {}  # insertion-ordered set
+        # Previous entry: (speaker, timestamp, words); its length is only
+        # known once the next entry arrives
+        self.previous: Optional[Tuple[str, float, int]] = None
+        self.emitted: Dict[str, Any] = {}
+        # Measured from live audio (see set_voice_activity); replaces the
+        # pause and speaking-time estimates derived from timestamps
+        self.voice: Optional[Dict[str, Any]] = None
+
+    def add(self, entry: Dict[str, Any]):
+        speaker = entry.get("speaker")
+        timestamp = float(entry.get("timestamp", 0))
+        tokens = tokenize(entry.get("text", ""))
+
+        self.entries += 1
+        self.confidence_total += float(entry.get("confidence", 0))
+
+        if self.previous is not None:
+            prev_speaker, prev_timestamp, prev_words = self.previous
+            gap = max(0.0, timestamp - prev_timestamp)
+            spoken = prev_words * 60.0 / NOMINAL_WORDS_PER_MIN
+            self.pauses_sec += max(0.0, gap - spoken)
+            if prev_speaker == "candidate":
+                self.candidate_seconds += gap
+        self.previous = (speaker, timestamp, len(tokens))
+
+        if speaker != "candidate":
+            return
+        self.candidate_words += len(tokens)
+        for token in tokens:
+            if token.startswith(POSITIVE_STEMS):
+                self.positive += 1
+            elif token.startswith(NEGATIVE_STEMS):
+                self.negative += 1
+        self.matcher.reset()
+        for keyword in self.matcher.feed(tokens):
+            self.keywords[keyword] = None
+
+    def set_voice_activity(self, voice: Dict[str, Any]):
+        """Use measured `pauses_sec`/`speech_sec` (and report the other fields as-is)"""
+        self.voice = voice
+
+    def snapshot(self) -> Dict[str, Any]:
+        avg_confidence = self.confidence_total / self.entries if self.entries else 0.0
+        pauses_sec, candidate_seconds = self.pauses_sec, self.candidate_seconds
+        if self.voice is not None:
+            pauses_sec, candidate_seconds = self.voice["pauses_sec"], self.voice["speech_sec"]
+        speaking_rate = self.candidate_words * 60.0 / candidate_seconds if candidate_seconds else 0.0
+        polar = self.positive + self.negative
+        sentiment = 0.5 + 0.5 * (self.positive - self.negative) / polar if polar else 0.5
+
+        technical = 40 + 60 * min(1.0, len(self.keywords) / TARGET_KEYWORDS) if self.keywords else 0
+        rate_fit = 1 - min(1.0, abs(speaking_rate - NOMINAL_WORDS_PER_MIN) / NOMINAL_WORDS_PER_MIN) if speaking_rate else 0.0
+        communication = 100 * (0.5 * avg_confidence + 0.3 * rate_fit + 0.2 * sentiment)
+        snapshot = {
+            "pauses_sec": round(pauses_sec),
+            "avg_confidence": round(avg_confidence, 2),
+            "speaking_rate": round(speaking_rate),
+            "sentiment_score": round(sentiment, 2),
+            "keywords_used": list(self.keywords),
+            "technical_score": round(technical),
+            "communication_score": round(communication),
+            "overall_score": round(0.6 * technical + 0.4 * communication),
+        }
+        if self.voice is not None:
+            snapshot.update({key: value for key, value in self.voice.items() if key != "pauses_sec"})
+        return snapshot
+
+    def delta(self) -> Dict[str, Any]:
+        """Fields changed since the previous delta() (all fields the first time)"""
+        current = self.snapshot()
+        changed = {key: value for key, value in current.items() if self.emitted.get(key) != value}
+        self.emitted = current
+        return changed
+
+    def keyframe(self) -> Dict[str, Any]:
+        """Full snapshot; later deltas are relative to it"""
+        self.emitted = self.snapshot()
+        return dict(self.emitted)
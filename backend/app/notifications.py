@@ -0,0 +1,357 @@
+import asyncio
+import logging
+import os
+import random
+import smtplib
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .schemas import NotificationJob
+from .storage import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Jobs are spooled in their own SQLite file, so queued mail survives restarts
+# with either storage backend and every API worker can drain the same queue
+NOTIFY_SPOOL = os.getenv("HARRY_NOTIFY_SPOOL", os.path.join(_BACKEND_DIR, "notifications.db"))
+# "file" writes .eml files to HARRY_NOTIFY_OUTBOX (local stand-in for SMTP),
+# "smtp" delivers through HARRY_SMTP_HOST:HARRY_SMTP_PORT
+NOTIFY_TRANSPORT = os.getenv("HARRY_NOTIFY_TRANSPORT", "file")
+NOTIFY_OUTBOX = os.getenv("HARRY_NOTIFY_OUTBOX", os.path.join(_BACKEND_DIR, "outbox"))
+NOTIFY_FROM = os.getenv("HARRY_NOTIFY_FROM", "HaRry AI HR <noreply@harry.local>")
+SMTP_HOST = os.getenv("HARRY_SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("HARRY_SMTP_PORT", "1025"))
+
+NOTIFY_WORKERS = int(os.getenv("HARRY_NOTIFY_WORKERS", "2"))
+NOTIFY_BATCH_SIZE = int(os.getenv("HARRY_NOTIFY_BATCH_SIZE", "50"))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("HARRY_NOTIFY_MAX_ATTEMPTS", "5"))
+# Retry n waits about BACKOFF * 2**(n-1) seconds, capped at MAX_BACKOFF
+NOTIFY_BACKOFF_SEC = float(os.getenv("HARRY_NOTIFY_BACKOFF_SEC", "2"))
+NOTIFY_MAX_BACKOFF_SEC = 3600.0
+# Minimum gap between two messages to the same recipient
+RECIPIENT_INTERVAL_SEC = float(os.getenv("HARRY_NOTIFY_RECIPIENT_INTERVAL_SEC", "60"))
+
+# A claimed job is leased to one worker; if that worker dies the lease runs
+# out and the job is picked up again
+LEASE_SEC = 300.0
+# How often idle workers look for retries that became due
+POLL_INTERVAL_SEC = 1.0
+
+SPOOL_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        candidate_id TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        transport TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        sent_at REAL,
+        last_error TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_due ON jobs(status, next_attempt_at)",
+    """CREATE TABLE IF NOT EXISTS recipients (
+        recipient TEXT PRIMARY KEY,
+        last_sent_at REAL NOT NULL
+    )""",
+]
+
+SQL_INSERT_JOB = """
+    INSERT INTO jobs (id, candidate_id, recipient, transport, subject, body, status, next_attempt_at, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)
+"""
+JOB_COLUMNS = (
+    "id", "candidate_id", "recipient", "transport", "subject", "status",
+    "attempts", "created_at", "updated_at", "next_attempt_at", "sent_at", "last_error",
+)
+SQL_GET_JOB = f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?"
+
+# Queued jobs that are due, plus sending jobs whose lease ran out
+SQL_DUE = "(status = 'queued' OR status = 'sending') AND next_attempt_at <= :now"
+SQL_NEXT_TRANSPORT = f"SELECT transport FROM jobs WHERE {SQL_DUE} ORDER BY next_attempt_at LIMIT 1"
+SQL_DUE_JOBS = f"""
+    SELECT j.id, j.recipient, j.subject, j.body, j.attempts, r.last_sent_at
+    FROM jobs j LEFT JOIN recipients r ON r.recipient = j.recipient
+    WHERE {SQL_DUE} AND j.transport = :transport
+    ORDER BY j.next_attempt_at
+    LIMIT :limit
+"""
+SQL_LEASE = "UPDATE jobs SET status = 'sending', next_attempt_at = ?, updated_at = ? WHERE id = ?"
+SQL_DEFER = "UPDATE jobs SET status = 'queued', next_attempt_at = ?, updated_at = ? WHERE id = ?"
+SQL_RESERVE_RECIPIENT = """
+    INSERT INTO recipients (recipient, last_sent_at) VALUES (?, ?)
+    ON CONFLICT(recipient) DO UPDATE SET last_sent_at = excluded.last_sent_at
+"""
+# A failed delivery never reached the recipient, so it gives its slot back
+# (unless a later send already took it)
+SQL_RELEASE_RECIPIENT = "UPDATE recipients SET last_sent_at = ? WHERE recipient = ? AND last_sent_at = ?"
+SQL_SENT = """
+    UPDATE jobs SET status = 'sent', attempts = attempts + 1, sent_at = ?, updated_at = ?, last_error = NULL
+    WHERE id = ?
+"""
+SQL_RETRY = """
+    UPDATE jobs SET status = ?, attempts = attempts + 1, next_attempt_at = ?, updated_at = ?, last_error = ?
+    WHERE id = ?
+"""
+SQL_STATUS_COUNTS = "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+
+
+class Delivery(NamedTuple):
+    job_id: str
+    attempts: int
+    message: EmailMessage
+    recipient: str
+    reserved_at: float
+    previous_sent_at: Optional[float]
+
+
+class Batch(NamedTuple):
+    transport: Optional[str]
+    deliveries: List[Delivery]
+
+
+def backoff(attempt: int) -> float:
+    """Delay before retry number `attempt` (1-based), with jitter"""
+    delay = min(NOTIFY_BACKOFF_SEC * 2 ** (attempt - 1), NOTIFY_MAX_BACKOFF_SEC)
+    return delay * (0.5 + random.random() / 2)
+
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value) if value is not None else None
+
+
+def _job(row: tuple) -> NotificationJob:
+    job = dict(zip(JOB_COLUMNS, row))
+    for field in ("created_at", "updated_at", "sent_at"):
+        job[field] = _timestamp(job[field])
+    # While sending, next_attempt_at holds the lease expiry, not a retry time
+    job["next_attempt_at"] = _timestamp(job["next_attempt_at"]) if job["status"] == "queued" else None
+    return NotificationJob(**job)
+
+
+def _message(recipient: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = NOTIFY_FROM
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+def _transaction(conn: sqlite3.Connection, fn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = fn()
+        conn.execute("COMMIT")
+        return result
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _claim(conn: sqlite3.Connection, limit: int) -> Batch:
+    """Lease up to `limit` due jobs of one transport, honouring recipient rate limits"""
+    def claim() -> Batch:
+        now = time.time()
+        row = conn.execute(SQL_NEXT_TRANSPORT, {"now": now}).fetchone()
+        if row is None:
+            return Batch(None, [])
+        transport = row[0]
+        rows = conn.execute(SQL_DUE_JOBS, {"now": now, "transport": transport, "limit": limit}).fetchall()
+        deliveries = []
+        reserved: Dict[str, float] = {}
+        for job_id, recipient, subject, body, attempts, last_sent_at in rows:
+            last_sent_at = reserved.get(recipient, last_sent_at)
+            if last_sent_at is not None and now - last_sent_at < RECIPIENT_INTERVAL_SEC:
+                # Too soon for this recipient: push back without using an attempt
+                not_before = last_sent_at + RECIPIENT_INTERVAL_SEC
+                conn.execute(SQL_DEFER, (not_before, now, job_id))
+                reserved[recipient] = not_before
+                continue
+            conn.execute(SQL_LEASE, (now + LEASE_SEC, now, job_id))
+            conn.execute(SQL_RESERVE_RECIPIENT, (recipient, now))
+            reserved[recipient] = now
+            deliveries.append(Delivery(job_id, attempts, _message(recipient, subject, body), recipient, now, last_sent_at))
+        return Batch(transport, deliveries)
+
+    return _transaction(conn, claim)
+
+
+def _finish(conn: sqlite3.Connection, results: List[Tuple[Delivery, Optional[str]]]):
+    def finish():
+        now = time.time()
+        for delivery, error in results:
+            if error is None:
+                conn.execute(SQL_SENT, (now, now, delivery.job_id))
+                continue
+            conn.execute(SQL_RELEASE_RECIPIENT, (delivery.previous_sent_at or 0, delivery.recipient, delivery.reserved_at))
+            attempt = delivery.attempts + 1
+            if attempt >= NOTIFY_MAX_ATTEMPTS:
+                conn.execute(SQL_RETRY, ("failed", now, now, error, delivery.job_id))
+            else:
+                conn.execute(SQL_RETRY, ("queued", now + backoff(attempt), now, error, delivery.job_id))
+
+    _transaction(conn, finish)
+
+
+class Transport:
+    """Delivers a batch of messages; runs in a worker thread"""
+
+    def send_batch(self, messages: List[EmailMessage]) -> List[Optional[str]]:
+        """Per-message error text, None for delivered"""
+        raise NotImplementedError
+
+
+class FileTransport(Transport):
+    """Local SMTP stand-in: every message becomes an .eml file in the outbox"""
+
+    def __init__(self, outbox: str = NOTIFY_OUTBOX):
+        self.outbox = outbox
+
+    def send_batch(self, messages):
+        os.makedirs(self.outbox, exist_ok=True)
+        errors: List[Optional[str]] = []
+        for message in messages:
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=self.outbox, suffix=".tmp")
+                with os.fdopen(fd, "wb") as out:
+                    out.write(message.as_bytes())
+                os.replace(tmp_path, tmp_path[:-len(".tmp")] + ".eml")
+                errors.append(None)
+            except OSError as exc:
+                errors.append(str(exc))
+        return errors
+
+
+class SMTPTransport(Transport):
+    """Sends a whole batch over one SMTP connection"""
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def send_batch(self, messages):
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except (OSError, smtplib.SMTPException) as exc:
+            return [f"SMTP connection failed: {exc}"] * len(messages)
+        errors: List[Optional[str]] = []
+        with smtp:
+            for message in messages:
+                try:
+                    smtp.send_message(message)
+                    errors.append(None)
+                except smtplib.SMTPServerDisconnected as exc:
+                    # The rest of the batch can't go out on this connection
+                    errors += [str(exc)] * (len(messages) - len(errors))
+                    break
+                except (OSError, smtplib.SMTPException) as exc:
+                    errors.append(str(exc))
+        return errors
+
+
+class NotificationQueue:
+    """Persistent notification job queue drained by a pool of worker tasks
+
+    enqueue() only writes the job to the spool, so requests never wait on
+    mail delivery. Workers lease due jobs of one transport at a time and
+    hand them to the transport as a batch; failures are retried with
+    exponential backoff until NOTIFY_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, path: str = NOTIFY_SPOOL, workers: int = NOTIFY_WORKERS,
+                 transports: Optional[Dict[str, Transport]] = None):
+        self.path = path
+        self.workers = workers
+        self.transports = transports if transports is not None else {
+            "file": FileTransport(),
+            "smtp": SMTPTransport(),
+        }
+        self._pool: Optional[ConnectionPool] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def pool(self) -> ConnectionPool:
+        if self._pool is None:
+            pool = ConnectionPool(self.path, size=max(self.workers, 1) + 1)
+            pool.run_sync(lambda conn: [conn.execute(statement) for statement in SPOOL_SCHEMA])
+            self._pool = pool
+        return self._pool
+
+    async def start(self):
+        self.pool
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    async def enqueue(self, items: List[Tuple[str, str, str, str]], transport: str = NOTIFY_TRANSPORT) -> List[str]:
+        """Spool (candidate id, recipient, subject, body) jobs; return their ids"""
+        now = time.time()
+        rows = [
+            (str(uuid.uuid4()), candidate_id, recipient, transport, subject, body, now, now, now)
+            for candidate_id, recipient, subject, body in items
+        ]
+        await self.pool.run(lambda conn: _transaction(conn, lambda: conn.executemany(SQL_INSERT_JOB, rows)))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return [row[0] for row in rows]
+
+    async def get(self, job_id: str) -> Optional[NotificationJob]:
+        row = await self.pool.run(lambda conn: conn.execute(SQL_GET_JOB, (job_id,)).fetchone())
+        return _job(row) if row else None
+
+    async def stats(self) -> Dict[str, int]:
+        rows = await self.pool.run(lambda conn: conn.execute(SQL_STATUS_COUNTS).fetchall())
+        counts = {"queued": 0, "sending": 0, "sent": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            try:
+                batch = await self.pool.run(lambda conn: _claim(conn, NOTIFY_BATCH_SIZE))
+                if not batch.deliveries:
+                    if batch.transport is None:
+                        try:
+                            await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL_SEC)
+                        except asyncio.TimeoutError:
+                            pass
+                    continue
+                transport = self.transports.get(batch.transport)
+                messages = [delivery.message for delivery in batch.deliveries]
+                if transport is None:
+                    errors = [f"Unknown transport: {batch.transport}"] * len(messages)
+                else:
+                    errors = await loop.run_in_executor(None, transport.send_batch, messages)
+                await self.pool.run(lambda conn: _finish(conn, list(zip(batch.deliveries, errors))))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification worker failed, retrying")
+                await asyncio.sleep(POLL_INTERVAL_SEC)
+
+
+notifier = NotificationQueue()
@@ -0,0 +1,159 @@
+import base64
+import json
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Server-side sort keys accepted by each list endpoint
+SORT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "candidates": ("created_at", "score", "match_percentage"),
+    "interviews": ("scheduled_at", "score"),
+    "vacancies": ("created_at", "applicants_count"),
+}
+
+# Stand-in for missing numeric values so they sort before every real one
+MISSING = -1
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+class ListQuery(NamedTuple):
+    """Filtering, sorting and pagination options of a list endpoint"""
+    status: Optional[str] = None
+    search: Optional[str] = None
+    offset: int = 0
+    limit: int = 10
+    sort_by: Optional[str] = None
+    sort_order: str = "asc"
+    cursor: Optional[str] = None
+    include_total: bool = False
+
+    @property
+    def descending(self) -> bool:
+        return self.sort_order == "desc"
+
+
+class TranscriptWindow(NamedTuple):
+    """Offset/limit window over a transcript, optionally within [start, end) seconds"""
+    offset: int = 0
+    limit: int = 100
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+
+def in_time_range(entry: Dict[str, Any], start: Optional[float], end: Optional[float]) -> bool:
+    timestamp = entry.get("timestamp", 0)
+    return (start is None or timestamp >= start) and (end is None or timestamp < end)
+
+
+def check_sort(entity: str, sort_by: Optional[str], sort_order: str):
+    if sort_by is not None and sort_by not in SORT_FIELDS[entity]:
+        allowed = ", ".join(SORT_FIELDS[entity])
+        raise InvalidCursor(f"sort_by must be one of: {allowed}")
+    if sort_order not in ("asc", "desc"):
+        raise InvalidCursor("sort_order must be 'asc' or 'desc'")
+
+
+def sort_value(model, sort_by: Optional[str]):
+    """Comparable value of the sort field (0 for the default insertion order)"""
+    if sort_by is None:
+        return 0
+    value = getattr(model, sort_by)
+    if value is None:
+        return MISSING
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def encode_cursor(sort_by: Optional[str], sort_order: str, key=None, offset: Optional[int] = None) -> str:
+    """Opaque cursor holding either the last (value, seq) key or an offset"""
+    state = {"s": sort_by, "d": sort_order}
+    if key is not None:
+        state["k"] = list(key)
+    else:
+        state["o"] = offset
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: Optional[str], sort_order: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except ValueError:
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(state, dict) or ("k" not in state and "o" not in state):
+        raise InvalidCursor("Malformed cursor")
+    if state.get("s") != sort_by or state.get("d") != sort_order:
+        raise InvalidCursor("Cursor does not match sort_by/sort_order")
+    return state
+
+
+def read_cursor(entity: str, query: ListQuery) -> Tuple[Optional[Tuple[Any, int]], int]:
+    """Validate sorting and resolve the cursor into (keyset position, offset)"""
+    check_sort(entity, query.sort_by, query.sort_order)
+    if not query.cursor:
+        return None, query.offset
+    state = decode_cursor(query.cursor, query.sort_by, query.sort_order)
+    if "k" in state:
+        try:
+            value, seq = state["k"]
+            return (value, int(seq)), 0
+        except (TypeError, ValueError):
+            raise InvalidCursor("Malformed cursor")
+    offset = state["o"]
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor("Malformed cursor")
+    return None, offset
+
+
+class SortedIndex:
+    """Sorted (value, seq, id) entries for keyset pagination
+
+    `seq` is the row's insertion sequence, which makes every key unique and
+    keeps the order stable among rows with equal sort values.
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[Any, int, str]] = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, value, seq: int, item_id: str):
+        entry = (value, seq, item_id)
+        if not self.entries or self.entries[-1] < entry:
+            self.entries.append(entry)
+        else:
+            insort(self.entries, entry)
+
+    def remove(self, value, seq: int, item_id: str):
+        i = bisect_left(self.entries, (value, seq, item_id))
+        if i < len(self.entries) and self.entries[i] == (value, seq, item_id):
+            del self.entries[i]
+
+    def page(self, after: Optional[Tuple[Any, int]], descending: bool, limit: int) -> List[Tuple[Any, int, str]]:
+        """Return up to `limit` entries strictly after the `after` key"""
+        entries = self.entries
+        if not descending:
+            start = 0 if after is None else bisect_left(entries, (after[0], after[1] + 1))
+            return entries[start:start + limit]
+        end = len(entries) if after is None else bisect_left(entries, (after[0], after[1]))
+        return entries[max(0, end - limit):end][::-1]
+
+    def skip(self, offset: int, descending: bool, limit: int) -> List[Tuple[Any, int, str]]:
+        """Offset-based window, kept for the legacy `page` parameter"""
+        if not descending:
+            return self.entries[offset:offset + limit]
+        end = max(0, len(self.entries) - offset)
+        return self.entries[max(0, end - limit):end][::-1]
+
@@ -0,0 +1,334 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# on_message(interview_id, seq, serialized message)
+MessageHandler = Callable[[str, int, str], None]
+# on_produce(interview_id, should_produce, last_seq)
+ProduceHandler = Callable[[str, bool, int], None]
+
+
+class PubSub:
+    """Interview event bus underneath ConnectionManager
+
+    A worker subscribes to an interview while it has local sockets for it.
+    The bus elects exactly one subscribed worker as the interview's producer
+    (on_produce) and delivers every published message once to each
+    subscribed worker (on_message). A subscribed worker can claim the
+    producer role, e.g. because the interview's live audio arrives there.
+    """
+
+    def __init__(self):
+        self.on_message: MessageHandler = lambda interview_id, seq, message: None
+        self.on_produce: ProduceHandler = lambda interview_id, produce, last_seq: None
+
+    def bind(self, on_message: MessageHandler, on_produce: ProduceHandler):
+        self.on_message = on_message
+        self.on_produce = on_produce
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def subscribe(self, interview_id: str):
+        raise NotImplementedError
+
+    async def unsubscribe(self, interview_id: str):
+        raise NotImplementedError
+
+    async def publish(self, interview_id: str, seq: int, message: str):
+        raise NotImplementedError
+
+    async def claim(self, interview_id: str) -> bool:
+        """Become the producer of a subscribed interview; False if the bus didn't grant it"""
+        raise NotImplementedError
+
+    def release(self, interview_id: str):
+        """Stop re-claiming the interview after reconnects (the role itself is kept)"""
+        pass
+
+
+class InProcessPubSub(PubSub):
+    """Single-worker bus: this process produces and consumes everything"""
+
+    def __init__(self):
+        super().__init__()
+        self.subscribed: Set[str] = set()
+
+    async def subscribe(self, interview_id):
+        if interview_id not in self.subscribed:
+            self.subscribed.add(interview_id)
+            self.on_produce(interview_id, True, 0)
+
+    async def unsubscribe(self, interview_id):
+        if interview_id in self.subscribed:
+            self.subscribed.discard(interview_id)
+            self.on_produce(interview_id, False, 0)
+
+    async def publish(self, interview_id, seq, message):
+        if interview_id in self.subscribed:
+            self.on_message(interview_id, seq, message)
+
+    async def claim(self, interview_id):
+        return interview_id in self.subscribed
+
+
+def _encode(frame: Dict[str, Any]) -> bytes:
+    data = json.dumps(frame).encode()
+    return struct.pack(">I", len(data)) + data
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    (size,) = struct.unpack(">I", await reader.readexactly(4))
+    return json.loads(await reader.readexactly(size))
+
+
+class UnixSocketBroker:
+    """Relays frames between worker connections over a Unix domain socket
+
+    Runs inside whichever worker holds the broker lock. It tracks which
+    connections subscribe to each interview, picks one of them as producer
+    (re-electing when it leaves) and relays the producer's messages to all
+    subscribers.
+    """
+
+    # Connections whose unsent output exceeds this are dropped as stuck
+    MAX_WRITE_BUFFER = 16 * 1024 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self.producers: Dict[str, asyncio.StreamWriter] = {}
+        self.last_seq: Dict[str, int] = {}
+
+    async def start(self):
+        self.server = await asyncio.start_unix_server(self._handle, self.path)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def _send(self, writer: asyncio.StreamWriter, frame: Dict[str, Any]):
+        if writer.is_closing():
+            return
+        writer.write(_encode(frame))
+        if writer.transport.get_write_buffer_size() > self.MAX_WRITE_BUFFER:
+            logger.warning("Dropping stuck pub/sub connection")
+            writer.close()
+
+    def _elect(self, interview_id: str):
+        subscribers = self.subscribers.get(interview_id)
+        if not subscribers:
+            self.subscribers.pop(interview_id, None)
+            self.producers.pop(interview_id, None)
+            self.last_seq.pop(interview_id, None)
+            return
+        producer = next(iter(subscribers))
+        self.producers[interview_id] = producer
+        self._send(producer, {"op": "produce", "i": interview_id, "s": self.last_seq.get(interview_id, 0)})
+
+    def _claim(self, writer: asyncio.StreamWriter, interview_id: str):
+        if writer not in self.subscribers.get(interview_id, ()):
+            return
+        producer = self.producers.get(interview_id)
+        if producer is not writer:
+            if producer is not None:
+                self._send(producer, {"op": "stop", "i": interview_id})
+            self.producers[interview_id] = writer
+        self._send(writer, {"op": "produce", "i": interview_id, "s": self.last_seq.get(interview_id, 0)})
+
+    def _unsubscribe(self, writer: asyncio.StreamWriter, interview_id: str):
+        subscribers = self.subscribers.get(interview_id)
+        if subscribers is None or writer not in subscribers:
+            return
+        subscribers.discard(writer)
+        if self.producers.get(interview_id) is writer:
+            self._send(writer, {"op": "stop", "i": interview_id})
+            self._elect(interview_id)
+        elif not subscribers:
+            producer = self.producers.get(interview_id)
+            if producer is not None:
+                self._send(producer, {"op": "stop", "i": interview_id})
+            self._elect(interview_id)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                op, interview_id = frame.get("op"), frame.get("i")
+                if op == "sub":
+                    self.subscribers.setdefault(interview_id, set()).add(writer)
+                    if interview_id not in self.producers:
+                        self._elect(interview_id)
+                elif op == "unsub":
+                    self._unsubscribe(writer, interview_id)
+                elif op == "claim":
+                    self._claim(writer, interview_id)
+                elif op == "pub" and self.producers.get(interview_id) is writer:
+                    # Messages from a revoked producer are ignored
+                    self.last_seq[interview_id] = frame["s"]
+                    relay = {"op": "msg", "i": interview_id, "s": frame["s"], "m": frame["m"]}
+                    for subscriber in list(self.subscribers.get(interview_id, ())):
+                        self._send(subscriber, relay)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Broker shutting down; ending quietly keeps asyncio from logging
+            # the cancelled connection handler as an error
+            pass
+        finally:
+            for interview_id in [i for i, s in self.subscribers.items() if writer in s]:
+                self._unsubscribe(writer, interview_id)
+            writer.close()
+
+
+class UnixSocketPubSub(PubSub):
+    """Multi-worker bus through a broker on a local Unix socket
+
+    Every worker connects as a client; the first one to take an flock on
+    `<path>.lock` also hosts the broker. If the broker's worker dies the
+    lock is released, clients reconnect and one of them takes over.
+    """
+
+    RETRY_DELAY = 0.2
+    # How long claim() waits for the broker to hand over the producer role
+    CLAIM_TIMEOUT = 5.0
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.subscribed: Set[str] = set()
+        self.producing: Set[str] = set()
+        # Claimed again after every reconnect, as the broker re-elects
+        self.claimed: Set[str] = set()
+        self._claims: Dict[str, asyncio.Future] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._broker: Optional[UnixSocketBroker] = None
+        self._lock_fd: Optional[int] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._broker is not None:
+            await self._broker.close()
+            self._broker = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _become_broker(self):
+        import fcntl
+
+        if self._broker is not None:
+            return
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return
+        self._lock_fd = fd
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left over by a dead broker
+        self._broker = UnixSocketBroker(self.path)
+        await self._broker.start()
+
+    def _send(self, frame: Dict[str, Any]):
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write(_encode(frame))
+
+    async def _run(self):
+        while True:
+            try:
+                await self._become_broker()
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                await asyncio.sleep(self.RETRY_DELAY)
+                continue
+
+            self._writer = writer
+            for interview_id in self.subscribed:
+                self._send({"op": "sub", "i": interview_id})
+            for interview_id in self.claimed & self.subscribed:
+                self._send({"op": "claim", "i": interview_id})
+            try:
+                while True:
+                    frame = await _read_frame(reader)
+                    op, interview_id = frame["op"], frame["i"]
+                    if op == "msg":
+                        self.on_message(interview_id, frame["s"], frame["m"])
+                    elif op == "produce":
+                        self.producing.add(interview_id)
+                        self.on_produce(interview_id, True, frame["s"])
+                        claim = self._claims.pop(interview_id, None)
+                        if claim is not None and not claim.done():
+                            claim.set_result(True)
+                    elif op == "stop":
+                        self.producing.discard(interview_id)
+                        self.on_produce(interview_id, False, 0)
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                logger.warning("Lost connection to pub/sub broker, reconnecting")
+            finally:
+                self._writer = None
+                writer.close()
+                # Producer roles die with the broker; it re-elects on reconnect
+                for interview_id in list(self.producing):
+                    self.producing.discard(interview_id)
+                    self.on_produce(interview_id, False, 0)
+            await asyncio.sleep(self.RETRY_DELAY)
+
+    async def subscribe(self, interview_id):
+        await self.start()
+        if interview_id not in self.subscribed:
+            self.subscribed.add(interview_id)
+            self._send({"op": "sub", "i": interview_id})
+
+    async def unsubscribe(self, interview_id):
+        if interview_id in self.subscribed:
+            self.subscribed.discard(interview_id)
+            self._send({"op": "unsub", "i": interview_id})
+
+    async def publish(self, interview_id, seq, message):
+        self._send({"op": "pub", "i": interview_id, "s": seq, "m": message})
+
+    async def claim(self, interview_id):
+        if interview_id not in self.subscribed:
+            return False
+        self.claimed.add(interview_id)
+        claim = self._claims.get(interview_id)
+        if claim is None:
+            claim = self._claims[interview_id] = asyncio.get_running_loop().create_future()
+        self._send({"op": "claim", "i": interview_id})
+        try:
+            return await asyncio.wait_for(asyncio.shield(claim), self.CLAIM_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._claims.pop(interview_id, None)
+            return False
+
+    def release(self, interview_id):
+        self.claimed.discard(interview_id)
+
+
+def create_pubsub() -> PubSub:
+    """Pick the bus from HARRY_PUBSUB: `memory` (default) or `unix`"""
+    backend = os.getenv("HARRY_PUBSUB", "memory").lower()
+    if backend == "memory":
+        return InProcessPubSub()
+    if backend == "unix":
+        return UnixSocketPubSub(os.getenv("HARRY_PUBSUB_PATH", "/tmp/harry-pubsub.sock"))
+    raise ValueError(f"Unknown HARRY_PUBSUB backend: {backend}")
@@ -0,0 +1,221 @@
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from .schemas import Candidate, InterviewDetail, Report
+
+logger = logging.getLogger(__name__)
+
+# Rendered PDFs are cached as <report id>-<content hash>.pdf in this directory
+PDF_CACHE_DIR = os.getenv(
+    "HARRY_PDF_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "report_cache"),
+)
+PDF_WORKERS = int(os.getenv("HARRY_PDF_WORKERS", "2"))
+# TrueType font with Cyrillic glyphs; the built-in PDF fonts only cover Latin-1
+PDF_FONT = os.getenv("HARRY_PDF_FONT", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+# Bump when the layout changes so cached files built by the old code are skipped
+RENDER_VERSION = 1
+
+DECISION_LABELS = {"hire": "Нанять", "reject": "Отказать", "maybe": "На рассмотрении"}
+
+METRIC_LABELS = {
+    "technical_score": "Технические навыки",
+    "communication_score": "Коммуникация",
+    "overall_score": "Общая оценка",
+    "avg_confidence": "Средняя уверенность",
+    "sentiment_score": "Тональность",
+    "speaking_rate": "Темп речи (слов/мин)",
+    "pauses_sec": "Паузы (сек)",
+}
+
+
+class RenderedReport(NamedTuple):
+    path: str
+    etag: str
+
+
+def report_payload(report: Report, candidate: Optional[Candidate], interview: Optional[InterviewDetail]) -> Dict[str, Any]:
+    """Everything the PDF shows, as plain JSON data for the worker process"""
+    return {
+        "version": RENDER_VERSION,
+        "report": report.model_dump(mode="json"),
+        "candidate": candidate.model_dump(mode="json") if candidate else None,
+        # The transcript isn't printed, so it must not affect the cache key
+        "interview": interview.model_dump(mode="json", exclude={"transcript"}) if interview else None,
+    }
+
+
+def content_hash(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _register_font() -> str:
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if "HarryFont" in pdfmetrics.getRegisteredFontNames():
+        return "HarryFont"
+    try:
+        pdfmetrics.registerFont(TTFont("HarryFont", PDF_FONT))
+    except Exception:
+        logger.warning("PDF font %s not found, Cyrillic text will not render", PDF_FONT)
+        return "Helvetica"
+    return "HarryFont"
+
+
+def render_pdf(payload: Dict[str, Any], path: str):
+    """Render a report PDF to `path` (runs inside a pool worker process)"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import ListFlowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    from xml.sax.saxutils import escape
+
+    font = _register_font()
+    body = ParagraphStyle("body", fontName=font, fontSize=10, leading=14)
+    title = ParagraphStyle("title", parent=body, fontSize=18, leading=22, spaceAfter=6)
+    heading = ParagraphStyle("heading", parent=body, fontSize=13, leading=18, spaceBefore=10, spaceAfter=4)
+
+    report = payload["report"]
+    candidate = payload["candidate"] or {}
+    interview = payload["interview"] or {}
+
+    def table(rows):
+        grid = Table(rows, colWidths=[60 * mm, 110 * mm])
+        grid.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), font),
+            ("FONTSIZE", (0, 0), (-1, -1), 10),
+            ("TEXTCOLOR", (0, 0), (0, -1), colors.grey),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]))
+        return grid
+
+    def bullets(items):
+        return ListFlowable([Paragraph(escape(item), body) for item in items], bulletType="bullet", leftIndent=12)
+
+    story = [
+        Paragraph(escape(f"Отчёт по кандидату: {candidate.get('name', report['candidate_id'])}"), title),
+        table([
+            ["Позиция", candidate.get("position", interview.get("position", "—"))],
+            ["Email", candidate.get("email", "—")],
+            ["Опыт (лет)", str(candidate.get("experience", "—"))],
+            ["Итоговая оценка", str(report["final_score"])],
+            ["Решение", DECISION_LABELS.get(report["decision"], report["decision"])],
+            ["Отчёт сформирован", report["generated_at"][:16].replace("T", " ")],
+        ]),
+        Paragraph("Резюме", heading),
+        Paragraph(escape(report["summary"]), body),
+    ]
+    for label, key in (("Сильные стороны", "strengths"), ("Зоны роста", "weaknesses"), ("Рекомендации", "recommendations")):
+        if report[key]:
+            story += [Paragraph(label, heading), bullets(report[key])]
+
+    metrics = interview.get("metrics") or {}
+    rows = [[label, str(metrics[key])] for key, label in METRIC_LABELS.items() if key in metrics]
+    if metrics.get("keywords_used"):
+        rows.append(["Ключевые слова", ", ".join(metrics["keywords_used"])])
+    if rows:
+        story += [Paragraph("Метрики интервью", heading), table(rows)]
+    if interview.get("notes"):
+        story += [Paragraph("Заметки интервьюера", heading), Paragraph(escape(interview["notes"]), body)]
+    story.append(Spacer(1, 6 * mm))
+
+    SimpleDocTemplate(path, pagesize=A4, title="HaRry AI HR report").build(story)
+
+
+class ReportRenderer:
+    """Renders report PDFs in a process pool and caches them on disk
+
+    The cache key includes a hash of the rendered data, so a changed report,
+    candidate or interview simply maps to a new file; stale files of the same
+    report are deleted once the new one is in place.
+    """
+
+    def __init__(self, cache_dir: str, workers: int = PDF_WORKERS):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._rendering: Dict[str, "asyncio.Future[None]"] = {}
+        # Submitted pool jobs, cancelled on close if they haven't started
+        self._jobs: Set[Future] = set()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs executor threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            for job in list(self._jobs):
+                job.cancel()
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def locate(self, payload: Dict[str, Any]) -> RenderedReport:
+        """Cache path and ETag for `payload`, whether or not it is rendered yet"""
+        digest = content_hash(payload)[:32]
+        path = os.path.join(self.cache_dir, f"{payload['report']['id']}-{digest}.pdf")
+        return RenderedReport(path, f'"{digest}"')
+
+    async def render(self, payload: Dict[str, Any]) -> RenderedReport:
+        """Path and ETag of the PDF for `payload`, rendering it on a cache miss"""
+        rendered = self.locate(payload)
+        path = rendered.path
+        if os.path.exists(path):
+            return rendered
+
+        # Concurrent downloads of the same report share one render
+        pending = self._rendering.get(path)
+        if pending is None:
+            pending = asyncio.ensure_future(self._render(payload, path))
+            self._rendering[path] = pending
+            pending.add_done_callback(lambda _: self._rendering.pop(path, None))
+        await asyncio.shield(pending)
+        return rendered
+
+    async def _render(self, payload: Dict[str, Any], path: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            job = self.pool.submit(render_pdf, payload, tmp_path)
+            self._jobs.add(job)
+            job.add_done_callback(self._jobs.discard)
+            try:
+                await asyncio.wrap_future(job)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); start a fresh pool for the next render
+                self.close()
+                raise
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self._evict_stale(payload["report"]["id"], path)
+
+    def _evict_stale(self, report_id: str, current: str):
+        pattern = os.path.join(self.cache_dir, glob.escape(report_id) + "-" + "[0-9a-f]" * 32 + ".pdf")
+        for stale in glob.glob(pattern):
+            if stale != current:
+                try:
+                    os.unlink(stale)
+                except FileNotFoundError:
+                    pass
+
+
+renderer = ReportRenderer(PDF_CACHE_DIR)
@@ -0,0 +1,234 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+from .columnar import CandidateTable
+from .pagination import SORT_FIELDS, SortedIndex, sort_value
+from .search import SearchIndex
+from .schemas import Candidate, Interview, InterviewDetail, Vacancy, Report
+
+# Secondary index: key -> insertion-ordered set of ids
+Index = Dict[str, Dict[str, None]]
+
+# Full-text indexed fields of each entity (field -> rank weight)
+SEARCH_FIELDS: Dict[str, Dict[str, float]] = {
+    "candidates": {"name": 2.0, "position": 1.0, "skills": 1.0},
+    "interviews": {"candidate_name": 2.0, "position": 1.0},
+    "vacancies": {"title": 2.0, "department": 1.0},
+}
+
+
+def search_values(entity: str, model) -> Dict[str, Any]:
+    return {field: getattr(model, field) for field in SEARCH_FIELDS[entity]}
+
+
+def _key(value) -> Optional[str]:
+    """Normalize enum members and plain strings to the same index key"""
+    if value is None:
+        return None
+    return getattr(value, "value", value)
+
+
+def _index_add(index: Index, value, item_id: str):
+    key = _key(value)
+    if key is not None:
+        index[key][item_id] = None
+
+
+def _index_remove(index: Index, value, item_id: str):
+    key = _key(value)
+    if key is None or key not in index:
+        return
+    index[key].pop(item_id, None)
+    if not index[key]:
+        del index[key]
+
+
+class Repository:
+    """In-memory store with id-keyed tables and secondary indexes"""
+
+    def __init__(self):
+        # Candidates can run into millions, so they are stored column-wise
+        self.candidates = CandidateTable()
+        self.interviews: Dict[str, Interview] = {}
+        self.interview_details: Dict[str, InterviewDetail] = {}
+        self.vacancies: Dict[str, Vacancy] = {}
+        self.reports: Dict[str, Report] = {}
+
+        self.interviews_by_status: Index = defaultdict(dict)
+        self.interviews_by_candidate: Index = defaultdict(dict)
+        self.vacancies_by_status: Index = defaultdict(dict)
+        self.reports_by_candidate: Index = defaultdict(dict)
+        self.reports_by_interview: Index = defaultdict(dict)
+
+        # Full-text indexes for the `search` parameter (field -> rank weight)
+        self.candidates_search = SearchIndex(SEARCH_FIELDS["candidates"])
+        self.interviews_search = SearchIndex(SEARCH_FIELDS["interviews"])
+        self.vacancies_search = SearchIndex(SEARCH_FIELDS["vacancies"])
+
+        # Keyset pagination: entity -> (sort field, status) -> SortedIndex,
+        # where field None is insertion order and status None is every row
+        self.sorted_indexes: Dict[str, Dict[Tuple[Optional[str], Optional[str]], SortedIndex]] = {
+            entity: defaultdict(SortedIndex) for entity in SORT_FIELDS
+        }
+        self.sequence: Dict[str, Dict[str, int]] = {entity: {} for entity in SORT_FIELDS}
+        self._next_seq = 0
+
+    def _sorted_add(self, entity: str, model):
+        seqs = self.sequence[entity]
+        seq = seqs.get(model.id)
+        if seq is None:
+            seq = seqs[model.id] = self._next_seq
+            self._next_seq += 1
+        indexes = self.sorted_indexes[entity]
+        status = _key(model.status)
+        for field in (None,) + SORT_FIELDS[entity]:
+            value = sort_value(model, field)
+            indexes[(field, None)].add(value, seq, model.id)
+            indexes[(field, status)].add(value, seq, model.id)
+
+    def _sorted_remove(self, entity: str, model):
+        seq = self.sequence[entity][model.id]
+        indexes = self.sorted_indexes[entity]
+        status = _key(model.status)
+        for field in (None,) + SORT_FIELDS[entity]:
+            value = sort_value(model, field)
+            indexes[(field, None)].remove(value, seq, model.id)
+            indexes[(field, status)].remove(value, seq, model.id)
+
+    def sorted_index(self, entity: str, sort_by: Optional[str], status: Optional[str] = None) -> SortedIndex:
+        return self.sorted_indexes[entity][(sort_by, _key(status))]
+
+    # Candidates
+    def add_candidate(self, candidate: Candidate):
+        previous = self.candidates.get(candidate.id)
+        if previous is not None:
+            self._sorted_remove("candidates", previous)
+        self.candidates.put(candidate)
+        self._sorted_add("candidates", candidate)
+        self.candidates_search.add(candidate.id, search_values("candidates", candidate))
+
+    def get_candidate(self, candidate_id: str) -> Optional[Candidate]:
+        return self.candidates.get(candidate_id)
+
+    def search_candidates(self, query: str, status: Optional[str] = None) -> Iterator[Candidate]:
+        """Ranked full-text matches, optionally restricted to one status"""
+        ids = self.candidates_search.search(query)
+        if status is not None:
+            ids = [i for i in ids if self.candidates.has_status(i, _key(status))]
+        return (self.candidates[i] for i in ids)
+
+    # Interviews
+    def add_interview(self, interview: Union[Interview, InterviewDetail]):
+        previous = self.interviews.get(interview.id)
+        if previous is not None:
+            _index_remove(self.interviews_by_status, previous.status, previous.id)
+            _index_remove(self.interviews_by_candidate, previous.candidate_id, previous.id)
+            self._sorted_remove("interviews", previous)
+        if isinstance(interview, InterviewDetail):
+            # List endpoints serve the basic model, without the transcript
+            self.interview_details[interview.id] = interview
+            interview = Interview(**interview.model_dump(exclude={"transcript", "metrics"}))
+        else:
+            self.interview_details.pop(interview.id, None)
+        self.interviews[interview.id] = interview
+        _index_add(self.interviews_by_status, interview.status, interview.id)
+        _index_add(self.interviews_by_candidate, interview.candidate_id, interview.id)
+        self._sorted_add("interviews", interview)
+        self.interviews_search.add(interview.id, search_values("interviews", interview))
+
+    def get_interview(self, interview_id: str) -> Optional[Interview]:
+        """Return the detailed interview when available, the basic one otherwise"""
+        detail = self.interview_details.get(interview_id)
+        if detail is not None:
+            return detail
+        return self.interviews.get(interview_id)
+
+    def search_interviews(self, query: str, status: Optional[str] = None) -> Iterator[Interview]:
+        """Ranked full-text matches, optionally restricted to one status"""
+        ids = self.interviews_search.search(query)
+        if status is not None:
+            allowed = self.interviews_by_status.get(_key(status), {})
+            ids = [i for i in ids if i in allowed]
+        return (self.interviews[i] for i in ids)
+
+    def interviews_for_candidate(self, candidate_id: str) -> Iterator[Interview]:
+        ids = self.interviews_by_candidate.get(candidate_id, {})
+        return (self.interviews[i] for i in ids)
+
+    # Vacancies
+    def add_vacancy(self, vacancy: Vacancy):
+        previous = self.vacancies.get(vacancy.id)
+        if previous is not None:
+            _index_remove(self.vacancies_by_status, previous.status, previous.id)
+            self._sorted_remove("vacancies", previous)
+        self.vacancies[vacancy.id] = vacancy
+        _index_add(self.vacancies_by_status, vacancy.status, vacancy.id)
+        self._sorted_add("vacancies", vacancy)
+        self.vacancies_search.add(vacancy.id, search_values("vacancies", vacancy))
+
+    def get_vacancy(self, vacancy_id: str) -> Optional[Vacancy]:
+        return self.vacancies.get(vacancy_id)
+
+    def search_vacancies(self, query: str, status: Optional[str] = None) -> Iterator[Vacancy]:
+        """Ranked full-text matches, optionally restricted to one status"""
+        ids = self.vacancies_search.search(query)
+        if status is not None:
+            allowed = self.vacancies_by_status.get(_key(status), {})
+            ids = [i for i in ids if i in allowed]
+        return (self.vacancies[i] for i in ids)
+
+    # Reports
+    def add_report(self, report: Report):
+        previous = self.reports.get(report.id)
+        if previous is not None:
+            _index_remove(self.reports_by_candidate, previous.candidate_id, previous.id)
+            _index_remove(self.reports_by_interview, previous.interview_id, previous.id)
+        self.reports[report.id] = report
+        _index_add(self.reports_by_candidate, report.candidate_id, report.id)
+        _index_add(self.reports_by_interview, report.interview_id, report.id)
+
+    def get_report(self, report_id: str) -> Optional[Report]:
+        return self.reports.get(report_id)
+
+    def get_report_for_candidate(self, candidate_id: str) -> Optional[Report]:
+        ids = self.reports_by_candidate.get(candidate_id)
+        if not ids:
+            return None
+        return self.reports[next(iter(ids))]
+
+    def get_report_for_interview(self, interview_id: str) -> Optional[Report]:
+        ids = self.reports_by_interview.get(interview_id)
+        if not ids:
+            return None
+        return self.reports[next(iter(ids))]
+
+    def load(
+        self,
+        candidates: Iterable[Candidate] = (),
+        interviews: Iterable[Interview] = (),
+        vacancies: Iterable[Vacancy] = (),
+        reports: Iterable[Report] = (),
+    ):
+        for candidate in candidates:
+            self.add_candidate(candidate)
+        for interview in interviews:
+            self.add_interview(interview)
+        for vacancy in vacancies:
+            self.add_vacancy(vacancy)
+        for report in reports:
+            self.add_report(report)
+
+
+def load_mock_repository() -> Repository:
+    """Build a repository seeded with the mock data from data.py"""
+    # Imported on demand: data.py builds its models at import time
+    from .data import MOCK_CANDIDATES, MOCK_INTERVIEWS, MOCK_INTERVIEW_DETAILS, MOCK_VACANCIES, MOCK_REPORTS
+
+    repo = Repository()
+    repo.load(
+        candidates=MOCK_CANDIDATES,
+        interviews=[MOCK_INTERVIEW_DETAILS.get(i.id, i) for i in MOCK_INTERVIEWS],
+        vacancies=MOCK_VACANCIES,
+        reports=MOCK_REPORTS,
+    )
+    return repo
+
@@ -0,0 +1,27 @@
+import time
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from .instrumentation import record_serialization
+
+
+class ModelResponse(Response):
+    """JSON response rendered straight from a Pydantic model
+
+    Endpoints that return one of these bypass FastAPI's response_model
+    pass (a second validation plus a generic serialization of `data`);
+    model_dump_json goes from the model to bytes in one step.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        try:
+            if isinstance(content, BaseModel):
+                return content.model_dump_json().encode()
+            return super().render(content)
+        finally:
+            record_serialization(time.perf_counter() - started)
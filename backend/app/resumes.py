@@ -0,0 +1,116 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from typing import NamedTuple, Optional
+
+import anyio
+from fastapi import UploadFile
+
+# Resumes live under <HARRY_RESUME_DIR>/<2 hex>/<sha256><ext>; identical
+# uploads map to the same file, so each document is stored exactly once
+RESUME_DIR = os.getenv(
+    "HARRY_RESUME_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resumes"),
+)
+RESUME_MAX_BYTES = int(os.getenv("HARRY_RESUME_MAX_BYTES", str(20 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+
+ALLOWED_EXTENSIONS = (".pdf", ".doc", ".docx", ".odt", ".rtf", ".txt")
+
+# Public name of a stored resume: its digest plus the original extension
+_NAME_RE = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]+)?$")
+
+
+class ResumeTooLarge(ValueError):
+    pass
+
+
+class UnsupportedResume(ValueError):
+    pass
+
+
+class StoredResume(NamedTuple):
+    digest: str
+    name: str
+    path: str
+    size: int
+
+    @property
+    def url(self) -> str:
+        return f"/api/resumes/{self.name}"
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+    @property
+    def media_type(self) -> str:
+        return mimetypes.guess_type(self.name)[0] or "application/octet-stream"
+
+
+class ResumeStore:
+    """Content-addressed resume files on local disk"""
+
+    def __init__(self, root: str, max_bytes: int = RESUME_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name[:2], name)
+
+    async def save(self, upload: UploadFile) -> StoredResume:
+        """Copy an upload to the store chunk by chunk while hashing it
+
+        The data goes to a temp file next to the store and is renamed into
+        place once the digest is known, so readers never see partial files.
+        """
+        extension = os.path.splitext(upload.filename or "")[1].lower()
+        if extension not in ALLOWED_EXTENSIONS:
+            raise UnsupportedResume(f"Resume must be one of: {', '.join(ALLOWED_EXTENSIONS)}")
+
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        os.close(fd)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with await anyio.open_file(tmp_path, "wb") as out:
+                while True:
+                    chunk = await upload.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ResumeTooLarge(f"Resume exceeds {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    await out.write(chunk)
+
+            name = digest.hexdigest() + extension
+            path = self._path(name)
+            if os.path.exists(path):
+                os.unlink(tmp_path)  # Same content already stored
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return StoredResume(digest.hexdigest(), name, path, size)
+
+    def get(self, name: str) -> Optional[StoredResume]:
+        match = _NAME_RE.match(name)
+        if not match:
+            return None
+        path = self._path(name)
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            return None
+        return StoredResume(match.group(1), name, path, size)
+
+
+resume_store = ResumeStore(RESUME_DIR)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Generic, TypeVar, Union
 from datetime import datetime
 from enum import Enum
 
@@ -20,6 +20,12 @@ class VacancyStatus(str, Enum):
     CLOSED = "closed"
     DRAFT = "draft"
 
+class NotificationStatus(str, Enum):
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
 class DecisionType(str, Enum):
     HIRE = "hire"
     REJECT = "reject"
@@ -87,6 +93,11 @@ class Vacancy(VacancyBase):
     created_at: datetime
     applicants_count: int = 0
 
+class CandidateMatch(BaseModel):
+    candidate: Candidate
+    match_percentage: int
+    matched_skills: List[str]
+
 class ReportBase(BaseModel):
     candidate_id: str
     interview_id: str
@@ -101,21 +112,46 @@ class Report(ReportBase):
     id: str
     generated_at: datetime
 
+class CandidateView(BaseModel):
+    """Everything a candidate page shows; fields left out of `fields` stay null"""
+    candidate: Optional[Candidate] = None
+    interview: Optional[Union[InterviewDetail, Interview]] = None
+    report: Optional[Report] = None
+
 class NotificationData(BaseModel):
     candidate_id: str
     subject: str
     body: str
 
+class NotificationJob(BaseModel):
+    id: str
+    candidate_id: str
+    recipient: str
+    transport: str
+    subject: str
+    status: NotificationStatus
+    attempts: int = 0
+    created_at: datetime
+    updated_at: datetime
+    next_attempt_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
 class WebSocketMessage(BaseModel):
     type: str
     data: Dict[str, Any]
     timestamp: float
 
 # Response Models
-class ApiResponse(BaseModel):
-    data: Any
+T = TypeVar("T")
+
+class ApiResponse(BaseModel, Generic[T]):
+    """Response envelope; parametrize as ApiResponse[Candidate] for typed data"""
+    data: T
     success: bool = True
     message: Optional[str] = None
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
 
 class PaginationParams(BaseModel):
     page: int = 1
@@ -0,0 +1,143 @@
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Scores for how a query token matched a document token
+EXACT_MATCH = 3.0
+PREFIX_MATCH = 2.0
+SUBSTRING_MATCH = 1.0
+
+
+def fold(text: str) -> str:
+    """Case-fold text for search, treating Cyrillic "ё" as "е" """
+    return text.casefold().replace("ё", "е")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+def trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def document_tokens(fields: Dict[str, float], values: Dict[str, Union[str, Iterable[str], None]]) -> Dict[str, float]:
+    """{token: weight of the heaviest field it appears in} for one document"""
+    tokens: Dict[str, float] = {}
+    for field, weight in fields.items():
+        value = values.get(field)
+        if value is None:
+            continue
+        text = value if isinstance(value, str) else " ".join(value)
+        for token in tokenize(text):
+            tokens[token] = max(tokens.get(token, 0.0), weight)
+    return tokens
+
+
+class SearchIndex:
+    """Incremental inverted index with token-prefix and trigram lookups
+
+    Every query token has to match some document token, either exactly, as a
+    prefix (type-ahead) or, for three characters and more, as a substring via
+    the trigram index. Results are ranked by match quality weighted by field.
+    """
+
+    def __init__(self, fields: Dict[str, float]):
+        self.fields = fields
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.doc_tokens: Dict[str, Dict[str, float]] = {}
+        self.doc_order: Dict[str, int] = {}
+        self.vocabulary: List[str] = []
+        self.trigram_tokens: Dict[str, Set[str]] = defaultdict(set)
+        self._next_order = 0
+
+    def add(self, doc_id: str, values: Dict[str, Union[str, Iterable[str], None]]):
+        if doc_id in self.doc_tokens:
+            self.remove(doc_id, keep_order=True)
+        else:
+            self.doc_order[doc_id] = self._next_order
+            self._next_order += 1
+
+        tokens = document_tokens(self.fields, values)
+        self.doc_tokens[doc_id] = tokens
+        for token, weight in tokens.items():
+            if token not in self.postings:
+                insort(self.vocabulary, token)
+                for gram in trigrams(token):
+                    self.trigram_tokens[gram].add(token)
+            self.postings[token][doc_id] = weight
+
+    def remove(self, doc_id: str, keep_order: bool = False):
+        tokens = self.doc_tokens.pop(doc_id, None)
+        if tokens is None:
+            return
+        if not keep_order:
+            self.doc_order.pop(doc_id, None)
+        for token in tokens:
+            docs = self.postings[token]
+            docs.pop(doc_id, None)
+            if docs:
+                continue
+            del self.postings[token]
+            del self.vocabulary[bisect_left(self.vocabulary, token)]
+            for gram in trigrams(token):
+                grams = self.trigram_tokens[gram]
+                grams.discard(token)
+                if not grams:
+                    del self.trigram_tokens[gram]
+
+    def _match_token(self, query_token: str) -> Dict[str, float]:
+        """Return {document token: match score} for one query token"""
+        matches: Dict[str, float] = {}
+        vocabulary = self.vocabulary
+        for i in range(bisect_left(vocabulary, query_token), len(vocabulary)):
+            token = vocabulary[i]
+            if not token.startswith(query_token):
+                break
+            matches[token] = EXACT_MATCH if token == query_token else PREFIX_MATCH
+
+        grams = trigrams(query_token)
+        if grams:
+            candidates: Optional[Set[str]] = None
+            for gram in sorted(grams, key=lambda g: len(self.trigram_tokens.get(g, ()))):
+                found = self.trigram_tokens.get(gram)
+                if not found:
+                    candidates = set()
+                    break
+                candidates = set(found) if candidates is None else candidates & found
+                if not candidates:
+                    break
+            for token in candidates or ():
+                if token not in matches and query_token in token:
+                    matches[token] = SUBSTRING_MATCH
+        return matches
+
+    def score(self, query: str) -> Dict[str, float]:
+        """Return {document id: rank score} of documents matching every query token"""
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return {}
+
+        scores: Optional[Dict[str, float]] = None
+        for query_token in dict.fromkeys(query_tokens):
+            token_scores: Dict[str, float] = {}
+            for token, match_score in self._match_token(query_token).items():
+                for doc_id, weight in self.postings[token].items():
+                    score = match_score * weight
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {d: s + token_scores[d] for d, s in scores.items() if d in token_scores}
+            if not scores:
+                return {}
+        return scores
+
+    def search(self, query: str) -> List[str]:
+        """Return ids of documents matching every query token, best first"""
+        scores = self.score(query)
+        return sorted(scores, key=lambda d: (-scores[d], self.doc_order[d]))
@@ -0,0 +1,752 @@
+import argparse
+import asyncio
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from heapq import merge
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .analytics import Analytics
+from .columnar import CandidateTable, Dictionary
+from .matching import CandidateMatcher
+from .pagination import SORT_FIELDS, SortedIndex, sort_value
+from .repository import SEARCH_FIELDS, Repository, _key, search_values
+from .schemas import Candidate, Interview, InterviewDetail, Report, Vacancy
+from .search import SearchIndex, document_tokens, trigrams
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).resolve().parent.parent / "harry.snapshot"
+
+# File layout: header, 8-byte aligned sections, then a JSON manifest giving
+# each section's offset, dtype and shape
+MAGIC = b"HARRYSNP"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")  # magic, version, reserved, manifest offset, manifest length
+ALIGN = 8
+
+ENTITIES = ("candidates", "interviews", "vacancies", "reports")
+MODELS = {"candidates": Candidate, "interviews": Interview, "vacancies": Vacancy, "reports": Report}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+# Writing
+
+class BlobSection:
+    """Variable-length records written back to back, with their offsets in `<name>.offsets`"""
+
+    def __init__(self, writer: "SnapshotWriter", name: str):
+        self.writer = writer
+        self.name = name
+        writer.align()
+        self.start = writer.file.tell()
+        self.offsets = array("Q", [0])
+
+    def add(self, data: bytes):
+        self.writer.file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self):
+        self.writer.sections[self.name] = (self.start, "|u1", [self.offsets[-1]])
+        self.writer.array(f"{self.name}.offsets", np.frombuffer(self.offsets, dtype=np.uint64))
+
+
+class SnapshotWriter:
+    """Writes sections one after another; close() adds the manifest and
+    moves the file into place, so readers never see a partial snapshot"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.file = open(self.tmp_path, "wb")
+        self.file.write(bytes(HEADER.size))
+        self.sections: Dict[str, Tuple[int, str, List[int]]] = {}
+        self.meta: Dict[str, Any] = {}
+
+    def align(self):
+        self.file.write(bytes(-self.file.tell() % ALIGN))
+
+    def array(self, name: str, values: np.ndarray):
+        values = np.ascontiguousarray(values)
+        self.align()
+        self.sections[name] = (self.file.tell(), values.dtype.str, list(values.shape))
+        self.file.write(values.tobytes())
+
+    def blobs(self, name: str, items: Iterable[bytes]):
+        section = BlobSection(self, name)
+        for item in items:
+            section.add(item)
+        section.close()
+
+    def close(self):
+        manifest = json.dumps({"sections": self.sections, "meta": self.meta}, ensure_ascii=False).encode()
+        self.align()
+        offset = self.file.tell()
+        self.file.write(manifest)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, offset, len(manifest)))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.unlink(self.tmp_path)
+
+
+class EntityColumns:
+    """Per-row lookup, sort and search data gathered while records are written"""
+
+    def __init__(self, entity: str):
+        self.entity = entity
+        self.ids: List[bytes] = []
+        self.statuses = Dictionary()
+        self.status_codes = array("B")
+        self.values: Dict[str, list] = {field: [] for field in SORT_FIELDS.get(entity, ())}
+        self.candidate_ids: List[bytes] = []
+        # Search postings as parallel (token code, row, weight) columns
+        self.tokens = Dictionary()
+        self.token_codes = array("I")
+        self.token_rows = array("I")
+        self.token_weights = array("f")
+
+    def add(self, model):
+        row = len(self.ids)
+        self.ids.append(model.id.encode())
+        if self.entity == "reports":
+            self.candidate_ids.append(model.candidate_id.encode())
+            return
+        self.status_codes.append(self.statuses.encode(_key(model.status)))
+        for field, values in self.values.items():
+            values.append(sort_value(model, field))
+        if self.entity in SEARCH_FIELDS:
+            fields = SEARCH_FIELDS[self.entity]
+            for token, weight in document_tokens(fields, search_values(self.entity, model)).items():
+                self.token_codes.append(self.tokens.encode(token))
+                self.token_rows.append(row)
+                self.token_weights.append(weight)
+
+    def write(self, writer: SnapshotWriter):
+        entity, count = self.entity, len(self.ids)
+        writer.blobs(f"{entity}.ids", self.ids)
+        writer.array(f"{entity}.id_order", np.array(sorted(range(count), key=self.ids.__getitem__), dtype=np.uint32))
+        writer.meta[entity] = {"count": count, "statuses": self.statuses.values}
+        if entity == "reports":
+            by_candidate = sorted(range(count), key=self.candidate_ids.__getitem__)
+            writer.blobs("reports.candidate_ids", self.candidate_ids)
+            writer.array("reports.by_candidate", np.array(by_candidate, dtype=np.uint32))
+            return
+
+        codes = np.frombuffer(self.status_codes, dtype=np.uint8)
+        writer.array(f"{entity}.status", codes)
+        for code, status in enumerate(self.statuses.values):
+            writer.array(f"{entity}.order..{status}", np.flatnonzero(codes == code).astype(np.uint32))
+        for field, values in self.values.items():
+            column = np.array(values, dtype=np.int64 if all(type(v) is int for v in values) else np.float64)
+            writer.array(f"{entity}.sort.{field}", column)
+            # Stable sort: rows with equal values stay in insertion order
+            order = np.argsort(column, kind="stable").astype(np.uint32)
+            writer.array(f"{entity}.order.{field}.", order)
+            for code, status in enumerate(self.statuses.values):
+                writer.array(f"{entity}.order.{field}.{status}", order[codes[order] == code])
+
+        if entity in SEARCH_FIELDS:
+            vocabulary = sorted(self.tokens.values)
+            rank = np.empty(len(vocabulary), dtype=np.uint32)
+            rank[[self.tokens.codes[token] for token in vocabulary]] = np.arange(len(vocabulary), dtype=np.uint32)
+            token_ranks = rank[np.frombuffer(self.token_codes, dtype=np.uint32)]
+            rows = np.frombuffer(self.token_rows, dtype=np.uint32)
+            postings = np.lexsort((rows, token_ranks))
+            offsets = np.zeros(len(vocabulary) + 1, dtype=np.uint64)
+            offsets[1:] = np.cumsum(np.bincount(token_ranks, minlength=len(vocabulary)), dtype=np.uint64)
+            writer.blobs(f"{entity}.search.tokens", (token.encode() for token in vocabulary))
+            writer.array(f"{entity}.search.offsets", offsets)
+            writer.array(f"{entity}.search.rows", rows[postings])
+            writer.array(f"{entity}.search.weights", np.frombuffer(self.token_weights, dtype=np.float32)[postings])
+
+
+async def build(storage, path: str) -> Dict[str, int]:
+    """Write everything in `storage` to a snapshot at `path`; returns row counts
+
+    Match percentages and dashboard aggregates are computed here and saved
+    with the rows, so a worker serving the snapshot doesn't rescan it.
+    """
+    writer = SnapshotWriter(path)
+    matcher, analytics = CandidateMatcher(), Analytics()
+    try:
+        vacancies = [vacancy async for vacancy in storage.scan("vacancies")]
+        # Held column-wise until every candidate is scored
+        table = CandidateTable()
+        async for candidate in storage.scan("candidates"):
+            table.put(candidate)
+        matcher.load(table.values(), vacancies)
+
+        columns = EntityColumns("candidates")
+        records = BlobSection(writer, "candidates.records")
+        for row in range(len(table)):
+            candidate = table.materialize(row)
+            best = int(matcher.best[row])
+            candidate.match_percentage = best if best >= 0 else None
+            records.add(candidate.model_dump_json().encode())
+            columns.add(candidate)
+            analytics.observe_candidate(candidate)
+        records.close()
+        columns.write(writer)
+        del table
+
+        columns = EntityColumns("vacancies")
+        records = BlobSection(writer, "vacancies.records")
+        for vacancy in vacancies:
+            records.add(vacancy.model_dump_json().encode())
+            columns.add(vacancy)
+            analytics.observe_vacancy(vacancy)
+        records.close()
+        columns.write(writer)
+
+        # An interview record is its list JSON, followed by the detail JSON
+        # (with the transcript) when there is one
+        columns = EntityColumns("interviews")
+        records = BlobSection(writer, "interviews.records")
+        header_sizes = array("I")
+        async for interview in storage.scan("interviews"):
+            header = interview.model_dump_json().encode()
+            detail = await storage.get_interview(interview.id)
+            body = detail.model_dump_json().encode() if isinstance(detail, InterviewDetail) else b""
+            records.add(header + body)
+            header_sizes.append(len(header))
+            columns.add(interview)
+            analytics.observe_interview(interview)
+        records.close()
+        writer.array("interviews.header_size", np.frombuffer(header_sizes, dtype=np.uint32))
+        columns.write(writer)
+
+        columns = EntityColumns("reports")
+        records = BlobSection(writer, "reports.records")
+        async for report in storage.scan_reports():
+            records.add(report.model_dump_json().encode())
+            columns.add(report)
+        records.close()
+        columns.write(writer)
+
+        state, arrays = matcher.export()
+        for name, values in arrays.items():
+            writer.array(f"matcher.{name}", values)
+        writer.meta["matcher"] = state
+        writer.meta["analytics"] = analytics.state()
+        writer.meta["created_at"] = datetime.now().isoformat()
+        counts = {entity: writer.meta[entity]["count"] for entity in ENTITIES}
+        writer.close()
+        return counts
+    except BaseException:
+        writer.abort()
+        raise
+
+
+# Reading
+
+class Blobs(Sequence):
+    """Variable-length byte strings of a BlobSection"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.view = memoryview(data)
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i) -> bytes:
+        return self.view[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+
+class Keyed(Sequence):
+    """`key(order[i])` computed on access, to bisect without bisect's key= (3.10+)"""
+
+    def __init__(self, order: Sequence, key: Callable[[Any], Any]):
+        self.order = order
+        self.key = key
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        return self.key(self.order[i])
+
+
+def _find(order: Sequence, keys: Blobs, key: bytes) -> int:
+    """First position in `order` (rows sorted by their key) whose row has `key`, or -1"""
+    i = bisect_left(Keyed(order, keys.__getitem__), key)
+    return i if i < len(order) and keys[order[i]] == key else -1
+
+
+class Snapshot:
+    """Read side of a snapshot file; every section is a zero-copy view of one mapping
+
+    The file is mapped copy-on-write: pages come from the OS page cache, and
+    workers mapping the same file share them until one writes to a page
+    (as the restored matcher does when a candidate is updated). Opening
+    reads only the header and the manifest, whatever the file size.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(self.map) < HEADER.size:
+            raise SnapshotError(f"{path} is not a snapshot")
+        magic, version, _, offset, length = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"{path} has snapshot version {version}, expected {VERSION}; rebuild it")
+        manifest = json.loads(self.map[offset:offset + length])
+        self.sections: Dict[str, list] = manifest["sections"]
+        self.meta: Dict[str, Any] = manifest["meta"]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections
+
+    def array(self, name: str) -> np.ndarray:
+        offset, dtype, shape = self.sections[name]
+        count = math.prod(shape)
+        if count == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.frombuffer(self.map, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    def blobs(self, name: str) -> Blobs:
+        return Blobs(self.array(name), self.array(f"{name}.offsets"))
+
+
+class BaseTable:
+    """One entity's rows in a snapshot, decoded when read"""
+
+    def __init__(self, snapshot: Snapshot, entity: str):
+        self.snapshot = snapshot
+        self.entity = entity
+        self.model = MODELS[entity]
+        self.records = snapshot.blobs(f"{entity}.records")
+        self.ids = snapshot.blobs(f"{entity}.ids")
+        self.id_order = snapshot.array(f"{entity}.id_order")
+        self.statuses: List[str] = snapshot.meta[entity]["statuses"]
+        self.status_codes = snapshot.array(f"{entity}.status") if f"{entity}.status" in snapshot else None
+        self.header_size = snapshot.array("interviews.header_size") if entity == "interviews" else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def id(self, row: int) -> str:
+        return self.ids[row].decode()
+
+    def row(self, item_id: str) -> Optional[int]:
+        i = _find(self.id_order, self.ids, item_id.encode())
+        return None if i < 0 else int(self.id_order[i])
+
+    def status(self, row: int) -> Optional[str]:
+        return None if self.status_codes is None else self.statuses[self.status_codes[row]]
+
+    def load(self, row: int):
+        """The row as served by list endpoints (interviews without the transcript)"""
+        record = self.records[row]
+        if self.header_size is not None:
+            record = record[:self.header_size[row]]
+        return self.model.model_validate_json(record)
+
+    def load_detail(self, row: int) -> Interview:
+        record = self.records[row]
+        detail = record[self.header_size[row]:]
+        return InterviewDetail.model_validate_json(detail) if detail else Interview.model_validate_json(record)
+
+    def order(self, sort_by: Optional[str], status: Optional[str]) -> Sequence:
+        """Rows sorted by (sort value, row), optionally only those with `status`"""
+        if sort_by is None and status is None:
+            return range(len(self))
+        name = f"{self.entity}.order.{sort_by or ''}.{status or ''}"
+        if name not in self.snapshot:
+            return range(0)  # No row has this status
+        return self.snapshot.array(name)
+
+    def sort_values(self, sort_by: Optional[str]) -> Optional[np.ndarray]:
+        return None if sort_by is None else self.snapshot.array(f"{self.entity}.sort.{sort_by}")
+
+
+class Postings(Mapping):
+    """token -> {base row: weight}, read from the snapshot per token"""
+
+    def __init__(self, positions: Dict[str, int], offsets: np.ndarray, rows: np.ndarray, weights: np.ndarray):
+        self.positions = positions
+        self.offsets = offsets
+        self.rows = rows
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __getitem__(self, token: str) -> Dict[int, float]:
+        i = self.positions[token]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return dict(zip(self.rows[start:end].tolist(), self.weights[start:end].tolist()))
+
+
+class FrozenSearchIndex(SearchIndex):
+    """Read-only SearchIndex over postings saved in a snapshot; document ids are base rows
+
+    Only the vocabulary (distinct tokens, not rows) is loaded into memory.
+    """
+
+    def __init__(self, snapshot: Snapshot, entity: str):
+        super().__init__(SEARCH_FIELDS[entity])
+        self.vocabulary = [token.decode() for token in snapshot.blobs(f"{entity}.search.tokens")]
+        positions = {token: i for i, token in enumerate(self.vocabulary)}
+        for token in self.vocabulary:
+            for gram in trigrams(token):
+                self.trigram_tokens[gram].add(token)
+        self.postings = Postings(
+            positions,
+            snapshot.array(f"{entity}.search.offsets"),
+            snapshot.array(f"{entity}.search.rows"),
+            snapshot.array(f"{entity}.search.weights"),
+        )
+
+
+class MergedIndex:
+    """SortedIndex API over a base order from the snapshot and an overlay SortedIndex
+
+    Base rows shadowed by the overlay are skipped. Overlay rows that replace
+    a base row keep its row number as their seq, so keys stay unique and the
+    default order is unchanged by updates.
+    """
+
+    def __init__(self, base: BaseTable, order: Sequence, values: Optional[np.ndarray],
+                 shadowed: Dict[int, Optional[str]], hidden: int, overlay: SortedIndex):
+        self.base = base
+        self.order = order
+        self.values = values
+        self.shadowed = shadowed
+        self.hidden = hidden  # Shadowed rows in `order`
+        self.overlay = overlay
+
+    def __len__(self):
+        return len(self.order) - self.hidden + len(self.overlay)
+
+    def _key(self, row) -> Tuple[Any, int]:
+        return (0 if self.values is None else self.values[row].item()), int(row)
+
+    def _entries(self, start: int, descending: bool) -> Iterator[Tuple[Any, int, str]]:
+        """Unshadowed base entries from position `start` (exclusive when descending)"""
+        positions = range(start - 1, -1, -1) if descending else range(start, len(self.order))
+        for i in positions:
+            row = int(self.order[i])
+            if row not in self.shadowed:
+                value, _ = self._key(row)
+                yield value, row, self.base.id(row)
+
+    def page(self, after: Optional[Tuple[Any, int]], descending: bool, limit: int) -> List[Tuple[Any, int, str]]:
+        if after is None:
+            start = len(self.order) if descending else 0
+        else:
+            key = (after[0], after[1]) if descending else (after[0], after[1] + 1)
+            start = bisect_left(Keyed(self.order, self._key), key)
+        entries = merge(self._entries(start, descending), self.overlay.page(after, descending, limit), reverse=descending)
+        return list(islice(entries, limit))
+
+    def skip(self, offset: int, descending: bool, limit: int) -> List[Tuple[Any, int, str]]:
+        """Offset window; O(limit) while nothing is shadowed or added, O(offset + limit) after"""
+        if self.hidden or len(self.overlay):
+            return self.page(None, descending, offset + limit)[offset:]
+        count = len(self.order)
+        start = count - offset if descending else offset
+        return list(islice(self._entries(max(0, min(start, count)), descending), limit))
+
+
+class MergedTable(Mapping):
+    """id -> model over the overlay and the unshadowed base rows"""
+
+    def __init__(self, base: BaseTable, shadowed: Dict[int, Optional[str]], overlay: Mapping):
+        self.base = base
+        self.shadowed = shadowed
+        self.overlay = overlay
+
+    def __len__(self):
+        return len(self.base) - len(self.shadowed) + len(self.overlay)
+
+    def __iter__(self):
+        for row in range(len(self.base)):
+            if row not in self.shadowed:
+                yield self.base.id(row)
+        yield from self.overlay
+
+    def __getitem__(self, item_id: str):
+        if item_id in self.overlay:
+            return self.overlay[item_id]
+        row = self.base.row(item_id)
+        if row is None or row in self.shadowed:
+            raise KeyError(item_id)
+        return self.base.load(row)
+
+
+class ChainedIds(Sequence):
+    """Base candidate ids followed by ids appended since; a list stand-in for the matcher"""
+
+    def __init__(self, base: BaseTable):
+        self.base = base
+        self.extra: List[str] = []
+
+    def __len__(self):
+        return len(self.base) + len(self.extra)
+
+    def __getitem__(self, row) -> str:
+        if row < len(self.base):
+            return self.base.id(row)
+        return self.extra[row - len(self.base)]
+
+    def append(self, item_id: str):
+        self.extra.append(item_id)
+
+
+class ChainedRows(Mapping):
+    """Base id -> row lookups plus rows assigned since; a dict stand-in for the matcher"""
+
+    def __init__(self, base: BaseTable):
+        self.base = base
+        self.extra: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.base) + len(self.extra)
+
+    def __iter__(self):
+        yield from (self.base.id(row) for row in range(len(self.base)))
+        yield from self.extra
+
+    def __getitem__(self, item_id: str) -> int:
+        row = self.extra.get(item_id)
+        if row is None:
+            row = self.base.row(item_id)
+        if row is None:
+            raise KeyError(item_id)
+        return row
+
+    def __setitem__(self, item_id: str, row: int):
+        self.extra[item_id] = row
+
+
+class SnapshotRepository:
+    """Repository API over a snapshot: the snapshot is an immutable base, writes go to an overlay
+
+    Reads check the in-memory overlay (a plain Repository) first. Writing a
+    row that exists in the base shadows the base row: lookups, indexes and
+    search skip it from then on. Nothing is loaded per row when opening, so
+    start-up cost doesn't depend on the snapshot size.
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        self.base = {entity: BaseTable(snapshot, entity) for entity in ENTITIES}
+        self.overlay = Repository()
+        # Overlay rows are numbered after the base ones
+        self.overlay._next_seq = max(len(table) for table in self.base.values())
+        for entity in SEARCH_FIELDS:
+            getattr(self.overlay, f"{entity}_search")._next_order = len(self.base[entity])
+        # entity -> shadowed base row -> its base status
+        self.shadowed: Dict[str, Dict[int, Optional[str]]] = {entity: {} for entity in ENTITIES}
+        self.shadowed_statuses: Dict[str, Counter] = {entity: Counter() for entity in ENTITIES}
+        self.searches: Dict[str, FrozenSearchIndex] = {}  # Loaded on first search
+
+        self.candidates = MergedTable(self.base["candidates"], self.shadowed["candidates"], self.overlay.candidates)
+        self.interviews = MergedTable(self.base["interviews"], self.shadowed["interviews"], self.overlay.interviews)
+        self.vacancies = MergedTable(self.base["vacancies"], self.shadowed["vacancies"], self.overlay.vacancies)
+        self.reports = MergedTable(self.base["reports"], self.shadowed["reports"], self.overlay.reports)
+
+    def restore(self, matcher: CandidateMatcher, analytics: Analytics):
+        """Load the match scores and dashboard aggregates saved with the snapshot"""
+        arrays = {
+            name[len("matcher."):]: self.snapshot.array(name)
+            for name in self.snapshot.sections if name.startswith("matcher.")
+        }
+        base = self.base["candidates"]
+        matcher.restore(self.snapshot.meta["matcher"], arrays, ChainedIds(base), ChainedRows(base))
+        analytics.restore(self.snapshot.meta["analytics"], self.base_model)
+
+    def base_model(self, entity: str, item_id: str):
+        """The row as saved in the snapshot, even if it was written since"""
+        base = self.base[entity]
+        row = base.row(item_id)
+        return None if row is None else base.load(row)
+
+    def _shadow(self, entity: str, item_id: str) -> Optional[int]:
+        """Hide the base row of `item_id` before the overlay gets a new version"""
+        base = self.base[entity]
+        row = base.row(item_id)
+        shadowed = self.shadowed[entity]
+        if row is not None and row not in shadowed:
+            status = shadowed[row] = base.status(row)
+            self.shadowed_statuses[entity][status] += 1
+            if entity in SORT_FIELDS:
+                self.overlay.sequence[entity][item_id] = row
+        return row
+
+    def _get(self, entity: str, item_id: str):
+        base = self.base[entity]
+        row = base.row(item_id)
+        if row is None or row in self.shadowed[entity]:
+            return None
+        return base.load_detail(row) if entity == "interviews" else base.load(row)
+
+    def sorted_index(self, entity: str, sort_by: Optional[str], status: Optional[str] = None) -> MergedIndex:
+        base, key = self.base[entity], _key(status)
+        shadowed = self.shadowed[entity]
+        hidden = len(shadowed) if key is None else self.shadowed_statuses[entity][key]
+        return MergedIndex(
+            base, base.order(sort_by, key), base.sort_values(sort_by), shadowed, hidden,
+            self.overlay.sorted_index(entity, sort_by, status),
+        )
+
+    def _search(self, entity: str, query: str, status: Optional[str]) -> Iterator[Any]:
+        """Base and overlay matches ranked together, like Repository.search_*"""
+        base, key = self.base[entity], _key(status)
+        shadowed = self.shadowed[entity]
+        index = self.searches.get(entity)
+        if index is None:
+            index = self.searches[entity] = FrozenSearchIndex(self.snapshot, entity)
+        ranked = [
+            (-score, row, None) for row, score in index.score(query).items()
+            if row not in shadowed and (key is None or base.status(row) == key)
+        ]
+        overlay_index = getattr(self.overlay, f"{entity}_search")
+        ranked.extend(
+            (-score, overlay_index.doc_order[item_id], item_id)
+            for item_id, score in overlay_index.score(query).items()
+        )
+        ranked.sort(key=lambda match: match[:2])
+        overlay = getattr(self.overlay, entity)
+        for _, row, item_id in ranked:
+            if item_id is None:
+                yield base.load(row)
+                continue
+            item = overlay[item_id]
+            if key is None or _key(item.status) == key:
+                yield item
+
+    # Candidates
+    def add_candidate(self, candidate: Candidate):
+        row = self._shadow("candidates", candidate.id)
+        self.overlay.add_candidate(candidate)
+        if row is not None:
+            self.overlay.candidates_search.doc_order[candidate.id] = row
+
+    def get_candidate(self, candidate_id: str) -> Optional[Candidate]:
+        return self.overlay.get_candidate(candidate_id) or self._get("candidates", candidate_id)
+
+    def search_candidates(self, query: str, status: Optional[str] = None) -> Iterator[Candidate]:
+        return self._search("candidates", query, status)
+
+    # Interviews
+    def add_interview(self, interview: Interview):
+        row = self._shadow("interviews", interview.id)
+        self.overlay.add_interview(interview)
+        if row is not None:
+            self.overlay.interviews_search.doc_order[interview.id] = row
+
+    def get_interview(self, interview_id: str) -> Optional[Interview]:
+        return self.overlay.get_interview(interview_id) or self._get("interviews", interview_id)
+
+    def search_interviews(self, query: str, status: Optional[str] = None) -> Iterator[Interview]:
+        return self._search("interviews", query, status)
+
+    # Vacancies
+    def add_vacancy(self, vacancy: Vacancy):
+        row = self._shadow("vacancies", vacancy.id)
+        self.overlay.add_vacancy(vacancy)
+        if row is not None:
+            self.overlay.vacancies_search.doc_order[vacancy.id] = row
+
+    def get_vacancy(self, vacancy_id: str) -> Optional[Vacancy]:
+        return self.overlay.get_vacancy(vacancy_id) or self._get("vacancies", vacancy_id)
+
+    def search_vacancies(self, query: str, status: Optional[str] = None) -> Iterator[Vacancy]:
+        return self._search("vacancies", query, status)
+
+    # Reports
+    def add_report(self, report: Report):
+        self._shadow("reports", report.id)
+        self.overlay.add_report(report)
+
+    def get_report_for_candidate(self, candidate_id: str) -> Optional[Report]:
+        """First report of the candidate; base reports come before overlay ones"""
+        base = self.base["reports"]
+        order, keys = self.snapshot.array("reports.by_candidate"), self.snapshot.blobs("reports.candidate_ids")
+        key = candidate_id.encode()
+        i = _find(order, keys, key)
+        while 0 <= i < len(order) and keys[order[i]] == key:
+            row = int(order[i])
+            if row not in self.shadowed["reports"]:
+                return base.load(row)
+            i += 1
+        return self.overlay.get_report_for_candidate(candidate_id)
+
+
+# CLI
+
+async def _build(args) -> Dict[str, int]:
+    # Imported here: app.storage picks its backend from HARRY_* variables
+    # when imported, which the CLI doesn't need
+    from .storage import MemoryStorage, SQLiteStorage
+
+    source = MemoryStorage() if args.source == "mock" else SQLiteStorage(args.db)
+    try:
+        return await build(source, args.output)
+    finally:
+        await source.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    from .storage import DEFAULT_DB_PATH
+
+    parser = argparse.ArgumentParser(prog="python -m app.snapshot", description="Build or inspect a dataset snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="write a snapshot of the current data")
+    build_parser.add_argument("--source", choices=("sqlite", "mock"), default="sqlite",
+                              help="sqlite: the database at --db; mock: the built-in demo data")
+    build_parser.add_argument("--db", default=os.getenv("HARRY_DB_PATH", str(DEFAULT_DB_PATH)))
+    build_parser.add_argument("--output", default=os.getenv("HARRY_SNAPSHOT_PATH", str(DEFAULT_SNAPSHOT_PATH)))
+    info_parser = commands.add_parser("info", help="print what a snapshot holds")
+    info_parser.add_argument("path", nargs="?", default=os.getenv("HARRY_SNAPSHOT_PATH", str(DEFAULT_SNAPSHOT_PATH)))
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        counts = asyncio.run(_build(args))
+        size = os.path.getsize(args.output) / 2 ** 20
+        rows = ", ".join(f"{count} {entity}" for entity, count in counts.items())
+        print(f"Wrote {args.output} ({size:.1f} MB: {rows}) in {time.perf_counter() - started:.1f}s")
+        return
+
+    started = time.perf_counter()
+    snapshot = Snapshot(args.path)
+    opened = time.perf_counter() - started
+    print(f"{args.path}: version {VERSION}, built {snapshot.meta['created_at']}, opened in {opened * 1000:.2f} ms")
+    for entity in ENTITIES:
+        size = sum(
+            math.prod(shape) * np.dtype(dtype).itemsize
+            for name, (_, dtype, shape) in snapshot.sections.items() if name.startswith(f"{entity}.")
+        )
+        print(f"  {entity}: {snapshot.meta[entity]['count']} rows, {size / 2 ** 20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
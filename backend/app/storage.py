@@ -0,0 +1,881 @@
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple, TypeVar
+from .schemas import Candidate, Interview, InterviewDetail, Vacancy, Report
+from .pagination import (
+    MISSING, InvalidCursor, ListQuery, Page, TranscriptWindow, encode_cursor, in_time_range, read_cursor, sort_value,
+)
+from .repository import Repository, load_mock_repository
+from .snapshot import DEFAULT_SNAPSHOT_PATH, Snapshot, SnapshotRepository
+from .search import tokenize
+
+T = TypeVar("T")
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "harry.db"
+
+
+class Storage:
+    """Async persistence interface used by the API endpoints"""
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def changed_elsewhere(self) -> bool:
+        """Whether another process has written since the last call
+
+        Per-process state derived from the data (matcher, analytics) is
+        reloaded when this is true.
+        """
+        return False
+
+    async def get_candidate(self, candidate_id: str) -> Optional[Candidate]:
+        raise NotImplementedError
+
+    async def list_candidates(self, query: ListQuery) -> Page:
+        raise NotImplementedError
+
+    async def add_candidate(self, candidate: Candidate):
+        raise NotImplementedError
+
+    async def add_candidates(self, candidates: List[Candidate]):
+        """Insert or replace a batch of candidates in one transaction"""
+        raise NotImplementedError
+
+    async def update_match_percentages(self, changes: Dict[str, Optional[int]]):
+        """Store recomputed match_percentage values by candidate id"""
+        raise NotImplementedError
+
+    async def scan(self, entity: str, batch: int = 1000, status: Optional[str] = None) -> AsyncIterator[Any]:
+        """Every candidate/interview/vacancy in insertion order, page by page"""
+        list_page = getattr(self, f"list_{entity}")
+        cursor = None
+        while True:
+            page = await list_page(ListQuery(status=status, limit=batch, cursor=cursor))
+            for item in page.items:
+                yield item
+            if not page.next_cursor:
+                return
+            cursor = page.next_cursor
+
+    def scan_reports(self, batch: int = 1000) -> AsyncIterator[Report]:
+        """Every report in insertion order"""
+        raise NotImplementedError
+
+    async def get_interview(self, interview_id: str, include_transcript: bool = True) -> Optional[Interview]:
+        raise NotImplementedError
+
+    async def get_transcript(self, interview_id: str, window: TranscriptWindow) -> Optional[Page]:
+        """Window of transcript entries (total = entries in the time range),
+        or None when the interview doesn't exist"""
+        raise NotImplementedError
+
+    async def list_interviews(self, query: ListQuery) -> Page:
+        raise NotImplementedError
+
+    async def add_interview(self, interview: Interview):
+        raise NotImplementedError
+
+    async def get_vacancy(self, vacancy_id: str) -> Optional[Vacancy]:
+        raise NotImplementedError
+
+    async def list_vacancies(self, query: ListQuery) -> Page:
+        raise NotImplementedError
+
+    async def add_vacancy(self, vacancy: Vacancy):
+        raise NotImplementedError
+
+    async def add_vacancies(self, vacancies: List[Vacancy]):
+        """Insert or replace a batch of vacancies in one transaction"""
+        raise NotImplementedError
+
+    async def get_report_for_candidate(self, candidate_id: str) -> Optional[Report]:
+        raise NotImplementedError
+
+    async def add_report(self, report: Report):
+        raise NotImplementedError
+
+
+class MemoryStorage(Storage):
+    """Process-local storage backed by the indexed in-memory repository"""
+
+    def __init__(self, repo: Optional[Repository] = None):
+        self.repo = repo if repo is not None else load_mock_repository()
+
+    def _list(self, entity: str, table: Dict[str, Any], query: ListQuery) -> Page:
+        after, offset = read_cursor(entity, query)
+        limit = max(query.limit, 0)
+
+        if query.search:
+            # Ranked matches are materialized anyway, so page them by offset
+            if after is not None:
+                raise InvalidCursor("Cursor does not match the search query")
+            rows = list(getattr(self.repo, f"search_{entity}")(query.search, query.status))
+            if query.sort_by:
+                rows.sort(key=lambda r: sort_value(r, query.sort_by), reverse=query.descending)
+            items = rows[offset:offset + limit]
+            more = offset + limit < len(rows)
+            next_cursor = encode_cursor(query.sort_by, query.sort_order, offset=offset + limit) if more else None
+            return Page(items, next_cursor, len(rows) if query.include_total else None)
+
+        index = self.repo.sorted_index(entity, query.sort_by, query.status)
+        if after is not None:
+            entries = index.page(after, query.descending, limit + 1)
+        else:
+            entries = index.skip(offset, query.descending, limit + 1)
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            if entries:
+                next_cursor = encode_cursor(query.sort_by, query.sort_order, key=entries[-1][:2])
+        items = [table[item_id] for _, _, item_id in entries]
+        return Page(items, next_cursor, len(index) if query.include_total else None)
+
+    async def get_candidate(self, candidate_id):
+        return self.repo.get_candidate(candidate_id)
+
+    async def list_candidates(self, query):
+        return self._list("candidates", self.repo.candidates, query)
+
+    async def add_candidate(self, candidate):
+        self.repo.add_candidate(candidate)
+
+    async def add_candidates(self, candidates):
+        for candidate in candidates:
+            self.repo.add_candidate(candidate)
+
+    async def update_match_percentages(self, changes):
+        for candidate_id, match_percentage in changes.items():
+            candidate = self.repo.get_candidate(candidate_id)
+            if candidate is not None:
+                self.repo.add_candidate(candidate.model_copy(update={"match_percentage": match_percentage}))
+
+    async def get_interview(self, interview_id, include_transcript=True):
+        interview = self.repo.get_interview(interview_id)
+        if not include_transcript and isinstance(interview, InterviewDetail):
+            interview = interview.model_copy(update={"transcript": None})
+        return interview
+
+    async def get_transcript(self, interview_id, window):
+        interview = self.repo.get_interview(interview_id)
+        if interview is None:
+            return None
+        entries = getattr(interview, "transcript", None) or []
+        if window.start is not None or window.end is not None:
+            entries = [entry for entry in entries if in_time_range(entry, window.start, window.end)]
+        return Page(entries[window.offset:window.offset + window.limit], None, len(entries))
+
+    async def list_interviews(self, query):
+        return self._list("interviews", self.repo.interviews, query)
+
+    async def add_interview(self, interview):
+        self.repo.add_interview(interview)
+
+    async def get_vacancy(self, vacancy_id):
+        return self.repo.get_vacancy(vacancy_id)
+
+    async def list_vacancies(self, query):
+        return self._list("vacancies", self.repo.vacancies, query)
+
+    async def add_vacancy(self, vacancy):
+        self.repo.add_vacancy(vacancy)
+
+    async def add_vacancies(self, vacancies):
+        for vacancy in vacancies:
+            self.repo.add_vacancy(vacancy)
+
+    async def get_report_for_candidate(self, candidate_id):
+        return self.repo.get_report_for_candidate(candidate_id)
+
+    async def scan_reports(self, batch=1000):
+        for report in list(self.repo.reports.values()):
+            yield report
+
+    async def add_report(self, report):
+        self.repo.add_report(report)
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections driven from a thread executor
+
+    Each executor thread checks a connection out for the duration of one
+    call, so the pool never blocks the event loop and connections (with
+    their compiled statement caches) are reused across requests.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self.size = size
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sqlite")
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,  # explicit BEGIN/COMMIT
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _call(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        conn = self._idle.get()
+        try:
+            return fn(conn)
+        finally:
+            self._idle.put(conn)
+
+    def run_sync(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return self._call(fn)
+
+    async def run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class SnapshotStorage(MemoryStorage):
+    """Storage served from a memory-mapped snapshot (see snapshot.py)
+
+    Reads decode rows from the shared mapping on demand; writes are kept in
+    this process's memory on top of it, as with MemoryStorage, until the
+    next snapshot is built.
+    """
+
+    def __init__(self, path: str = str(DEFAULT_SNAPSHOT_PATH)):
+        self.path = path
+        self._repo: Optional[SnapshotRepository] = None
+
+    @property
+    def repo(self) -> SnapshotRepository:
+        # Opened lazily so importing the app doesn't require the file
+        if self._repo is None:
+            self._repo = SnapshotRepository(Snapshot(self.path))
+        return self._repo
+
+    async def open(self):
+        self.repo
+
+
+SCHEMA_V1 = [
+    """CREATE TABLE candidates (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        interview_id TEXT,
+        search_text TEXT NOT NULL,
+        payload TEXT NOT NULL
+    )""",
+    "CREATE INDEX ix_candidates_status ON candidates(status)",
+    "CREATE INDEX ix_candidates_interview_id ON candidates(interview_id)",
+    """CREATE TABLE interviews (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        candidate_id TEXT NOT NULL,
+        search_text TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        detail TEXT
+    )""",
+    "CREATE INDEX ix_interviews_status ON interviews(status)",
+    "CREATE INDEX ix_interviews_candidate_id ON interviews(candidate_id)",
+    """CREATE TABLE vacancies (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        search_text TEXT NOT NULL,
+        payload TEXT NOT NULL
+    )""",
+    "CREATE INDEX ix_vacancies_status ON vacancies(status)",
+    """CREATE TABLE reports (
+        id TEXT PRIMARY KEY,
+        candidate_id TEXT NOT NULL,
+        interview_id TEXT NOT NULL,
+        payload TEXT NOT NULL
+    )""",
+    "CREATE INDEX ix_reports_candidate_id ON reports(candidate_id)",
+    "CREATE INDEX ix_reports_interview_id ON reports(interview_id)",
+]
+
+
+def _migration_1_schema(conn: sqlite3.Connection):
+    # Statements run one by one: executescript() would commit the migration transaction
+    for statement in SCHEMA_V1:
+        conn.execute(statement)
+
+
+# Seed rows in the v1 layout; its search_text columns are dropped by migration 5
+SEED_V1 = {
+    "candidates": "INSERT INTO candidates (id, status, interview_id, payload, search_text) VALUES (?, ?, ?, ?, '')",
+    "interviews": "INSERT INTO interviews (id, status, candidate_id, payload, detail, search_text) VALUES (?, ?, ?, ?, ?, '')",
+    "vacancies": "INSERT INTO vacancies (id, status, payload, search_text) VALUES (?, ?, ?, '')",
+}
+
+
+def _migration_2_seed(conn: sqlite3.Connection):
+    from .data import MOCK_CANDIDATES, MOCK_INTERVIEWS, MOCK_INTERVIEW_DETAILS, MOCK_VACANCIES, MOCK_REPORTS
+
+    for candidate in MOCK_CANDIDATES:
+        conn.execute(SEED_V1["candidates"], _candidate_params(candidate))
+    for interview in MOCK_INTERVIEWS:
+        conn.execute(SEED_V1["interviews"], _interview_params(MOCK_INTERVIEW_DETAILS.get(interview.id, interview)))
+    for vacancy in MOCK_VACANCIES:
+        conn.execute(SEED_V1["vacancies"], _vacancy_params(vacancy))
+    for report in MOCK_REPORTS:
+        _upsert_report(conn, report)
+
+
+def _fold_sql(expr: str) -> str:
+    # unicode61 folds case (Cyrillic included) but keeps "ё" distinct from "е"
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+# table -> [(column, SQL expression over the row payload, bm25 weight)]
+FTS_COLUMNS = {
+    "candidates": [
+        ("name", "json_extract({row}.payload, '$.name')", 2.0),
+        ("position", "json_extract({row}.payload, '$.position')", 1.0),
+        ("skills", "(SELECT group_concat(value, ' ') FROM json_each({row}.payload, '$.skills'))", 1.0),
+    ],
+    "interviews": [
+        ("candidate_name", "json_extract({row}.payload, '$.candidate_name')", 2.0),
+        ("position", "json_extract({row}.payload, '$.position')", 1.0),
+    ],
+    "vacancies": [
+        ("title", "json_extract({row}.payload, '$.title')", 2.0),
+        ("department", "json_extract({row}.payload, '$.department')", 1.0),
+    ],
+}
+
+
+def _create_fts(conn: sqlite3.Connection, table: str, index: str, tokenize: str):
+    """FTS5 index `index` over FTS_COLUMNS[table], kept in sync by triggers"""
+    columns = FTS_COLUMNS[table]
+    names = ", ".join(name for name, _, _ in columns)
+
+    def values(row: str) -> str:
+        return ", ".join(_fold_sql(expr.format(row=row)) for _, expr, _ in columns)
+
+    conn.execute(f"CREATE VIRTUAL TABLE {index} USING fts5({names}, tokenize = '{tokenize}')")
+    conn.execute(
+        f"CREATE TRIGGER {index}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {index} (rowid, {names}) VALUES (new.rowid, {values('new')}); END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER {index}_update AFTER UPDATE ON {table} BEGIN "
+        f"DELETE FROM {index} WHERE rowid = old.rowid; "
+        f"INSERT INTO {index} (rowid, {names}) VALUES (new.rowid, {values('new')}); END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER {index}_delete AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {index} WHERE rowid = old.rowid; END"
+    )
+    conn.execute(f"INSERT INTO {index} (rowid, {names}) SELECT {table}.rowid, {values(table)} FROM {table}")
+
+
+def _migration_3_fts(conn: sqlite3.Connection):
+    """Word index: whole tokens and token prefixes"""
+    for table in FTS_COLUMNS:
+        _create_fts(conn, table, f"{table}_fts", "unicode61 remove_diacritics 2")
+
+
+def _numeric(path: str) -> str:
+    return f"coalesce(json_extract(payload, '{path}'), {MISSING})"
+
+
+def _timestamp(path: str) -> str:
+    return f"julianday(json_extract(payload, '{path}'))"
+
+
+# table -> sort field -> generated column expression (see pagination.SORT_FIELDS)
+SORT_COLUMNS = {
+    "candidates": {
+        "created_at": _timestamp("$.created_at"),
+        "score": _numeric("$.score"),
+        "match_percentage": _numeric("$.match_percentage"),
+    },
+    "interviews": {
+        "scheduled_at": _timestamp("$.scheduled_at"),
+        "score": _numeric("$.score"),
+    },
+    "vacancies": {
+        "created_at": _timestamp("$.created_at"),
+        "applicants_count": _numeric("$.applicants_count"),
+    },
+}
+
+
+def _migration_4_sort_columns(conn: sqlite3.Connection):
+    """Sort keys as generated columns, indexed alone and per status"""
+    for table, columns in SORT_COLUMNS.items():
+        for column, expr in columns.items():
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} GENERATED ALWAYS AS ({expr}) VIRTUAL")
+            conn.execute(f"CREATE INDEX ix_{table}_{column} ON {table}({column})")
+            conn.execute(f"CREATE INDEX ix_{table}_status_{column} ON {table}(status, {column})")
+
+
+def _migration_5_trigram_search(conn: sqlite3.Connection):
+    """Trigram index for substring search, replacing the v1 search_text columns"""
+    for table in FTS_COLUMNS:
+        _create_fts(conn, table, f"{table}_grams", "trigram")
+        conn.execute(f"ALTER TABLE {table} DROP COLUMN search_text")
+
+
+def _migration_6_data_version(conn: sqlite3.Connection):
+    """Counter bumped by every write, so workers notice each other's writes"""
+    conn.execute("CREATE TABLE data_version (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)")
+    conn.execute("INSERT INTO data_version VALUES (0, 0)")
+
+
+# Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    _migration_1_schema,
+    _migration_2_seed,
+    _migration_3_fts,
+    _migration_4_sort_columns,
+    _migration_5_trigram_search,
+    _migration_6_data_version,
+]
+
+
+def migrate(conn: sqlite3.Connection):
+    """Bring the schema up to date (safe to call from several workers at once)"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# Statements are kept as constants so every pooled connection compiles them
+# once and serves later calls from its statement cache.
+SQL_UPSERT_CANDIDATE = """
+    INSERT INTO candidates (id, status, interview_id, payload)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        status = excluded.status,
+        interview_id = excluded.interview_id,
+        payload = excluded.payload
+"""
+SQL_GET_CANDIDATE = "SELECT payload FROM candidates WHERE id = ?"
+
+SQL_BUMP_DATA_VERSION = "UPDATE data_version SET version = version + 1"
+SQL_GET_DATA_VERSION = "SELECT version FROM data_version"
+
+SQL_SET_MATCH_PERCENTAGE = "UPDATE candidates SET payload = json_set(payload, '$.match_percentage', ?) WHERE id = ?"
+
+SQL_UPSERT_INTERVIEW = """
+    INSERT INTO interviews (id, status, candidate_id, payload, detail)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        status = excluded.status,
+        candidate_id = excluded.candidate_id,
+        payload = excluded.payload,
+        detail = excluded.detail
+"""
+SQL_GET_INTERVIEW = "SELECT payload, detail FROM interviews WHERE id = ?"
+
+# json_remove drops the transcript inside SQLite, so it never reaches Python
+SQL_GET_INTERVIEW_HEADER = "SELECT payload, json_remove(detail, '$.transcript') FROM interviews WHERE id = ?"
+
+SQL_INTERVIEW_EXISTS = "SELECT 1 FROM interviews WHERE id = ?"
+
+SQL_UPSERT_VACANCY = """
+    INSERT INTO vacancies (id, status, payload)
+    VALUES (?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        status = excluded.status,
+        payload = excluded.payload
+"""
+SQL_GET_VACANCY = "SELECT payload FROM vacancies WHERE id = ?"
+
+SQL_UPSERT_REPORT = """
+    INSERT INTO reports (id, candidate_id, interview_id, payload)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        candidate_id = excluded.candidate_id,
+        interview_id = excluded.interview_id,
+        payload = excluded.payload
+"""
+SQL_GET_REPORT_FOR_CANDIDATE = "SELECT payload FROM reports WHERE candidate_id = ? ORDER BY rowid LIMIT 1"
+
+SQL_SCAN_REPORTS = "SELECT rowid, payload FROM reports WHERE rowid > ? ORDER BY rowid LIMIT ?"
+
+
+
+class SearchQuery(NamedTuple):
+    """FTS queries for one search: trigram substrings and short-token prefixes"""
+    grams: Optional[str]
+    prefixes: Optional[str]
+
+
+def _search_source(table: str, search: Optional[Tuple[bool, bool]]) -> Tuple[str, List[str], Optional[str]]:
+    """FROM clause, WHERE conditions and ranking index for a search shape (grams, prefixes)"""
+    if search is None:
+        return f"{table} t", [], None
+    grams, prefixes = search
+    index = f"{table}_grams" if grams else f"{table}_fts"
+    where = [f"{index} MATCH :grams" if grams else f"{index} MATCH :prefixes"]
+    if grams and prefixes:
+        where.append(f"t.rowid IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH :prefixes)")
+    return f"{index} JOIN {table} t ON t.rowid = {index}.rowid", where, index
+
+
+@lru_cache(maxsize=None)
+def _list_sql(table: str, by_status: bool, search: Optional[Tuple[bool, bool]], sort_by: Optional[str],
+              descending: bool, keyset: bool) -> str:
+    """Build (once per shape) the page query; rows are (payload, sort value, rowid)"""
+    direction = "DESC" if descending else "ASC"
+    source, where, index = _search_source(table, search)
+    if by_status:
+        where.append("t.status = :status")
+    if keyset:
+        op = "<" if descending else ">"
+        where.append(f"(t.{sort_by}, t.rowid) {op} (:value, :seq)" if sort_by else f"t.rowid {op} :seq")
+
+    if sort_by:
+        order = f"t.{sort_by} {direction}, t.rowid {direction}"
+    elif index:
+        weights = ", ".join(str(weight) for _, _, weight in FTS_COLUMNS[table])
+        order = f"bm25({index}, {weights}), t.rowid"
+    else:
+        order = f"t.rowid {direction}"
+    column = f"t.{sort_by}" if sort_by else "0"
+    clause = f"WHERE {' AND '.join(where)} " if where else ""
+    return f"SELECT t.payload, {column}, t.rowid FROM {source} {clause}ORDER BY {order} LIMIT :limit OFFSET :offset"
+
+
+@lru_cache(maxsize=None)
+def _count_sql(table: str, by_status: bool, search: Optional[Tuple[bool, bool]]) -> str:
+    source, where, _ = _search_source(table, search)
+    if by_status:
+        where.append("t.status = :status")
+    clause = f" WHERE {' AND '.join(where)}" if where else ""
+    return f"SELECT count(*) FROM {source}{clause}"
+
+
+@lru_cache(maxsize=None)
+def _transcript_sql(has_start: bool, has_end: bool, count: bool) -> str:
+    """Window or count of transcript entries, unpacked from `detail` by json_each"""
+    where = ["i.id = :id"]
+    if has_start:
+        where.append("json_extract(t.value, '$.timestamp') >= :start")
+    if has_end:
+        where.append("json_extract(t.value, '$.timestamp') < :end")
+    select = "count(*)" if count else "t.value"
+    sql = f"SELECT {select} FROM interviews AS i, json_each(i.detail, '$.transcript') AS t WHERE {' AND '.join(where)}"
+    if not count:
+        sql += " LIMIT :limit OFFSET :offset"
+    return sql
+
+
+def _fts_query(search: str) -> Optional[SearchQuery]:
+    """Queries matching documents where every search token is part of some word
+
+    Like SearchIndex: tokens of three characters and more match anywhere
+    inside a word (trigram index), shorter ones only at its start.
+    """
+    tokens = tokenize(search)
+    if not tokens:
+        return None
+    grams = " ".join(f'"{token}"' for token in tokens if len(token) >= 3)
+    prefixes = " ".join(f'"{token}"*' for token in tokens if len(token) < 3)
+    return SearchQuery(grams or None, prefixes or None)
+
+
+def _search_shape(search: Optional[SearchQuery]) -> Optional[Tuple[bool, bool]]:
+    return None if search is None else (search.grams is not None, search.prefixes is not None)
+
+
+def _search_params(search: Optional[SearchQuery]) -> Dict[str, Optional[str]]:
+    return search._asdict() if search is not None else {}
+
+
+def _candidate_params(candidate: Candidate) -> tuple:
+    return (
+        candidate.id,
+        candidate.status.value,
+        candidate.interview_id,
+        candidate.model_dump_json(),
+    )
+
+
+def _upsert_candidate(conn: sqlite3.Connection, candidate: Candidate):
+    conn.execute(SQL_UPSERT_CANDIDATE, _candidate_params(candidate))
+
+
+def _interview_params(interview: Interview) -> tuple:
+    detail = None
+    if isinstance(interview, InterviewDetail):
+        detail = json.dumps({"transcript": interview.transcript, "metrics": interview.metrics})
+    return (
+        interview.id,
+        interview.status.value,
+        interview.candidate_id,
+        interview.model_dump_json(exclude={"transcript", "metrics"}),
+        detail,
+    )
+
+
+def _upsert_interview(conn: sqlite3.Connection, interview: Interview):
+    conn.execute(SQL_UPSERT_INTERVIEW, _interview_params(interview))
+
+
+def _vacancy_params(vacancy: Vacancy) -> tuple:
+    return (
+        vacancy.id,
+        vacancy.status.value,
+        vacancy.model_dump_json(),
+    )
+
+
+def _upsert_vacancy(conn: sqlite3.Connection, vacancy: Vacancy):
+    conn.execute(SQL_UPSERT_VACANCY, _vacancy_params(vacancy))
+
+
+def _upsert_report(conn: sqlite3.Connection, report: Report):
+    conn.execute(SQL_UPSERT_REPORT, (
+        report.id,
+        report.candidate_id,
+        report.interview_id,
+        report.model_dump_json(),
+    ))
+
+
+class SQLiteStorage(Storage):
+    """Durable storage in a WAL-mode SQLite file shared by all workers"""
+
+    # Seconds a COUNT(*) result is reused for the `total` of list responses
+    TOTAL_TTL = 5.0
+
+    def __init__(self, path: str = str(DEFAULT_DB_PATH), pool_size: int = 4):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool: Optional[ConnectionPool] = None
+        self._totals: Dict[Tuple[str, Optional[str], Optional[str]], Tuple[float, int]] = {}
+        # data_version as of this process's last look; _stale once a write
+        # finds that another process wrote in between
+        self._version: Optional[int] = None
+        self._stale = False
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # Opened lazily so the storage also works without startup events
+        if self._pool is None:
+            pool = ConnectionPool(self.path, self.pool_size)
+            pool.run_sync(migrate)
+            self._pool = pool
+        return self._pool
+
+    async def open(self):
+        self.pool
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    async def _fetch_one(self, sql: str, params: tuple):
+        return await self.pool.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def _total(self, table: str, status: Optional[str], search: Optional[SearchQuery]) -> int:
+        key = (table, status, search)
+        cached = self._totals.get(key)
+        now = time.monotonic()
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        sql = _count_sql(table, status is not None, _search_shape(search))
+        params = {"status": status, **_search_params(search)}
+        total = await self.pool.run(lambda conn: conn.execute(sql, params).fetchone()[0])
+        self._totals[key] = (now + self.TOTAL_TTL, total)
+        return total
+
+    async def _fetch_page(self, table: str, query: ListQuery) -> Page:
+        """Page of raw JSON payloads for a list query"""
+        after, offset = read_cursor(table, query)
+        limit = max(query.limit, 0)
+        status = getattr(query.status, "value", query.status)
+        search = None
+        if query.search:
+            if after is not None:
+                raise InvalidCursor("Cursor does not match the search query")
+            search = _fts_query(query.search)
+            if not search:
+                return Page([], None, 0 if query.include_total else None)
+
+        sql = _list_sql(table, status is not None, _search_shape(search), query.sort_by, query.descending, after is not None)
+        params = {
+            "status": status,
+            **_search_params(search),
+            "value": after[0] if after else None,
+            "seq": after[1] if after else None,
+            "limit": limit + 1,
+            "offset": offset,
+        }
+        rows = await self.pool.run(lambda conn: conn.execute(sql, params).fetchall())
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            if search is not None:
+                next_cursor = encode_cursor(query.sort_by, query.sort_order, offset=offset + limit)
+            elif rows:
+                _, value, rowid = rows[-1]
+                next_cursor = encode_cursor(query.sort_by, query.sort_order, key=(value, rowid))
+        total = await self._total(table, status, search) if query.include_total else None
+        return Page([row[0] for row in rows], next_cursor, total)
+
+    async def _write(self, fn: Callable[[sqlite3.Connection], None]):
+        def transaction(conn: sqlite3.Connection):
+            conn.execute("BEGIN IMMEDIATE")
+            seen, stale = self._version, self._stale
+            try:
+                fn(conn)
+                conn.execute(SQL_BUMP_DATA_VERSION)
+                (version,) = conn.execute(SQL_GET_DATA_VERSION).fetchone()
+                # Set before COMMIT, while this transaction still holds the write lock
+                if seen is not None and version != seen + 1:
+                    self._stale = True
+                self._version = version
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._version, self._stale = seen, stale
+                raise
+        await self.pool.run(transaction)
+        self._totals.clear()
+
+    async def changed_elsewhere(self):
+        (version,) = await self._fetch_one(SQL_GET_DATA_VERSION, ())
+        # Our own writes may have moved past `version` meanwhile
+        changed = self._stale or self._version is None or version > self._version
+        self._stale = False
+        if self._version is None or version > self._version:
+            self._version = version
+        return changed
+
+    async def get_candidate(self, candidate_id):
+        row = await self._fetch_one(SQL_GET_CANDIDATE, (candidate_id,))
+        return Candidate.model_validate_json(row[0]) if row else None
+
+    async def list_candidates(self, query):
+        page = await self._fetch_page("candidates", query)
+        return page._replace(items=[Candidate.model_validate_json(p) for p in page.items])
+
+    async def add_candidate(self, candidate):
+        await self._write(lambda conn: _upsert_candidate(conn, candidate))
+
+    async def add_candidates(self, candidates):
+        if candidates:
+            rows = [_candidate_params(candidate) for candidate in candidates]
+            await self._write(lambda conn: conn.executemany(SQL_UPSERT_CANDIDATE, rows))
+
+    async def update_match_percentages(self, changes):
+        if changes:
+            rows = [(value, candidate_id) for candidate_id, value in changes.items()]
+            await self._write(lambda conn: conn.executemany(SQL_SET_MATCH_PERCENTAGE, rows))
+
+    async def get_interview(self, interview_id, include_transcript=True):
+        sql = SQL_GET_INTERVIEW if include_transcript else SQL_GET_INTERVIEW_HEADER
+        row = await self._fetch_one(sql, (interview_id,))
+        if not row:
+            return None
+        payload, detail = row
+        if detail is None:
+            return Interview.model_validate_json(payload)
+        return InterviewDetail(**json.loads(payload), **json.loads(detail))
+
+    async def get_transcript(self, interview_id, window):
+        has_start, has_end = window.start is not None, window.end is not None
+        params = {**window._asdict(), "id": interview_id}
+
+        def fetch(conn: sqlite3.Connection):
+            if conn.execute(SQL_INTERVIEW_EXISTS, (interview_id,)).fetchone() is None:
+                return None
+            rows = conn.execute(_transcript_sql(has_start, has_end, False), params).fetchall()
+            total = conn.execute(_transcript_sql(has_start, has_end, True), params).fetchone()[0]
+            return [json.loads(value) for (value,) in rows], total
+
+        result = await self.pool.run(fetch)
+        if result is None:
+            return None
+        return Page(result[0], None, result[1])
+
+    async def list_interviews(self, query):
+        page = await self._fetch_page("interviews", query)
+        return page._replace(items=[Interview.model_validate_json(p) for p in page.items])
+
+    async def add_interview(self, interview):
+        await self._write(lambda conn: _upsert_interview(conn, interview))
+
+    async def get_vacancy(self, vacancy_id):
+        row = await self._fetch_one(SQL_GET_VACANCY, (vacancy_id,))
+        return Vacancy.model_validate_json(row[0]) if row else None
+
+    async def list_vacancies(self, query):
+        page = await self._fetch_page("vacancies", query)
+        return page._replace(items=[Vacancy.model_validate_json(p) for p in page.items])
+
+    async def add_vacancy(self, vacancy):
+        await self._write(lambda conn: _upsert_vacancy(conn, vacancy))
+
+    async def add_vacancies(self, vacancies):
+        if vacancies:
+            rows = [_vacancy_params(vacancy) for vacancy in vacancies]
+            await self._write(lambda conn: conn.executemany(SQL_UPSERT_VACANCY, rows))
+
+    async def get_report_for_candidate(self, candidate_id):
+        row = await self._fetch_one(SQL_GET_REPORT_FOR_CANDIDATE, (candidate_id,))
+        return Report.model_validate_json(row[0]) if row else None
+
+    async def scan_reports(self, batch=1000):
+        last = 0
+        while True:
+            rows = await self.pool.run(lambda conn: conn.execute(SQL_SCAN_REPORTS, (last, batch)).fetchall())
+            for _, payload in rows:
+                yield Report.model_validate_json(payload)
+            if len(rows) < batch:
+                return
+            last = rows[-1][0]
+
+    async def add_report(self, report):
+        await self._write(lambda conn: _upsert_report(conn, report))
+
+
+def create_storage() -> Storage:
+    """Pick the storage backend from HARRY_STORAGE: sqlite (default), memory or snapshot"""
+    backend = os.getenv("HARRY_STORAGE", "sqlite").lower()
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "snapshot":
+        return SnapshotStorage(os.getenv("HARRY_SNAPSHOT_PATH", str(DEFAULT_SNAPSHOT_PATH)))
+    if backend == "sqlite":
+        return SQLiteStorage(
+            path=os.getenv("HARRY_DB_PATH", str(DEFAULT_DB_PATH)),
+            pool_size=int(os.getenv("HARRY_DB_POOL_SIZE", "4")),
+        )
+    raise ValueError(f"Unknown HARRY_STORAGE backend: {backend}")
+
+
+storage = create_storage()
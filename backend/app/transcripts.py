@@ -0,0 +1,656 @@
+"""Append-only transcript log: a directory of segment files per interview
+
+Live transcript entries are appended as records instead of being rewritten
+inside InterviewDetail.transcript:
+
+    <epoch>-<seq>.seg   header, then [u32 length][u32 crc32][f64 time][JSON entry]
+    <epoch>-<seq>.idx   (time, byte offset) of every INDEX_EVERY-th record
+
+A record is one write() to the open segment, so appends are O(1); a committer
+task fsyncs every file written since its last pass once per
+HARRY_TRANSCRIPT_COMMIT_MS, so all appends in that interval share one fsync.
+Reads mmap the segments: the sparse index finds the first record of a time
+window by bisection and only the records returned are decoded. Record times
+never decrease (an entry that arrives out of order is filed under the latest
+time already logged), which is what makes the bisection valid.
+
+Once an interview finishes, its log is compacted in the background into a
+single segment of the next epoch, keeping only the last version of entries
+appended more than once (same "id"). The new epoch replaces the old one by
+rename, so a crash leaves either the old or the new segments.
+
+Each log has one writer process at a time (it holds an flock on the log's
+`lock` file); other processes read it and pick up its appends as they go.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .pagination import Page, TranscriptWindow
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TRANSCRIPT_DIR = os.getenv("HARRY_TRANSCRIPT_DIR", os.path.join(_BACKEND_DIR, "transcripts"))
+# A segment is sealed and a new one started once it reaches this size
+SEGMENT_BYTES = int(os.getenv("HARRY_TRANSCRIPT_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+# Appends are durable at most this long after they are written
+COMMIT_INTERVAL_MS = float(os.getenv("HARRY_TRANSCRIPT_COMMIT_MS", "100"))
+# Delay before a finished interview is compacted (a reconnect within it
+# resumes the live log instead)
+COMPACT_DELAY_SEC = float(os.getenv("HARRY_TRANSCRIPT_COMPACT_DELAY_SEC", "60"))
+
+# Records between two sparse index entries: a lookup scans at most this many
+# record headers after the bisection
+INDEX_EVERY = 64
+# Logs opened only for reading that stay mapped
+READERS_CACHE_SIZE = 64
+
+MAGIC = b"HARRYTLG"
+VERSION = 1
+HEADER = struct.Struct("<8sI")
+RECORD = struct.Struct("<IId")
+INDEX = struct.Struct("<dQ")
+
+
+def _log_dir(root: str, interview_id: str) -> str:
+    # Interview ids come from URLs, so they never become path components
+    return os.path.join(root, hashlib.sha256(interview_id.encode()).hexdigest()[:32])
+
+
+def _segment_name(epoch: int, seq: int) -> str:
+    return f"{epoch:04d}-{seq:06d}.seg"
+
+
+def _parse_name(name: str) -> Optional[Tuple[int, int]]:
+    stem, _, ext = name.partition(".")
+    epoch, _, seq = stem.partition("-")
+    if ext != "seg" or not epoch.isdigit() or not seq.isdigit():
+        return None
+    return int(epoch), int(seq)
+
+
+def _fsync_dir(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Segment:
+    """One segment file with its in-memory sparse index"""
+
+    def __init__(self, path: str, epoch: int, seq: int, base: int = 0):
+        self.path = path
+        self.epoch = epoch
+        self.seq = seq
+        self.base = base
+        self.count = 0
+        self.size = HEADER.size
+        self.last_time = 0.0
+        self.times = array("d")
+        self.offsets = array("Q")
+        self.fd: Optional[int] = None
+        self.index_fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+
+    @property
+    def index_path(self) -> str:
+        return self.path[:-len(".seg")] + ".idx"
+
+    def view(self) -> mmap.mmap:
+        """Mapping covering at least `size` bytes; remapped as the segment grows
+
+        A replaced mapping is left to the garbage collector, as another
+        thread may still be reading it.
+        """
+        if self._map is None or len(self._map) < self.size:
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def recover(self, repair: bool):
+        """Rebuild count, size and index tail from the records on disk
+
+        Stops at the first torn or corrupt record; with `repair` (writer
+        only) the file and its index are truncated there.
+        """
+        file_size = os.path.getsize(self.path)
+        if file_size < HEADER.size:
+            raise OSError(f"Truncated transcript segment: {self.path}")
+        self.size = file_size
+        mm = self.view()
+        if mm[:len(MAGIC)] != MAGIC:
+            raise OSError(f"Not a transcript segment: {self.path}")
+        try:
+            with open(self.index_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = b""
+        raw = raw[:len(raw) - len(raw) % INDEX.size]
+        entries = [INDEX.unpack_from(raw, i) for i in range(0, len(raw), INDEX.size)]
+        # The index may run ahead of the records it points to after a crash
+        while entries and entries[-1][1] >= file_size:
+            entries.pop()
+        while True:
+            block = len(entries) - 1
+            offset = entries[-1][1] if entries else HEADER.size
+            scanned = list(self._scan(mm, offset, file_size))
+            if scanned or not entries or offset == file_size:
+                break
+            entries.pop()
+        self.times = array("d", (t for t, _ in entries))
+        self.offsets = array("Q", (o for _, o in entries))
+        position = max(block, 0) * INDEX_EVERY
+        end, self.last_time = offset, entries[-1][0] if entries else 0.0
+        for record_offset, record_time, record_end in scanned:
+            if position % INDEX_EVERY == 0 and position // INDEX_EVERY >= len(self.times):
+                self.times.append(record_time)
+                self.offsets.append(record_offset)
+            position += 1
+            end, self.last_time = record_end, record_time
+        self.count, self.size = position, end
+        if repair:
+            if end < file_size:
+                logger.warning("Truncating torn transcript segment %s at %d bytes", self.path, end)
+                os.truncate(self.path, end)
+            with open(self.index_path, "wb") as f:
+                f.write(b"".join(INDEX.pack(t, o) for t, o in zip(self.times, self.offsets)))
+
+    @staticmethod
+    def _scan(mm: mmap.mmap, offset: int, limit: int) -> Iterator[Tuple[int, float, int]]:
+        """(offset, time, end) of the valid records from `offset`"""
+        while offset + RECORD.size <= limit:
+            length, crc, record_time = RECORD.unpack_from(mm, offset)
+            end = offset + RECORD.size + length
+            if end > limit or zlib.crc32(mm[offset + RECORD.size:end]) != crc:
+                return
+            yield offset, record_time, end
+            offset = end
+
+    def seek(self, position: int) -> int:
+        """Byte offset of record `position` (relative to the segment)"""
+        mm = self.view()
+        block, skip = divmod(position, INDEX_EVERY)
+        offset = self.offsets[block]
+        for _ in range(skip):
+            offset += RECORD.size + RECORD.unpack_from(mm, offset)[0]
+        return offset
+
+
+class InterviewLog:
+    """Segments of one interview; `lock` guards them against reader threads"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.segments: List[Segment] = []
+        self.epoch = 0
+        self.writable = False
+        self.lock_fd: Optional[int] = None
+        self.closed = False
+        # Bumped by every append, so compaction can tell it raced one
+        self.generation = 0
+        self.mtime = 0
+
+    @property
+    def count(self) -> int:
+        last = self.segments[-1] if self.segments else None
+        return last.base + last.count if last else 0
+
+    @property
+    def last_time(self) -> float:
+        return self.segments[-1].last_time if self.segments else 0.0
+
+    def load(self, writable: bool):
+        """Read the segment list of the newest epoch and recover its tail"""
+        self.mtime = os.stat(self.path).st_mtime_ns
+        names: Dict[int, List[Tuple[int, str]]] = {}
+        for name in os.listdir(self.path):
+            parsed = _parse_name(name)
+            if parsed is not None:
+                names.setdefault(parsed[0], []).append((parsed[1], name))
+            elif writable and name.endswith(".tmp"):
+                os.unlink(os.path.join(self.path, name))
+        self.epoch = max(names, default=0)
+        if writable:
+            # Older epochs are left over from a compaction cut short by a crash
+            for epoch in names:
+                if epoch != self.epoch:
+                    for _, name in names[epoch]:
+                        self._unlink(os.path.join(self.path, name))
+        segments, base = [], 0
+        for seq, name in sorted(names.get(self.epoch, [])):
+            segment = Segment(os.path.join(self.path, name), self.epoch, seq, base)
+            segment.recover(repair=writable)
+            segments.append(segment)
+            base += segment.count
+        self.segments = segments
+
+    def refresh(self):
+        """Catch up with appends made by the writer process"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self.mtime:
+                # Segments were added or compacted away
+                self.load(writable=False)
+                return
+            last = self.segments[-1] if self.segments else None
+            if last is not None and os.path.getsize(last.path) > last.size:
+                last.recover(repair=False)
+        except FileNotFoundError:
+            self.load(writable=False)
+
+    def open_writer(self):
+        os.makedirs(self.path, exist_ok=True)
+        lock_fd = os.open(os.path.join(self.path, "lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.load(writable=True)
+        except BaseException:
+            os.close(lock_fd)
+            raise
+        self.lock_fd = lock_fd
+        self.writable = True
+        last = self.segments[-1] if self.segments else None
+        if last is not None and last.size < SEGMENT_BYTES:
+            last.fd = os.open(last.path, os.O_WRONLY | os.O_APPEND)
+            last.index_fd = os.open(last.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def active(self) -> Segment:
+        """Segment open for appending, started on demand"""
+        last = self.segments[-1] if self.segments else None
+        if last is not None and last.fd is not None:
+            return last
+        segment = Segment(
+            os.path.join(self.path, _segment_name(self.epoch, last.seq + 1 if last else 0)),
+            self.epoch, last.seq + 1 if last else 0, self.count
+        )
+        segment.last_time = self.last_time
+        segment.fd = os.open(segment.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+        segment.index_fd = os.open(segment.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.write(segment.fd, HEADER.pack(MAGIC, VERSION))
+        self.segments.append(segment)
+        return segment
+
+    def parts(self) -> List[Tuple[Segment, int]]:
+        """(segment, record count) snapshot that later appends don't change"""
+        return [(segment, segment.count) for segment in self.segments if segment.count]
+
+    @staticmethod
+    def _unlink(path: str):
+        for name in (path, path[:-len(".seg")] + ".idx"):
+            try:
+                os.unlink(name)
+            except FileNotFoundError:
+                pass
+
+
+def _locate(parts: List[Tuple[Segment, int]], at: float, total: int) -> int:
+    """Position of the first record logged at or after `at`"""
+    first = max(bisect_left([segment.times[0] for segment, _ in parts], at) - 1, 0)
+    for segment, count in parts[first:]:
+        block = max(bisect_left(segment.times, at) - 1, 0)
+        position = block * INDEX_EVERY
+        if position >= count:
+            continue
+        mm = segment.view()
+        offset = segment.offsets[block]
+        while position < count:
+            length, _, record_time = RECORD.unpack_from(mm, offset)
+            if record_time >= at:
+                return segment.base + position
+            offset += RECORD.size + length
+            position += 1
+    return total
+
+
+def _records(parts: List[Tuple[Segment, int]], start: int, stop: int) -> Iterator[Tuple[float, bytes]]:
+    """(time, JSON payload) of records start..stop-1"""
+    if start >= stop:
+        return
+    first = bisect_right([segment.base for segment, _ in parts], start) - 1
+    for segment, count in parts[first:]:
+        if segment.base >= stop:
+            return
+        mm = segment.view()
+        position = start - segment.base if segment.base < start else 0
+        offset = segment.seek(position)
+        end = min(count, stop - segment.base)
+        while position < end:
+            length, _, record_time = RECORD.unpack_from(mm, offset)
+            body = offset + RECORD.size
+            yield record_time, mm[body:body + length]
+            offset = body + length
+            position += 1
+
+
+class TranscriptLog:
+    """Per-interview transcript logs under one directory"""
+
+    def __init__(self, root: str = TRANSCRIPT_DIR, commit_interval: float = COMMIT_INTERVAL_MS / 1000,
+                 compact_delay: float = COMPACT_DELAY_SEC):
+        self.root = root
+        self.commit_interval = commit_interval
+        self.compact_delay = compact_delay
+        self.writers: Dict[str, InterviewLog] = {}
+        self.readers: "OrderedDict[str, InterviewLog]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Sealed segments and released logs: fsynced, then closed, by the next commit
+        self._closing: List[int] = []
+        self._dirty: Set[InterviewLog] = set()
+        self._due: Dict[str, float] = {}
+        self._commit_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._commit_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.commit()
+        with self._lock:
+            writers, self.writers = list(self.writers.values()), {}
+            self.readers.clear()
+        for log in writers:
+            with log.lock:
+                self._release(log)
+        await self.commit()
+
+    def append(self, interview_id: str, entry: Dict[str, Any]) -> Optional[int]:
+        """Log a transcript entry; returns its position, or None if it couldn't be logged
+
+        Returns as soon as the record is written; it is durable after the
+        next commit.
+        """
+        payload = json.dumps(entry, ensure_ascii=False).encode()
+        try:
+            while True:
+                log = self._writer(interview_id)
+                with log.lock:
+                    if not log.closed:
+                        return self._append(log, entry, payload)
+        except BlockingIOError:
+            logger.warning("Transcript log of interview %s is written by another process", interview_id)
+        except OSError:
+            logger.exception("Failed to log transcript entry of interview %s", interview_id)
+        return None
+
+    def _append(self, log: InterviewLog, entry: Dict[str, Any], payload: bytes) -> int:
+        segment = log.active()
+        try:
+            record_time = max(float(entry.get("timestamp") or 0), segment.last_time)
+        except (TypeError, ValueError):
+            record_time = segment.last_time
+        if segment.count % INDEX_EVERY == 0:
+            os.write(segment.index_fd, INDEX.pack(record_time, segment.size))
+            segment.times.append(record_time)
+            segment.offsets.append(segment.size)
+        os.write(segment.fd, RECORD.pack(len(payload), zlib.crc32(payload), record_time) + payload)
+        segment.size += RECORD.size + len(payload)
+        segment.count += 1
+        segment.last_time = record_time
+        log.generation += 1
+        self._dirty.add(log)
+        if segment.size >= SEGMENT_BYTES:
+            self._seal(segment)
+        return segment.base + segment.count - 1
+
+    def _seal(self, segment: Segment):
+        self._closing.extend(fd for fd in (segment.fd, segment.index_fd) if fd is not None)
+        segment.fd = segment.index_fd = None
+
+    def _release(self, log: InterviewLog):
+        """Stop writing `log` (caller holds log.lock); its files close on the next commit"""
+        for segment in log.segments:
+            self._seal(segment)
+        if log.lock_fd is not None:
+            # Nothing to fsync in the lock file, and another writer may want it now
+            os.close(log.lock_fd)
+            log.lock_fd = None
+        log.closed = True
+
+    def _writer(self, interview_id: str) -> InterviewLog:
+        with self._lock:
+            log = self.writers.get(interview_id)
+            if log is not None:
+                return log
+            self.readers.pop(interview_id, None)
+            log = InterviewLog(_log_dir(self.root, interview_id))
+            log.open_writer()
+            self.writers[interview_id] = log
+            return log
+
+    def _reader(self, interview_id: str) -> Optional[InterviewLog]:
+        with self._lock:
+            log = self.writers.get(interview_id)
+            if log is not None:
+                return log
+            log = self.readers.get(interview_id)
+            if log is not None:
+                self.readers.move_to_end(interview_id)
+        if log is not None:
+            with log.lock:
+                log.refresh()
+            return log
+        path = _log_dir(self.root, interview_id)
+        if not os.path.isdir(path):
+            return None
+        log = InterviewLog(path)
+        try:
+            log.load(writable=False)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self.readers[interview_id] = log
+            while len(self.readers) > READERS_CACHE_SIZE:
+                self.readers.popitem(last=False)
+        return log
+
+    def count(self, interview_id: str) -> int:
+        """Number of entries logged for the interview"""
+        log = self._reader(interview_id)
+        if log is None:
+            return 0
+        with log.lock:
+            return log.count
+
+    def last_time(self, interview_id: str) -> float:
+        """Timestamp of the interview's last logged entry (0 without a log)"""
+        log = self._reader(interview_id)
+        if log is None:
+            return 0.0
+        with log.lock:
+            return log.last_time
+
+    def read(self, interview_id: str, window: TranscriptWindow) -> Optional[Page]:
+        """Window of logged entries (total = entries in the time range); None without a log"""
+        log = self._reader(interview_id)
+        if log is None:
+            return None
+        with log.lock:
+            parts = log.parts()
+            total = log.count
+            # Map the segments before letting appends in again
+            for segment, _ in parts:
+                segment.view()
+        if not total:
+            return None
+        lo = _locate(parts, window.start, total) if window.start is not None else 0
+        hi = _locate(parts, window.end, total) if window.end is not None else total
+        hi = max(hi, lo)
+        start = lo + window.offset
+        items = [json.loads(payload) for _, payload in _records(parts, start, min(hi, start + window.limit))]
+        return Page(items, None, hi - lo)
+
+    def entries(self, interview_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Every logged entry of the interview; None without a log"""
+        page = self.read(interview_id, TranscriptWindow(offset=0, limit=self.count(interview_id)))
+        return page.items if page is not None else None
+
+    def finish(self, interview_id: str):
+        """Stop writing the interview's log; it is compacted after the delay"""
+        with self._lock:
+            log = self.writers.pop(interview_id, None)
+        if log is None:
+            return
+        with log.lock:
+            self._release(log)
+        self._due[interview_id] = time.monotonic() + self.compact_delay
+
+    async def commit(self):
+        """fsync everything appended so far: one fsync per file written since the last commit"""
+        if self._commit_lock is None:
+            self._commit_lock = asyncio.Lock()
+        async with self._commit_lock:
+            dirty, self._dirty = self._dirty, set()
+            fds = []
+            for log in dirty:
+                with log.lock:
+                    if not log.closed and log.segments:
+                        last = log.segments[-1]
+                        fds.extend(fd for fd in (last.fd, last.index_fd) if fd is not None)
+            closing, self._closing = self._closing, []
+            if fds or closing:
+                await asyncio.get_running_loop().run_in_executor(None, _sync, fds, closing)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.commit_interval)
+            try:
+                await self.commit()
+                now = time.monotonic()
+                for interview_id in [i for i, due in self._due.items() if due <= now]:
+                    del self._due[interview_id]
+                    async with self._commit_lock:
+                        await loop.run_in_executor(None, self.compact, interview_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Transcript log commit failed, retrying")
+
+    def compact(self, interview_id: str) -> bool:
+        """Rewrite a finished log as one segment of the next epoch
+
+        Returns False if the log is being written (here or by another
+        process) or got an append meanwhile. Must not run concurrently with
+        commit().
+        """
+        path = _log_dir(self.root, interview_id)
+        with self._lock:
+            if interview_id in self.writers or not os.path.isdir(path):
+                return False
+            log = InterviewLog(path)
+            try:
+                log.open_writer()
+            except BlockingIOError:
+                return False
+            # Appends during the rewrite go to this log and cancel the swap
+            self.writers[interview_id] = log
+        with log.lock:
+            generation = log.generation
+            parts = log.parts()
+            for segment, _ in parts:
+                segment.view()
+            epoch = log.epoch + 1
+
+        try:
+            segment, count = _rewrite(parts, os.path.join(log.path, _segment_name(epoch, 0)), epoch)
+        except BaseException:
+            self.finish(interview_id)
+            raise
+
+        with log.lock:
+            if log.generation != generation or log.closed:
+                for name in (segment.index_path, segment.path):
+                    os.unlink(name + ".tmp")
+                return False
+            # The segment rename is the commit point: loading picks the newest epoch
+            os.replace(segment.index_path + ".tmp", segment.index_path)
+            os.replace(segment.path + ".tmp", segment.path)
+            old = log.segments
+            for stale in old:
+                # Superseded, so there is nothing left to fsync
+                for fd in (stale.fd, stale.index_fd):
+                    if fd is not None:
+                        os.close(fd)
+                stale.fd = stale.index_fd = None
+            os.close(log.lock_fd)
+            log.lock_fd = None
+            log.closed = True
+        with self._lock:
+            if self.writers.get(interview_id) is log:
+                del self.writers[interview_id]
+        _fsync_dir(log.path)
+        for stale in old:
+            log._unlink(stale.path)
+        logger.info("Compacted transcript log of interview %s: %d segments into 1, %d entries",
+                    interview_id, len(old), count)
+        return True
+
+
+def _rewrite(parts: List[Tuple[Segment, int]], path: str, epoch: int) -> Tuple[Segment, int]:
+    """Write the records as one segment (`path` + ".tmp", fsynced); returns it and its record count
+
+    Entries logged more than once (same "id") keep their last version, at
+    the position of the first one.
+    """
+    records: List[Tuple[float, bytes]] = []
+    positions: Dict[Any, int] = {}
+    for record_time, payload in _records(parts, 0, parts[-1][0].base + parts[-1][1] if parts else 0):
+        entry_id = json.loads(payload).get("id")
+        if entry_id is not None and entry_id in positions:
+            position = positions[entry_id]
+            records[position] = (records[position][0], payload)
+            continue
+        if entry_id is not None:
+            positions[entry_id] = len(records)
+        records.append((record_time, payload))
+
+    segment = Segment(path, epoch, 0)
+    data, index = [HEADER.pack(MAGIC, VERSION)], []
+    for position, (record_time, payload) in enumerate(records):
+        if position % INDEX_EVERY == 0:
+            index.append(INDEX.pack(record_time, segment.size))
+        data.append(RECORD.pack(len(payload), zlib.crc32(payload), record_time))
+        data.append(payload)
+        segment.size += RECORD.size + len(payload)
+    for name, chunks in ((segment.index_path, index), (segment.path, data)):
+        with open(name + ".tmp", "wb") as f:
+            f.write(b"".join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+    return segment, len(records)
+
+
+def _sync(fds: List[int], closing: List[int]):
+    for fd in fds + closing:
+        try:
+            os.fsync(fd)
+        except OSError:
+            logger.exception("Transcript log fsync failed")
+    for fd in closing:
+        os.close(fd)
+
+
+transcript_log = TranscriptLog()
@@ -1,58 +1,427 @@
 from fastapi import WebSocket, WebSocketDisconnect
 import json
 import asyncio
-from typing import Dict, List
-from .data import MOCK_TRANSCRIPT, MOCK_METRICS
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from .audio import AUDIO_WORKERS, AudioSession, create_transcriber
+from .cache import response_cache
+from .instrumentation import Histogram
+from .metrics import MetricsEngine
+from .pubsub import PubSub, create_pubsub
+from .transcripts import transcript_log
+
+# Per-connection outbox size and what to do when a client can't keep up:
+# "drop" discards the oldest queued message, "disconnect" closes the socket
+SEND_QUEUE_SIZE = int(os.getenv("HARRY_WS_QUEUE_SIZE", "256"))
+SLOW_CLIENT_POLICY = os.getenv("HARRY_WS_SLOW_POLICY", "drop")
+
+# Close code sent to clients dropped for being too slow ("try again later")
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# Sequenced messages kept per interview for `since=` replays, and how long a
+# stream (producer, sequence and buffer) outlives its last subscriber. By
+# default it stops at once; a linger lets a client reconnect after a network
+# blip without losing its place
+REPLAY_BUFFER_SIZE = int(os.getenv("HARRY_WS_REPLAY_SIZE", "1000"))
+STREAM_LINGER_SEC = float(os.getenv("HARRY_WS_LINGER_SEC", "0"))
+
+# Live metrics: changed fields are pushed at most every METRICS_INTERVAL_SEC;
+# every METRICS_KEYFRAME_EVERY-th update is a full snapshot so clients that
+# joined mid-stream converge
+METRICS_INTERVAL_SEC = float(os.getenv("HARRY_METRICS_INTERVAL_SEC", "5"))
+METRICS_KEYFRAME_EVERY = 10
+
+
+class InterviewStream:
+    """Sequence counter and replay ring buffer of one interview"""
 
-class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.last_seq = 0
+        self.buffer: Deque[Tuple[int, str]] = deque(maxlen=REPLAY_BUFFER_SIZE)
+        self.expiry: Optional[asyncio.TimerHandle] = None
+
+    def append(self, seq: int, serialized: str):
+        if seq != self.last_seq + 1:
+            # Producer restarted or messages were lost: replays can't span this
+            self.buffer.clear()
+        self.last_seq = seq
+        self.buffer.append((seq, serialized))
+
+    def replay(self, since: int) -> Optional[List[str]]:
+        """Messages after `since`, or None when the gap is no longer buffered"""
+        if since > self.last_seq:
+            return None
+        if since == self.last_seq:
+            return []
+        if not self.buffer or self.buffer[0][0] > since + 1:
+            return None
+        # Sequence numbers are contiguous, so the gap starts at a known offset
+        start = since + 1 - self.buffer[0][0]
+        return [message for _, message in islice(self.buffer, start, None)]
+
+
+class Subscriber:
+    """One socket with a bounded outbox drained by its own writer task"""
+
+    def __init__(self, websocket: WebSocket, interview_id: str, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.interview_id = interview_id
+        self.manager = manager
+        self.queue: "asyncio.Queue[Tuple[str, float]]" = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.writer = asyncio.create_task(self._drain())
+
+    def offer(self, message: str):
+        """Queue a message without waiting; applies the slow-client policy when full"""
+        try:
+            self.queue.put_nowait((message, time.monotonic()))
+            return
+        except asyncio.QueueFull:
+            pass
+        if SLOW_CLIENT_POLICY == "disconnect":
+            self.manager.slow_disconnects += 1
+            self.manager.disconnect(self.websocket, self.interview_id)
+            asyncio.create_task(self._close(CLOSE_TRY_AGAIN_LATER))
+            return
+        self.queue.get_nowait()
+        self.queue.put_nowait((message, time.monotonic()))
+        self.manager.dropped_messages += 1
 
-    async def connect(self, websocket: WebSocket, interview_id: str):
+    async def _drain(self):
+        manager = self.manager
+        while True:
+            message, queued_at = await self.queue.get()
+            started = time.monotonic()
+            try:
+                await self.websocket.send_text(message)
+            except Exception:
+                # Remove broken connections
+                manager.disconnect(self.websocket, self.interview_id)
+                return
+            finished = time.monotonic()
+            manager.sent_messages += 1
+            manager.send_seconds_total += finished - started
+            manager.send_seconds_max = max(manager.send_seconds_max, finished - started)
+            manager.delivery_seconds_total += finished - queued_at
+            manager.delivery_latency.observe(finished - queued_at)
+
+    async def _close(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def stop(self):
+        self.writer.cancel()
+
+
+class ConnectionManager:
+    def __init__(self, bus: Optional[PubSub] = None):
+        self.active_connections: Dict[str, Dict[WebSocket, Subscriber]] = {}
+        # One producer task per interview across all workers; the bus elects
+        # which worker runs it while any of them has subscribers
+        self.producers: Dict[str, asyncio.Task] = {}
+        self.sequence: Dict[str, int] = {}
+        self.streams: Dict[str, InterviewStream] = {}
+        self.bus = bus if bus is not None else create_pubsub()
+        self.bus.bind(self._deliver, self._on_produce)
+        # Live audio per interview, from the one socket that streams it, and
+        # the bus claim that makes this worker the interview's producer
+        self.audio: Dict[str, AudioSession] = {}
+        self.claims: Dict[str, "asyncio.Task[bool]"] = {}
+        # Interview time where the last audio session ended, so the next one
+        # (e.g. after a reconnect) continues the timeline
+        self.audio_end: Dict[str, float] = {}
+        self.transcriber = create_transcriber()
+        self._audio_pool: Optional[ThreadPoolExecutor] = None
+
+        # Fan-out statistics (see stats())
+        self.sent_messages = 0
+        self.dropped_messages = 0
+        self.slow_disconnects = 0
+        self.send_seconds_total = 0.0
+        self.send_seconds_max = 0.0
+        self.delivery_seconds_total = 0.0
+        # Broadcast latency: from fan-out to the message leaving the socket
+        self.delivery_latency = Histogram()
+
+    async def start(self):
+        await self.bus.start()
+
+    async def close(self):
+        await self.bus.close()
+        for session in self.audio.values():
+            if session.task is not None:
+                # A session has one pool job in flight; cancelling it drops the job if still queued
+                session.task.cancel()
+        if self._audio_pool is not None:
+            self._audio_pool.shutdown(wait=False)
+            self._audio_pool = None
+
+    @property
+    def audio_pool(self) -> ThreadPoolExecutor:
+        if self._audio_pool is None:
+            self._audio_pool = ThreadPoolExecutor(max_workers=AUDIO_WORKERS, thread_name_prefix="audio")
+        return self._audio_pool
+
+    async def connect(self, websocket: WebSocket, interview_id: str, since: Optional[int] = None):
         await websocket.accept()
+        stream = self.streams.get(interview_id)
+        new_stream = stream is None
+        if new_stream:
+            stream = self.streams[interview_id] = InterviewStream()
+        elif stream.expiry is not None:
+            stream.expiry.cancel()
+            stream.expiry = None
+
         if interview_id not in self.active_connections:
-            self.active_connections[interview_id] = []
-        self.active_connections[interview_id].append(websocket)
+            self.active_connections[interview_id] = {}
+        subscriber = Subscriber(websocket, interview_id, self)
+        self.active_connections[interview_id][websocket] = subscriber
+
+        # Replay before any live message can be queued (no await in between)
+        if since is not None:
+            missed = stream.replay(since)
+            if missed is None:
+                subscriber.offer(json.dumps({
+                    "type": "reset",
+                    "data": {"last_seq": stream.last_seq},
+                    "timestamp": time.time()
+                }))
+            else:
+                for message in missed:
+                    subscriber.offer(message)
+
+        if new_stream:
+            await self.bus.subscribe(interview_id)
 
     def disconnect(self, websocket: WebSocket, interview_id: str):
         if interview_id in self.active_connections:
-            self.active_connections[interview_id].remove(websocket)
+            subscriber = self.active_connections[interview_id].pop(websocket, None)
+            if subscriber is not None:
+                subscriber.stop()
             if not self.active_connections[interview_id]:
                 del self.active_connections[interview_id]
+                self._schedule_expiry(interview_id)
+
+    def _schedule_expiry(self, interview_id: str):
+        stream = self.streams.get(interview_id)
+        if stream is None:
+            return
+        if STREAM_LINGER_SEC <= 0:
+            self._expire(interview_id)
+            return
+        loop = asyncio.get_running_loop()
+        stream.expiry = loop.call_later(STREAM_LINGER_SEC, self._expire, interview_id)
+
+    def _expire(self, interview_id: str):
+        if interview_id in self.active_connections:
+            return
+        self.streams.pop(interview_id, None)
+        asyncio.create_task(self.bus.unsubscribe(interview_id))
+
+    def _on_produce(self, interview_id: str, produce: bool, last_seq: int):
+        if produce:
+            self.sequence[interview_id] = last_seq
+            if interview_id not in self.producers and interview_id not in self.audio:
+                self._start_producer(interview_id)
+        else:
+            self._stop_producer(interview_id)
+            self.sequence.pop(interview_id, None)
+
+    def _start_producer(self, interview_id: str):
+        task = asyncio.create_task(self.simulate_interview(interview_id))
+        self.producers[interview_id] = task
+
+        def forget(finished: asyncio.Task):
+            # A later producer may already have replaced this one
+            if self.producers.get(interview_id) is finished:
+                del self.producers[interview_id]
+
+        task.add_done_callback(forget)
+
+    def _stop_producer(self, interview_id: str):
+        task = self.producers.pop(interview_id, None)
+        if task is not None:
+            task.cancel()
+
+    def feed_audio(self, websocket: WebSocket, interview_id: str, data: bytes, sample_rate: int) -> bool:
+        """Buffer a PCM frame; False if another socket is streaming this interview's audio"""
+        session = self.audio.get(interview_id)
+        if session is None:
+            session = self.audio[interview_id] = AudioSession(
+                websocket,
+                partial(self.publish, interview_id),
+                self.audio_pool,
+                self.transcriber,
+                sample_rate=sample_rate,
+                metrics_interval=METRICS_INTERVAL_SEC,
+                keyframe_every=METRICS_KEYFRAME_EVERY,
+                resume_at=partial(self._resume_at, interview_id),
+            )
+            # Live audio replaces the simulated transcript, wherever it runs:
+            # the bus stops the other worker's producer and routes this one's messages
+            self._stop_producer(interview_id)
+            self.claims[interview_id] = asyncio.create_task(self._claim(interview_id, websocket))
+        elif session.source is not websocket:
+            return False
+        session.feed(data)
+        return True
+
+    async def end_audio(self, websocket: WebSocket, interview_id: str):
+        """Flush the audio session `websocket` was streaming, if any"""
+        session = self.audio.get(interview_id)
+        if session is None or session.source is not websocket:
+            return
+        try:
+            await session.close()
+        finally:
+            self.audio_end[interview_id] = session.at(session.vad.frames)
+            del self.audio[interview_id]
+            self.claims.pop(interview_id, None)
+            self.bus.release(interview_id)
+            transcript_log.finish(interview_id)
+
+    def _resume_at(self, interview_id: str) -> float:
+        """Start time of a new audio session; after a restart, the last logged entry"""
+        return max(self.audio_end.get(interview_id, 0.0), transcript_log.last_time(interview_id))
+
+    async def _claim(self, interview_id: str, websocket: WebSocket) -> bool:
+        if await self.bus.claim(interview_id):
+            return True
+        await self.send_personal_message(json.dumps({
+            "type": "error",
+            "data": {"message": "The interview stream is unavailable; audio is not being transcribed"},
+            "timestamp": time.time()
+        }), websocket)
+        return False
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
+        for subscribers in self.active_connections.values():
+            subscriber = subscribers.get(websocket)
+            if subscriber is not None:
+                # Same outbox as broadcasts, so writes to a socket never interleave
+                subscriber.offer(message)
+                return
         await websocket.send_text(message)
 
+    async def publish(self, interview_id: str, message: Dict[str, Any]):
+        """Sequence and serialize a message once and publish it on the bus"""
+        claim = self.claims.get(interview_id)
+        if claim is not None and not await claim:
+            # The bus would drop it; the audio socket has been told
+            return
+        if message.get("type") == "transcript":
+            # Only the producing worker gets here, so each entry is logged once.
+            # The write can block on disk, so it runs off the event loop.
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, transcript_log.append, interview_id, message["data"])
+            # Cached interview details would otherwise miss the new entry
+            response_cache.invalidate(f"interviews:{interview_id}")
+        seq = self.sequence.get(interview_id, 0) + 1
+        self.sequence[interview_id] = seq
+        await self.bus.publish(interview_id, seq, json.dumps({**message, "seq": seq}))
+
+    def _deliver(self, interview_id: str, seq: int, message: str):
+        """Bus callback: buffer a published message and fan it out locally"""
+        stream = self.streams.get(interview_id)
+        if stream is None:
+            return
+        stream.append(seq, message)
+        self._fan_out(message, interview_id)
+
     async def broadcast_to_interview(self, message: str, interview_id: str):
-        if interview_id in self.active_connections:
-            for connection in self.active_connections[interview_id]:
-                try:
-                    await connection.send_text(message)
-                except:
-                    # Remove broken connections
-                    self.active_connections[interview_id].remove(connection)
+        self._fan_out(message, interview_id)
+
+    def _fan_out(self, message: str, interview_id: str):
+        # Only enqueues: each subscriber's writer task sends concurrently, so
+        # a slow client never delays the others. Snapshot, as offer() may
+        # disconnect a subscriber.
+        for subscriber in list(self.active_connections.get(interview_id, {}).values()):
+            subscriber.offer(message)
+
+    def stats(self) -> Dict[str, Any]:
+        """Fan-out counters and current queue depths per interview"""
+        interviews = {}
+        for interview_id, subscribers in self.active_connections.items():
+            depths = [s.queue.qsize() for s in subscribers.values()]
+            interviews[interview_id] = {
+                "connections": len(depths),
+                "queue_depth": sum(depths),
+                "max_queue_depth": max(depths, default=0),
+            }
+        sent = self.sent_messages
+        return {
+            "interviews": interviews,
+            "queue_size": SEND_QUEUE_SIZE,
+            "slow_client_policy": SLOW_CLIENT_POLICY,
+            "sent_messages": sent,
+            "dropped_messages": self.dropped_messages,
+            "slow_disconnects": self.slow_disconnects,
+            "avg_send_seconds": self.send_seconds_total / sent if sent else 0.0,
+            "max_send_seconds": self.send_seconds_max,
+            "avg_delivery_seconds": self.delivery_seconds_total / sent if sent else 0.0,
+            "audio_sessions": len(self.audio),
+        }
 
     async def simulate_interview(self, interview_id: str):
         """Simulate real-time interview transcript and metrics"""
+        from .data import MOCK_TRANSCRIPT
+
+        try:
+            await self._simulate(interview_id, MOCK_TRANSCRIPT)
+        finally:
+            transcript_log.finish(interview_id)
+
+    async def _simulate(self, interview_id: str, transcript: List[Dict[str, Any]]):
         await asyncio.sleep(1)  # Initial delay
-        
+
+        engine = MetricsEngine()
+        loop = asyncio.get_running_loop()
+        last_metrics = loop.time()
+        updates = 0
+
+        # A restarted producer picks up after the entries already logged
+        logged = min(await loop.run_in_executor(None, transcript_log.count, interview_id), len(transcript))
+        for entry in transcript[:logged]:
+            engine.add(entry)
+
         # Send transcript entries
-        for entry in MOCK_TRANSCRIPT:
+        for entry in transcript[logged:]:
             message = {
                 "type": "transcript",
                 "data": entry,
                 "timestamp": entry["timestamp"]
             }
-            await self.broadcast_to_interview(json.dumps(message), interview_id)
+            await self.publish(interview_id, message)
+            engine.add(entry)
+
+            if loop.time() - last_metrics >= METRICS_INTERVAL_SEC:
+                keyframe = updates % METRICS_KEYFRAME_EVERY == 0
+                data = engine.keyframe() if keyframe else engine.delta()
+                if data:
+                    await self.publish(interview_id, {
+                        "type": "metrics",
+                        "data": data,
+                        "delta": not keyframe,
+                        "timestamp": entry["timestamp"]
+                    })
+                    updates += 1
+                last_metrics = loop.time()
             await asyncio.sleep(2)  # Simulate real-time delay
-        
-        # Send final metrics
+
+        # Send final metrics (read from the running aggregates, no rescan)
         await asyncio.sleep(1)
         message = {
             "type": "metrics",
-            "data": MOCK_METRICS,
-            "timestamp": MOCK_TRANSCRIPT[-1]["timestamp"] + 10
+            "data": engine.keyframe(),
+            "delta": False,
+            "timestamp": transcript[-1]["timestamp"] + 10
         }
-        await self.broadcast_to_interview(json.dumps(message), interview_id)
+        await self.publish(interview_id, message)
 
 manager = ConnectionManager()
@@ -0,0 +1,250 @@
+import asyncio
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List, NamedTuple
+
+from app.schemas import Candidate, Interview, InterviewDetail, Report, Vacancy
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Fixed reference time so the same seed always produces the same rows
+EPOCH = datetime(2025, 1, 1)
+BATCH = 10000
+
+FIRST_NAMES = ["Анна", "Иван", "Мария", "Алексей", "Ольга", "Дмитрий", "Елена", "Сергей", "Наталья", "Павел",
+               "Татьяна", "Андрей", "Юлия", "Михаил", "Ксения", "Никита", "Светлана", "Артём", "Дарья", "Егор"]
+LAST_NAMES = ["Петров", "Сидоров", "Козлов", "Волков", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев",
+              "Новиков", "Морозов", "Фёдоров", "Орлов", "Зайцев", "Павлов", "Семёнов", "Голубев", "Виноградов"]
+POSITIONS = {
+    "Frontend Developer": ["React", "TypeScript", "CSS", "JavaScript", "Node.js", "Redux", "Vue", "HTML"],
+    "Backend Developer": ["Python", "Django", "FastAPI", "PostgreSQL", "Redis", "Docker", "SQL", "REST"],
+    "UI/UX Designer": ["Figma", "Sketch", "Adobe XD", "Prototyping", "User Research"],
+    "DevOps Engineer": ["AWS", "Docker", "Kubernetes", "Terraform", "CI/CD", "Git", "Linux"],
+    "Data Engineer": ["Python", "SQL", "Spark", "Airflow", "Kafka", "PostgreSQL"],
+}
+DEPARTMENTS = ["Разработка", "Дизайн", "Инфраструктура", "Данные"]
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Удалённо"]
+
+CANDIDATE_STATUSES = (["new"] * 5) + (["interviewed"] * 3) + ["hired", "rejected"]
+INTERVIEW_STATUSES = (["completed"] * 6) + (["scheduled"] * 2) + ["in_progress", "cancelled"]
+
+TRANSCRIPT_LINES = [
+    ("interviewer", "Расскажите о себе и своем опыте."),
+    ("candidate", "Я работаю разработчиком несколько лет, в основном с React и TypeScript."),
+    ("interviewer", "Какие проекты вам больше всего понравились?"),
+    ("candidate", "Интересный проект на Python и FastAPI с PostgreSQL и Redis."),
+    ("interviewer", "Как вы подходите к оптимизации производительности?"),
+    ("candidate", "Сначала измеряю, потом ищу узкие места, иногда помогает кэширование."),
+]
+
+
+class DatasetSize(NamedTuple):
+    candidates: int
+    interviews: int
+    vacancies: int
+    reports: int
+    transcript_entries: int
+    seed: int
+
+    @property
+    def name(self) -> str:
+        return (f"bench-c{self.candidates}-i{self.interviews}-v{self.vacancies}"
+                f"-r{self.reports}-t{self.transcript_entries}-s{self.seed}.db")
+
+
+def candidate_id(n: int) -> str:
+    return f"bench-c{n}"
+
+
+def interview_id(n: int) -> str:
+    return f"bench-i{n}"
+
+
+def vacancy_id(n: int) -> str:
+    return f"bench-v{n}"
+
+
+def candidates(size: DatasetSize) -> Iterator[Candidate]:
+    rng = random.Random(size.seed)
+    positions = list(POSITIONS)
+    for n in range(size.candidates):
+        position = rng.choice(positions)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        status = rng.choice(CANDIDATE_STATUSES)
+        yield Candidate(
+            id=candidate_id(n),
+            name=f"{first} {last}",
+            email=f"candidate{n}@example.com",
+            phone=f"+7 (999) {n % 1000:03d}-{n // 1000 % 100:02d}-{n % 97:02d}",
+            position=position,
+            experience=rng.randint(0, 12),
+            skills=rng.sample(POSITIONS[position], rng.randint(2, len(POSITIONS[position]))),
+            status=status,
+            created_at=EPOCH + timedelta(minutes=n),
+            interview_id=interview_id(n) if n < size.interviews else None,
+            score=rng.randint(30, 100) if status != "new" else None,
+        )
+
+
+def _transcript(rng: random.Random, entries: int) -> List[dict]:
+    transcript, timestamp = [], 0
+    for n in range(entries):
+        speaker, text = TRANSCRIPT_LINES[n % len(TRANSCRIPT_LINES)]
+        transcript.append({
+            "id": str(n + 1),
+            "speaker": speaker,
+            "text": text,
+            "timestamp": timestamp,
+            "confidence": round(rng.uniform(0.8, 0.99), 2),
+        })
+        timestamp += rng.randint(5, 40)
+    return transcript
+
+
+def interviews(size: DatasetSize) -> Iterator[Interview]:
+    rng = random.Random(size.seed + 1)
+    positions = list(POSITIONS)
+    for n in range(size.interviews):
+        status = rng.choice(INTERVIEW_STATUSES)
+        scheduled_at = EPOCH + timedelta(minutes=n, days=2)
+        completed = status == "completed"
+        fields = dict(
+            id=interview_id(n),
+            candidate_id=candidate_id(n),
+            candidate_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            position=rng.choice(positions),
+            status=status,
+            scheduled_at=scheduled_at,
+            completed_at=scheduled_at + timedelta(hours=1) if completed else None,
+            duration=rng.randint(1800, 5400) if completed else None,
+            score=rng.randint(30, 100) if completed else None,
+            notes="Сгенерировано для нагрузочного теста" if completed else None,
+        )
+        if completed and size.transcript_entries:
+            yield InterviewDetail(**fields, transcript=_transcript(rng, size.transcript_entries), metrics={})
+        else:
+            yield Interview(**fields)
+
+
+def vacancies(size: DatasetSize) -> Iterator[Vacancy]:
+    rng = random.Random(size.seed + 2)
+    positions = list(POSITIONS)
+    for n in range(size.vacancies):
+        position = rng.choice(positions)
+        salary = rng.randint(8, 30) * 10000
+        yield Vacancy(
+            id=vacancy_id(n),
+            title=position,
+            department=rng.choice(DEPARTMENTS),
+            location=rng.choice(CITIES),
+            salary_min=salary,
+            salary_max=salary + 60000,
+            requirements=rng.sample(POSITIONS[position], 3) + [f"{rng.randint(1, 6)}+ лет опыта"],
+            responsibilities=["Разработка новых функций", "Code review"],
+            benefits=["Медицинская страховка", "Гибкий график"],
+            status=rng.choice(["active", "active", "active", "closed", "draft"]),
+            created_at=EPOCH + timedelta(hours=n),
+            applicants_count=rng.randint(0, 200),
+        )
+
+
+def reports(size: DatasetSize) -> Iterator[Report]:
+    rng = random.Random(size.seed + 3)
+    for n in range(size.reports):
+        score = rng.randint(30, 100)
+        yield Report(
+            id=f"bench-r{n}",
+            candidate_id=candidate_id(n),
+            interview_id=interview_id(n),
+            generated_at=EPOCH + timedelta(minutes=n, days=3),
+            summary="Кандидат показал уверенные технические навыки и хорошую коммуникацию.",
+            recommendations=["Пригласить на финальное интервью"],
+            strengths=["Технические навыки", "Коммуникация"],
+            weaknesses=["Мало опыта с высокими нагрузками"],
+            final_score=score,
+            decision="hire" if score >= 75 else "maybe" if score >= 50 else "reject",
+        )
+
+
+def _chunks(items: Iterator, size: int = BATCH) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write(conn: sqlite3.Connection, fn):
+    conn.execute("BEGIN IMMEDIATE")
+    fn()
+    conn.execute("COMMIT")
+
+
+def build(size: DatasetSize, path: str):
+    """Write the dataset into a fresh SQLite database at `path`"""
+    # Imported here: app.storage builds its singleton from HARRY_* variables,
+    # which the runner sets only once the dataset path is known
+    from app.storage import (
+        SQL_UPSERT_CANDIDATE, SQL_UPSERT_VACANCY, _candidate_params, _upsert_interview, _upsert_report,
+        _vacancy_params, migrate,
+    )
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    migrate(conn)
+    for chunk in _chunks(candidates(size)):
+        rows = [_candidate_params(candidate) for candidate in chunk]
+        _write(conn, lambda: conn.executemany(SQL_UPSERT_CANDIDATE, rows))
+    for chunk in _chunks(vacancies(size)):
+        rows = [_vacancy_params(vacancy) for vacancy in chunk]
+        _write(conn, lambda: conn.executemany(SQL_UPSERT_VACANCY, rows))
+    for chunk in _chunks(interviews(size)):
+        _write(conn, lambda: [_upsert_interview(conn, interview) for interview in chunk])
+    for chunk in _chunks(reports(size)):
+        _write(conn, lambda: [_upsert_report(conn, report) for report in chunk])
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    os.replace(tmp_path, path)
+
+
+def ensure(size: DatasetSize, data_dir: str = DATA_DIR) -> str:
+    """Path of the dataset database, generating it on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, size.name)
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        print(f"Generating {size.name} ...", flush=True)
+        build(size, path)
+        print(f"Generated in {time.perf_counter() - started:.1f}s", flush=True)
+    return path
+
+
+def snapshot_name(db_path: str) -> str:
+    return os.path.splitext(db_path)[0] + ".snapshot"
+
+
+def ensure_snapshot(db_path: str, path: str) -> str:
+    """Path of a snapshot of the dataset database, building it on first use"""
+    from app.snapshot import build
+    from app.storage import SQLiteStorage
+
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        print(f"Building {os.path.basename(path)} ...", flush=True)
+        source = SQLiteStorage(db_path)
+        try:
+            asyncio.run(build(source, path))
+        finally:
+            asyncio.run(source.close())
+        print(f"Built in {time.perf_counter() - started:.1f}s", flush=True)
+    return path
@@ -0,0 +1,439 @@
+"""Load benchmark for the HaRry REST and WebSocket API
+
+Examples (from backend/):
+    python -m bench --candidates 10000 --output baseline.json
+    python -m bench --candidates 100000 --mode uvicorn --workers 4 --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .dataset import (
+    DATA_DIR, FIRST_NAMES, LAST_NAMES, POSITIONS, DatasetSize, candidate_id, ensure, ensure_snapshot, interview_id,
+    snapshot_name, vacancy_id,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> path builder; each gets the shared RNG and the dataset size
+Scenario = Callable[[random.Random, DatasetSize], str]
+
+SEARCH_TERMS = FIRST_NAMES + LAST_NAMES + [skill for skills in POSITIONS.values() for skill in skills]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "candidates_list": lambda rng, size: f"/api/candidates?limit=20&page={rng.randint(1, 50)}",
+    "candidates_sorted": lambda rng, size: "/api/candidates?limit=20&sort_by=score&sort_order=desc",
+    "candidates_filtered": lambda rng, size: "/api/candidates?limit=20&status=interviewed&include_total=true",
+    "candidates_search": lambda rng, size: f"/api/candidates?limit=20&search={rng.choice(SEARCH_TERMS)}",
+    "candidate_detail": lambda rng, size: f"/api/candidates/{candidate_id(rng.randrange(size.candidates))}",
+    "interviews_list": lambda rng, size: "/api/interviews?limit=20&status=completed",
+    "interview_detail": lambda rng, size: (
+        f"/api/interviews/{interview_id(rng.randrange(max(size.interviews, 1)))}?include_transcript=false"
+    ),
+    "vacancies_list": lambda rng, size: "/api/vacancies?limit=20",
+    "vacancy_matches": lambda rng, size: f"/api/vacancies/{vacancy_id(rng.randrange(max(size.vacancies, 1)))}/matches",
+    "report_detail": lambda rng, size: f"/api/reports/{candidate_id(rng.randrange(max(size.reports, 1)))}",
+    "analytics": lambda rng, size: "/api/analytics",
+}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p90_ms": ms(percentile(ordered, 0.90)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+def rss_mb(pids: Optional[List[int]] = None) -> Dict[str, float]:
+    """Current and peak resident memory of `pids` (this process by default)"""
+    current = peak = 0.0
+    for pid in pids or ["self"]:
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        current += int(line.split()[1]) / 1024
+                    elif line.startswith("VmHWM:"):
+                        peak += int(line.split()[1]) / 1024
+        except OSError:
+            if pid == "self":
+                # No procfs (macOS): ru_maxrss is the only number available
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"current": round(current, 1), "peak": round(peak, 1)}
+
+
+async def run_http(request: Callable[[str], Awaitable[int]], scenario: Scenario, size: DatasetSize,
+                   requests: int, concurrency: int, seed: int) -> Dict[str, float]:
+    """Closed loop: `concurrency` clients issue `requests` requests in total"""
+    rng = random.Random(seed)
+    paths = [scenario(rng, size) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+
+    async def client(offset: int):
+        nonlocal errors
+        for path in paths[offset::concurrency]:
+            started = time.perf_counter()
+            try:
+                status = await request(path)
+            except Exception:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            if not 200 <= status < 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(offset) for offset in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+class WebSocketStats:
+    """Receive times per message seq across clients of one interview"""
+
+    def __init__(self):
+        self.connect: List[float] = []
+        self.first_message: List[float] = []
+        self.received: Dict[int, List[float]] = {}
+        self.messages = 0
+        self.errors = 0
+
+    def on_message(self, raw: str):
+        self.messages += 1
+        seq = json.loads(raw).get("seq")
+        if seq is not None:
+            self.received.setdefault(seq, []).append(time.perf_counter())
+
+    def summary(self, clients: int, elapsed: float) -> Dict[str, Any]:
+        # Fan-out skew: how much later than the fastest client each client
+        # received the same message
+        skew = [t - min(times) for times in self.received.values() for t in times]
+        return {
+            "clients": clients,
+            "errors": self.errors,
+            "messages": self.messages,
+            "messages_per_sec": round(self.messages / elapsed, 1) if elapsed else 0.0,
+            "connect": summarize(self.connect, 0, elapsed),
+            "first_message": summarize(self.first_message, 0, elapsed),
+            "fanout_skew": summarize(skew, 0, elapsed),
+        }
+
+
+async def asgi_websocket(app, path: str, stats: WebSocketStats, duration: float, client: int):
+    """Drive one WebSocket session against the ASGI app directly"""
+    inbound: asyncio.Queue = asyncio.Queue()
+    accepted = asyncio.Event()
+    started = time.perf_counter()
+    first: List[float] = []
+
+    async def receive():
+        return await inbound.get()
+
+    async def send(message):
+        if message["type"] == "websocket.accept":
+            stats.connect.append(time.perf_counter() - started)
+            accepted.set()
+        elif message["type"] == "websocket.send":
+            if not first:
+                first.append(time.perf_counter() - started)
+            stats.on_message(message.get("text") or message.get("bytes", b"").decode())
+        elif message["type"] == "websocket.close":
+            accepted.set()
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws", "http_version": "1.1",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 10000 + client), "server": ("bench", 80),
+        "subprotocols": [],
+    }
+    await inbound.put({"type": "websocket.connect"})
+    session = asyncio.create_task(app(scope, receive, send))
+    await asyncio.sleep(duration)
+    await inbound.put({"type": "websocket.disconnect", "code": 1000})
+    try:
+        await asyncio.wait_for(session, 5)
+    except Exception:
+        stats.errors += 1
+    stats.first_message += first
+
+
+async def uvicorn_websocket(url: str, stats: WebSocketStats, duration: float):
+    import websockets
+
+    started = time.perf_counter()
+    try:
+        async with websockets.connect(url, max_queue=None) as ws:
+            stats.connect.append(time.perf_counter() - started)
+            first = True
+            deadline = started + duration
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if first:
+                    stats.first_message.append(time.perf_counter() - started)
+                    first = False
+                stats.on_message(raw)
+    except Exception:
+        stats.errors += 1
+
+
+async def run_websocket(open_session: Callable[[str, WebSocketStats, int], Awaitable[None]],
+                        size: DatasetSize, clients: int, interviews: int, duration: float) -> Dict[str, Any]:
+    """`clients` subscribers spread over `interviews` live streams for `duration` seconds"""
+    stats = WebSocketStats()
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        open_session(f"/ws/interviews/{interview_id(n % max(interviews, 1))}", stats, n)
+        for n in range(clients)
+    ))
+    return stats.summary(clients, time.perf_counter() - started)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+async def bench_asgi(args, size: DatasetSize, results: Dict[str, Any]):
+    import httpx
+
+    started = time.perf_counter()
+    from app.main import app
+    await app.router.startup()
+    results["startup_seconds"] = round(time.perf_counter() - started, 3)
+    results["rss_mb"] = {"after_startup": rss_mb()}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def request(path: str) -> int:
+                return (await client.get(path)).status_code
+            await run_scenarios(args, size, request, results)
+
+        if args.ws_clients:
+            async def session(path, stats, n):
+                await asgi_websocket(app, path, stats, args.ws_duration, n)
+            results["websocket"] = await run_websocket(session, size, args.ws_clients, args.ws_interviews, args.ws_duration)
+        results["rss_mb"]["end"] = rss_mb()
+    finally:
+        await app.router.shutdown()
+
+
+async def bench_uvicorn(args, size: DatasetSize, results: Dict[str, Any]):
+    import httpx
+
+    port = _free_port()
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(args.workers), "--log-level", "warning"]
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=os.environ.copy())
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}",
+                                     limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                try:
+                    if (await client.get("/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            results["startup_seconds"] = round(time.perf_counter() - started, 3)
+            pids = lambda: [server.pid] + _children(server.pid)
+            results["rss_mb"] = {"after_startup": rss_mb(pids())}
+
+            async def request(path: str) -> int:
+                return (await client.get(path)).status_code
+            await run_scenarios(args, size, request, results)
+
+        if args.ws_clients:
+            async def session(path, stats, n):
+                await uvicorn_websocket(f"ws://127.0.0.1:{port}{path}", stats, args.ws_duration)
+            results["websocket"] = await run_websocket(session, size, args.ws_clients, args.ws_interviews, args.ws_duration)
+        results["rss_mb"]["end"] = rss_mb(pids())
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def run_scenarios(args, size: DatasetSize, request, results: Dict[str, Any]):
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    results["scenarios"] = {}
+    for index, name in enumerate(names):
+        scenario = SCENARIOS[name]
+        # Warm-up (connection setup, statement caches) isn't measured
+        await run_http(request, scenario, size, min(args.requests, 50), args.concurrency, args.seed + index)
+        summary = await run_http(request, scenario, size, args.requests, args.concurrency, args.seed + index)
+        results["scenarios"][name] = summary
+        print(f"{name:22} {summary['throughput_rps']:>9.1f} rps  p50 {summary['p50_ms']:>8.2f} ms  "
+              f"p99 {summary['p99_ms']:>8.2f} ms  errors {summary['errors']}", flush=True)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print per-scenario changes against `baseline`; return p99 regressions over `threshold` %"""
+    regressions = []
+
+    def change(new: float, old: float) -> float:
+        return (new - old) / old * 100 if old else 0.0
+
+    print("\nAgainst baseline " + baseline.get("meta", {}).get("commit", "?"))
+    for name, new in results.get("scenarios", {}).items():
+        old = baseline.get("scenarios", {}).get(name)
+        if old is None:
+            continue
+        p50, p99 = change(new["p50_ms"], old["p50_ms"]), change(new["p99_ms"], old["p99_ms"])
+        rps = change(new["throughput_rps"], old["throughput_rps"])
+        print(f"{name:22} rps {rps:+7.1f}%  p50 {p50:+7.1f}%  p99 {p99:+7.1f}%")
+        if threshold and p99 > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=10000)
+    parser.add_argument("--interviews", type=int, help="default: candidates / 2")
+    parser.add_argument("--vacancies", type=int, help="default: candidates / 100")
+    parser.add_argument("--reports", type=int, help="default: interviews / 2")
+    parser.add_argument("--transcript-entries", type=int, default=20, help="per completed interview")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mode", choices=("asgi", "uvicorn"), default="asgi",
+                        help="asgi: in-process, no network; uvicorn: local server over TCP")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--requests", type=int, default=2000, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    parser.add_argument("--storage", choices=("sqlite", "snapshot"), default="sqlite",
+                        help="snapshot: serve a snapshot built from the dataset database")
+    parser.add_argument("--ws-clients", type=int, default=100, help="0 skips the WebSocket benchmark")
+    parser.add_argument("--ws-interviews", type=int, default=5, help="live streams the clients spread over")
+    parser.add_argument("--ws-duration", type=float, default=10.0, help="seconds each client stays connected")
+    parser.add_argument("--data-dir", help="where generated datasets are kept (default: bench/data)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--fail-on-regression", type=float, default=0.0, metavar="PCT",
+                        help="exit 1 if any scenario's p99 is more than PCT %% worse than the baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    interviews = args.interviews if args.interviews is not None else args.candidates // 2
+    size = DatasetSize(
+        candidates=args.candidates,
+        interviews=interviews,
+        vacancies=args.vacancies if args.vacancies is not None else max(args.candidates // 100, 1),
+        reports=args.reports if args.reports is not None else interviews // 2,
+        transcript_entries=args.transcript_entries,
+        seed=args.seed,
+    )
+    data_dir = args.data_dir or DATA_DIR
+    db_path = os.path.join(data_dir, size.name)
+    snapshot_path = snapshot_name(db_path)
+
+    # The app reads its configuration at import time (dataset generation
+    # imports it too), so this comes first
+    scratch = tempfile.mkdtemp(prefix="harry-bench-")
+    os.environ.update({
+        "HARRY_STORAGE": args.storage,
+        "HARRY_DB_PATH": db_path,
+        "HARRY_SNAPSHOT_PATH": snapshot_path,
+        "HARRY_NOTIFY_SPOOL": os.path.join(scratch, "notifications.db"),
+        "HARRY_PDF_CACHE_DIR": os.path.join(scratch, "report_cache"),
+        "HARRY_PUBSUB": "unix" if args.mode == "uvicorn" and args.workers > 1 else "memory",
+        "HARRY_PUBSUB_PATH": os.path.join(scratch, "pubsub.sock"),
+    })
+    if args.no_cache:
+        os.environ["HARRY_CACHE_SIZE"] = "0"
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    ensure(size, data_dir)
+    if args.storage == "snapshot":
+        ensure_snapshot(db_path, snapshot_path)
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else 1,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "response_cache": not args.no_cache,
+            "storage": args.storage,
+            "dataset": size._asdict(),
+        },
+    }
+    runner = bench_asgi if args.mode == "asgi" else bench_uvicorn
+    try:
+        asyncio.run(runner(args, size, results))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if "websocket" in results:
+        ws = results["websocket"]
+        print(f"{'websocket':22} {ws['messages_per_sec']:>9.1f} msg/s  connect p99 {ws['connect']['p99_ms']:.2f} ms  "
+              f"fan-out skew p99 {ws['fanout_skew']['p99_ms']:.2f} ms  errors {ws['errors']}")
+    print(f"startup {results['startup_seconds']}s, RSS {results['rss_mb']}")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2, ensure_ascii=False)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.fail_on_regression)
+    if regressions:
+        print("p99 regressions: " + ", ".join(regressions))
+        sys.exit(1)
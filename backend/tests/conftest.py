@@ -0,0 +1,88 @@
+import asyncio
+import os
+import tempfile
+
+# The app builds its singletons from HARRY_* at import time; keep tests off
+# the developer's database, spool and logs
+_TMP = tempfile.mkdtemp(prefix="harry-tests-")
+os.environ.setdefault("HARRY_STORAGE", "memory")
+os.environ.setdefault("HARRY_DB_PATH", os.path.join(_TMP, "harry.db"))
+os.environ.setdefault("HARRY_NOTIFY_SPOOL", os.path.join(_TMP, "notifications.db"))
+os.environ.setdefault("HARRY_NOTIFY_OUTBOX", os.path.join(_TMP, "outbox"))
+os.environ.setdefault("HARRY_TRANSCRIPT_DIR", os.path.join(_TMP, "transcripts"))
+os.environ.setdefault("HARRY_RESUME_DIR", os.path.join(_TMP, "resumes"))
+os.environ.setdefault("HARRY_PDF_CACHE_DIR", os.path.join(_TMP, "report_cache"))
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.data import MOCK_CANDIDATES
+from app.schemas import Candidate, CandidateStatus
+from app.snapshot import build
+from app.storage import MemoryStorage, SnapshotStorage, SQLiteStorage
+
+BACKENDS = ("memory", "sqlite", "snapshot")
+
+SKILLS = ["Python", "Go", "TypeScript", "JavaScript", "PostgreSQL", "Kubernetes", "Node.js"]
+STATUSES = list(CandidateStatus)
+
+
+def extra_candidates(count: int = 40):
+    """Deterministic candidates on top of the mock data, with repeated scores"""
+    started = datetime(2026, 1, 1)
+    return [
+        Candidate(
+            id=f"t{i}",
+            name=f"Тест Кандидатова {i}" if i % 2 else f"Test Candidate {i}",
+            email=f"t{i}@example.com",
+            position="Backend Developer" if i % 3 else "Frontend Developer",
+            experience=i % 7,
+            skills=[SKILLS[i % len(SKILLS)], SKILLS[(i * 3) % len(SKILLS)]],
+            status=STATUSES[i % len(STATUSES)],
+            created_at=started + timedelta(hours=i),
+            score=None if i % 5 == 0 else (i * 7) % 10 * 10,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def run():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def reference(run):
+    """MemoryStorage with the same rows as every `storage`"""
+    memory = MemoryStorage()
+    run(memory.add_candidates(extra_candidates()))
+    return memory
+
+
+@pytest.fixture(params=BACKENDS)
+def storage(request, run, tmp_path):
+    """Each storage backend holding the mock data plus extra_candidates()"""
+    memory = MemoryStorage()
+    run(memory.add_candidates(extra_candidates()))
+    if request.param == "memory":
+        backend = memory
+    elif request.param == "sqlite":
+        backend = SQLiteStorage(str(tmp_path / "harry.db"), pool_size=2)
+        run(backend.open())
+        # The schema migration seeds the mock data; add the rest
+        run(backend.add_candidates(extra_candidates()))
+    else:
+        path = str(tmp_path / "harry.snapshot")
+        run(build(memory, path))
+        backend = SnapshotStorage(path)
+        run(backend.open())
+    yield backend
+    run(backend.close())
+
+
+@pytest.fixture
+def candidate_count():
+    return len(MOCK_CANDIDATES) + len(extra_candidates())
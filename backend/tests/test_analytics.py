@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from app.analytics import Analytics
+from app.schemas import CandidateStatus
+
+from conftest import extra_candidates
+
+NOW = datetime(2026, 3, 15)
+
+
+def month(snapshot, period):
+    return next(point for point in snapshot["series"]["monthly"] if point["period"] == period)
+
+
+def test_hired_series_follows_status_changes():
+    analytics = Analytics()
+    candidates = [c.model_copy(update={"status": CandidateStatus.NEW}) for c in extra_candidates(3)]
+    for candidate in candidates:
+        analytics.observe_candidate(candidate)
+    assert month(analytics.snapshot(NOW), "2026-01") == \
+        {"period": "2026-01", "candidates": 3, "hired": 0, "vacancies": 0, "interviews_completed": 0}
+
+    hired = candidates[1].model_copy(update={"status": CandidateStatus.HIRED})
+    analytics.observe_candidate(hired)
+    analytics.observe_candidate(hired)
+    snapshot = analytics.snapshot(NOW)
+    assert month(snapshot, "2026-01")["hired"] == 1
+    assert month(snapshot, "2026-01")["candidates"] == 3
+    assert snapshot["candidates"]["by_status"]["hired"] == 1
+
+    analytics.observe_candidate(hired.model_copy(update={"status": CandidateStatus.REJECTED}))
+    snapshot = analytics.snapshot(NOW)
+    assert month(snapshot, "2026-01")["hired"] == 0
+    assert snapshot["candidates"]["by_status"] == {"new": 2, "interviewed": 0, "hired": 0, "rejected": 1}
+
+
+def test_restore_keeps_series():
+    analytics = Analytics()
+    for candidate in extra_candidates(12):
+        analytics.observe_candidate(candidate)
+    restored = Analytics()
+    restored.restore(analytics.state(), lambda entity, item_id: None)
+    assert restored.snapshot(NOW) == analytics.snapshot(NOW)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app import main
+from app.analytics import Analytics
+from app.main import app
+from app.matching import CandidateMatcher
+from app.storage import SQLiteStorage
+from app.transcripts import transcript_log
+
+from conftest import extra_candidates
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/api/candidates", "/api/interviews", "/api/vacancies"])
+@pytest.mark.parametrize("limit", [0, -1, 101])
+def test_list_limit_out_of_range(client, path, limit):
+    assert client.get(path, params={"limit": limit}).status_code == 422
+
+
+@pytest.mark.parametrize("path", ["/api/candidates", "/api/interviews", "/api/vacancies"])
+def test_list_limit_bounds(client, path):
+    for limit in (1, 100):
+        response = client.get(path, params={"limit": limit})
+        assert response.status_code == 200
+        assert len(response.json()["data"]) <= limit
+
+
+def test_websocket_rejects_unknown_interview(client):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/ws/interviews/77"):
+            pass
+    assert closed.value.code == 1008
+    assert transcript_log.count("77") == 0
+
+
+def test_transcript_of_unknown_interview(client):
+    # Even with a log on disk for the id
+    transcript_log.append("78", {"id": "1", "text": "x", "timestamp": 1})
+    assert client.get("/api/interviews/78/transcript").status_code == 404
+    assert client.get("/api/interviews/78/transcript/stream").status_code == 404
+
+
+def test_transcript_served_from_log(client):
+    logged = [{"id": str(i), "speaker": "candidate", "text": f"реплика {i}", "timestamp": i} for i in range(30)]
+    for entry in logged:
+        transcript_log.append("3", entry)
+
+    response = client.get("/api/interviews/3/transcript", params={"start": 10, "end": 20, "limit": 5}).json()
+    assert response["total"] == 10
+    assert response["data"] == logged[10:15]
+    lines = client.get("/api/interviews/3/transcript/stream").text.splitlines()
+    assert [json.loads(line) for line in lines] == logged
+    assert client.get("/api/interviews/3").json()["data"]["transcript"] == logged
+
+
+def test_report_pdf_is_cached(client):
+    response = client.get("/api/reports/1/pdf")
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    etag = response.headers["etag"]
+    assert client.get("/api/reports/1/pdf", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/reports/missing/pdf").status_code == 404
+
+
+def test_reload_after_other_workers_write(run, tmp_path, monkeypatch):
+    path = str(tmp_path / "harry.db")
+    ours, other = SQLiteStorage(path, pool_size=2), SQLiteStorage(path, pool_size=2)
+    monkeypatch.setattr(main, "storage", ours)
+    monkeypatch.setattr(main, "matcher", CandidateMatcher())
+    monkeypatch.setattr(main, "analytics", Analytics())
+    candidate = extra_candidates(1)[0].model_copy(update={"skills": ["React", "TypeScript"]})
+
+    async def scenario():
+        monkeypatch.setattr(main, "reload_lock", asyncio.Lock())
+        await ours.changed_elsewhere()
+        await main.load_derived()
+        total = main.analytics.snapshot()["candidates"]["total"]
+
+        await other.add_candidate(candidate)
+        await main.sync_derived()
+        assert main.analytics.snapshot()["candidates"]["total"] == total + 1
+        assert candidate.id in main.matcher.candidate_row
+        # The reload stored the new candidate's score for every worker
+        assert (await other.get_candidate(candidate.id)).match_percentage is not None
+
+        # Nothing new: no reload
+        monkeypatch.setattr(main, "load_derived", None)
+        await main.sync_derived()
+
+    try:
+        run(scenario())
+    finally:
+        run(ours.close())
+        run(other.close())
+
+
+def test_candidate_view(client):
+    view = client.get("/api/candidates/1/view").json()["data"]
+    assert view["candidate"] == client.get("/api/candidates/1").json()["data"]
+    assert view["interview"] == client.get("/api/interviews/1", params={"include_transcript": False}).json()["data"]
+    assert view["interview"]["transcript"] is None
+    assert view["report"] == client.get("/api/reports/1").json()["data"]
+
+    with_transcript = client.get("/api/candidates/1/view", params={"include_transcript": True}).json()["data"]
+    assert with_transcript["interview"] == client.get("/api/interviews/1").json()["data"]
+
+    # Candidate 2 has neither an interview nor a report
+    assert client.get("/api/candidates/2/view").json()["data"] == {
+        "candidate": client.get("/api/candidates/2").json()["data"], "interview": None, "report": None,
+    }
+    partial = client.get("/api/candidates/3/view", params={"fields": "report"}).json()["data"]
+    assert partial == {"candidate": None, "interview": None, "report": client.get("/api/reports/3").json()["data"]}
+    assert client.get("/api/candidates/missing/view").status_code == 404
+    assert client.get("/api/candidates/1/view", params={"fields": "candidate,salary"}).status_code == 400
+
+
+def test_candidate_views_batch(client):
+    views = client.get("/api/candidates/view", params={"ids": "3, 1,missing,3", "fields": "candidate"}).json()["data"]
+    assert [view["candidate"]["id"] for view in views] == ["3", "1"]
+    assert all(view["interview"] is None and view["report"] is None for view in views)
+    ids = ",".join(str(i) for i in range(main.VIEW_MAX_IDS + 1))
+    assert client.get("/api/candidates/view", params={"ids": ids}).status_code == 400
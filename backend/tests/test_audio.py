@@ -0,0 +1,199 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.audio import FRAME_MS, AudioSession, RingBuffer, StubTranscriber, VoiceActivity, detect_voice
+from app.main import app
+from app.transcripts import TranscriptLog, transcript_log
+from app.websocket import manager
+
+RATE = 16000
+
+
+def test_ring_buffer_wraparound():
+    ring = RingBuffer(8)
+    ring.write(np.arange(5, dtype=np.int16))
+    assert (ring.written, ring.oldest) == (5, 0)
+    ring.write(np.arange(5, 11, dtype=np.int16))
+    assert (ring.written, ring.oldest) == (11, 3)
+    assert ring.read(3, 11).tolist() == list(range(3, 11))
+    # Reads are clipped to what is still buffered
+    assert ring.read(0, 5).tolist() == [3, 4]
+    assert ring.read(9, 20).tolist() == [9, 10]
+    assert ring.read(0, 2).tolist() == []
+
+    # More than the whole ring at once keeps only the newest samples
+    ring.write(np.arange(11, 31, dtype=np.int16))
+    assert (ring.written, ring.oldest) == (31, 23)
+    assert ring.read(0, 31).tolist() == list(range(23, 31))
+
+
+def test_ring_buffer_matches_a_flat_stream():
+    rng = random.Random(4)
+    ring, stream = RingBuffer(100), []
+    for _ in range(200):
+        chunk = [rng.randint(-1000, 1000) for _ in range(rng.randint(0, 130))]
+        ring.write(np.array(chunk, dtype=np.int16))
+        stream += chunk
+        start = rng.randint(0, len(stream))
+        end = rng.randint(start, len(stream) + 10)
+        assert ring.read(start, end).tolist() == stream[max(start, len(stream) - 100):end]
+
+
+def tone(seconds, amplitude):
+    count = int(seconds * RATE)
+    return (amplitude * 32767 * np.sin(np.arange(count) * 2 * np.pi * 440 / RATE)).astype(np.int16)
+
+
+def test_detect_voice():
+    frame = RATE * FRAME_MS // 1000
+    samples = np.concatenate([
+        np.zeros(frame, dtype=np.int16),
+        tone(FRAME_MS / 1000, 0.3),       # about -13 dBFS
+        tone(FRAME_MS / 1000, 0.001),     # about -63 dBFS
+        tone(FRAME_MS / 1000, 0.3)[:frame // 2],
+    ])
+    assert detect_voice(samples, frame).tolist() == [False, True, False]
+    assert detect_voice(samples, frame, threshold_db=-70).tolist() == [False, True, True]
+
+
+def flags(pattern):
+    return np.array([c == "#" for c in pattern], dtype=bool)
+
+
+def test_voice_activity_transitions():
+    vad = VoiceActivity(min_pause=3, max_window=100)
+    # A 2-frame gap is bridged; the 4-frame one ends the window and is a pause
+    assert vad.update(flags("##..##....###")) == [(0, 6)]
+    assert (vad.pauses, vad.pause_frames, vad.speech_frames) == (1, 4, 7)
+    # The window closes once the trailing silence reaches min_pause
+    assert vad.update(flags("..")) == []
+    assert vad.update(flags(".")) == [(10, 13)]
+    assert vad.update(flags(".....#")) == []
+    assert vad.finish() == [(21, 22)]
+    assert (vad.frames, vad.pauses, vad.longest_pause) == (22, 2, 8)
+
+
+def test_voice_activity_chunking_is_transparent():
+    rng = random.Random(9)
+    voiced = np.array([rng.random() < 0.6 for _ in range(2000)], dtype=bool)
+    # Long runs of silence and speech
+    voiced = np.repeat(voiced[::10], 10)
+    whole = VoiceActivity(min_pause=4, max_window=10_000)
+    expected = whole.update(voiced) + whole.finish()
+    chunked = VoiceActivity(min_pause=4, max_window=10_000)
+    windows, position = [], 0
+    while position < len(voiced):
+        size = rng.randint(1, 40)
+        windows += chunked.update(voiced[position:position + size])
+        position += size
+    windows += chunked.finish()
+    assert windows == expected
+    assert (chunked.speech_frames, chunked.pause_frames, chunked.pauses) == \
+        (whole.speech_frames, whole.pause_frames, whole.pauses)
+
+
+def test_voice_activity_caps_windows_and_skips_lost_audio():
+    vad = VoiceActivity(min_pause=3, max_window=5)
+    assert vad.update(flags("####")) == []
+    assert vad.update(flags("###")) == [(0, 7)]
+    assert vad.update(flags("##")) == []
+    # Lost audio closes the open window and isn't counted as a pause
+    assert vad.skip(50) == [(7, 9)]
+    assert vad.update(flags("##...")) == [(59, 61)]
+    assert (vad.frames, vad.pauses) == (64, 0)
+
+
+def speech(*parts):
+    """PCM bytes of alternating (speech seconds, silence seconds)"""
+    chunks = []
+    for i, seconds in enumerate(parts):
+        chunks.append(tone(seconds, 0.3) if i % 2 == 0 else np.zeros(int(seconds * RATE), dtype=np.int16))
+    return np.concatenate(chunks).astype("<i2").tobytes()
+
+
+def test_sessions_continue_the_interview(run, tmp_path):
+    log = TranscriptLog(str(tmp_path), compact_delay=0)
+    published = []
+
+    async def publish(message):
+        published.append(message)
+        if message["type"] == "transcript":
+            log.append("9", message["data"])
+
+    async def stream(pool, audio):
+        session = AudioSession(object(), publish, pool, StubTranscriber(), RATE,
+                               resume_at=partial(log.last_time, "9"))
+        for i in range(0, len(audio), 3200):
+            session.feed(audio[i:i + 3200])
+            await asyncio.sleep(0)
+        await session.close()
+
+    async def scenario():
+        with ThreadPoolExecutor(2) as pool:
+            # A second session for the same interview, e.g. after a restart:
+            # it picks up at the last logged entry
+            await stream(pool, speech(1.0, 1.0, 0.6, 0.5))
+            first = len(published)
+            await stream(pool, speech(0.9, 0.6))
+        return first
+
+    first = run(scenario())
+    transcript = [m["data"] for m in published if m["type"] == "transcript"]
+    windows = [m["data"] for m in published if m["type"] == "speaking_window"]
+    assert len(transcript) == len(windows) == 3
+    assert [w["start"] for w in windows] == pytest.approx([0.0, 2.0, 2.0], abs=0.1)
+    assert [w["duration"] for w in windows] == pytest.approx([1.0, 0.6, 0.9], abs=0.1)
+    metrics = [m for m in published[first:] if m["type"] == "metrics"]
+    assert metrics[-1]["timestamp"] >= windows[-1]["end"]
+
+    log.finish("9")
+    assert log.compact("9")
+    logged = log.entries("9")
+    assert logged == transcript
+    assert len({entry["id"] for entry in logged}) == 3
+    times = [entry["timestamp"] for entry in logged]
+    assert times == sorted(times)
+    run(log.close())
+
+
+def test_rejects_unsupported_sample_rate():
+    with TestClient(app) as client:
+        for rate in (4000, 96000):
+            with pytest.raises(WebSocketDisconnect) as closed:
+                with client.websocket_connect(f"/ws/interviews/1?sample_rate={rate}"):
+                    pass
+            assert closed.value.code == 1003
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_reconnected_audio_keeps_earlier_entries():
+    with TestClient(app) as client:
+        # Other tests may have logged this interview already
+        logged = transcript_log.last_time("3")
+        for audio in (speech(1.0, 1.0, 0.6, 0.5), speech(0.9, 0.6)):
+            ended = manager.audio_end.get("3")
+            with client.websocket_connect("/ws/interviews/3?sample_rate=16000") as websocket:
+                for i in range(0, len(audio), 3200):
+                    websocket.send_bytes(audio[i:i + 3200])
+            # The server flushes the session after the socket is gone
+            wait_for(lambda: manager.audio_end.get("3") != ended)
+        entries = [e for e in transcript_log.entries("3") if e["id"].startswith("audio-")]
+    assert len({entry["id"] for entry in entries}) == len(entries) == 3
+    times = [entry["timestamp"] for entry in entries]
+    assert times[0] >= logged
+    # The second session starts where the first one's audio ended
+    assert [t - times[0] for t in times] == pytest.approx([0.0, 2.0, 3.1], abs=0.1)
@@ -0,0 +1,132 @@
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.bulk import ImportReport, RowError, build_model, export_lines, read_rows, validate_batch
+from app.main import app
+from app.schemas import Candidate
+
+from conftest import extra_candidates
+
+
+async def items_of(models):
+    for model in models:
+        await asyncio.sleep(0)
+        yield model
+
+
+def export(run, models, format, batch=1000):
+    async def collect():
+        return [chunk async for chunk in export_lines(items_of(models), Candidate, format, batch)]
+    return run(collect())
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_export_import_round_trip(run, format):
+    candidates = extra_candidates(25)
+    candidates[3] = candidates[3].model_copy(update={"skills": ["C++", "Go; Rust", "\"quoted\""], "phone": "+7 900"})
+    text = "".join(export(run, candidates, format))
+    rows = list(read_rows(io.BytesIO(text.encode()), format))
+    assert [build_model(Candidate, raw) for _, raw in rows] == \
+        [c.model_copy(update={"match_percentage": None}) for c in candidates]
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_export_is_chunked(run, format):
+    chunks = export(run, extra_candidates(10), format, batch=4)
+    # Header goes out with the first chunk; then one chunk per 4 rows
+    assert [chunk.count("\n") for chunk in chunks] == ([5, 4, 2] if format == "csv" else [4, 4, 2])
+
+
+def test_match_percentage_is_not_imported():
+    raw = json.loads(extra_candidates(1)[0].model_dump_json())
+    raw["match_percentage"] = 99
+    assert build_model(Candidate, raw).match_percentage is None
+
+
+def test_malformed_ndjson_rows():
+    good = extra_candidates(4)
+    lines = [good[0].model_dump_json(), "{not json", "", good[1].model_dump_json(), "[1, 2]",
+             json.dumps({"name": "Без почты"}, ensure_ascii=False), good[2].model_dump_json()]
+    rows = read_rows(io.BytesIO("\n".join(lines).encode()), "ndjson")
+
+    models, errors, done = validate_batch(rows, Candidate, size=4)
+    assert [m.id for m in models] == [good[0].id, good[1].id]
+    assert not done
+    # Line numbers count blank lines too
+    assert [error.row for error in errors] == [2, 5]
+    assert errors[0].errors[0]["message"].startswith("Invalid JSON")
+    assert errors[1].errors == [{"field": "", "message": "Row must be an object"}]
+
+    models, errors, done = validate_batch(rows, Candidate, size=4)
+    assert [m.id for m in models] == [good[2].id]
+    assert done
+    assert errors[0].row == 6
+    assert {error["field"] for error in errors[0].errors} >= {"email", "position", "experience", "skills"}
+
+
+def test_csv_cells():
+    text = "name,email,position,experience,skills,score\n" \
+           "Анна,anna@example.com,Dev,3,Python; Go ,\n" \
+           "Борис,boris@example.com,Dev,x,\"[\"\"SQL\"\"]\",50\n"
+    rows = list(read_rows(io.BytesIO(text.encode("utf-8-sig")), "csv"))
+    anna = build_model(Candidate, rows[0][1])
+    assert anna.skills == ["Python", "Go"]
+    assert anna.score is None
+    with pytest.raises(ValueError) as failed:
+        build_model(Candidate, rows[1][1])
+    assert rows[1][0] == 3
+    assert "experience" in str(failed.value)
+
+
+def test_report_keeps_first_errors():
+    report = ImportReport(max_errors=3)
+    report.add(5, [])
+    report.add(2, [RowError(i, []) for i in range(2)])
+    report.add(0, [RowError(i, []) for i in range(2, 6)])
+    summary = report.summary()
+    assert (summary["imported"], summary["failed"], len(summary["errors"])) == (7, 6, 3)
+    assert summary["errors_truncated"]
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_import_commits_valid_rows(client):
+    candidates = [c.model_copy(update={"id": f"bulk{i}"}) for i, c in enumerate(extra_candidates(3))]
+    body = "\n".join([candidates[0].model_dump_json(), "{oops", candidates[1].model_dump_json(),
+                      json.dumps({"id": "bulk-bad", "experience": "many"}), candidates[2].model_dump_json()])
+    response = client.post("/api/candidates/import", files={"file": ("candidates.ndjson", body.encode())})
+    assert response.status_code == 200
+    summary = response.json()["data"]
+    assert (summary["imported"], summary["failed"]) == (3, 2)
+    assert [error["row"] for error in summary["errors"]] == [2, 4]
+    for candidate in candidates:
+        stored = client.get(f"/api/candidates/{candidate.id}").json()["data"]
+        assert stored["name"] == candidate.name
+    assert client.get("/api/candidates/bulk-bad").status_code == 404
+
+
+def test_import_rejects_bad_encoding_and_format(client):
+    response = client.post("/api/candidates/import", files={"file": ("c.ndjson", b"\xff\xfe{}")})
+    assert response.status_code == 400
+    response = client.post("/api/candidates/import", files={"file": ("c.xml", b"<x/>")})
+    assert response.status_code == 415
+
+
+def test_streamed_export(client):
+    response = client.get("/api/candidates/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="candidates.csv"' in response.headers["content-disposition"]
+    exported = list(csv.DictReader(io.StringIO(response.text)))
+    listed = client.get("/api/candidates/export").text.splitlines()
+    assert [row["id"] for row in exported] == [json.loads(line)["id"] for line in listed]
+    assert len(exported) >= 4
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app import cache
+from app.cache import ResponseCache, ResponseCacheMiddleware, cache_key, route_tag
+from app.main import app, manager
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_route_tags_and_keys():
+    assert route_tag("/api/candidates") == "candidates"
+    assert route_tag("/api/interviews/7") == "interviews:7"
+    assert route_tag("/api/reports/3") == "reports:3"
+    # Streamed and multi-candidate responses are never cached
+    assert route_tag("/api/candidates/export") is None
+    assert route_tag("/api/candidates/view") is None
+    assert route_tag("/api/interviews/7/transcript") is None
+    assert cache_key("/api/candidates", b"b=2&a=1") == cache_key("/api/candidates", b"a=1&b=2")
+
+
+def test_lru_eviction(clock):
+    responses = ResponseCache(max_entries=2, ttl=10)
+    responses.put("a", "x", b"1", [])
+    responses.put("b", "x", b"2", [])
+    assert responses.get("a") is not None
+    responses.put("c", "y", b"3", [])
+    # "b" was least recently used
+    assert responses.get("b") is None
+    assert [key for key in responses.entries] == ["a", "c"]
+    assert responses.stats()["evictions"] == 1
+
+
+def test_byte_budget(clock):
+    responses = ResponseCache(max_entries=100, ttl=10, max_bytes=10)
+    responses.put("a", "x", b"1234", [])
+    responses.put("b", "x", b"5678", [])
+    responses.put("c", "x", b"90ab", [])
+    assert list(responses.entries) == ["b", "c"]
+    assert responses.size == 8
+    # Too large to keep at all, but still served once
+    entry = responses.put("d", "x", b"x" * 11, [])
+    assert entry.body == b"x" * 11
+    assert "d" not in responses.entries
+    assert responses.size == 8
+    responses.invalidate("x")
+    assert responses.size == 0 and not responses.entries
+
+
+def test_ttl_expiry(clock):
+    responses = ResponseCache(max_entries=10, ttl=5)
+    responses.put("a", "x", b"1", [])
+    clock.now += 4.9
+    assert responses.get("a") is not None
+    clock.now += 0.2
+    assert responses.get("a") is None
+    assert responses.stats() == {"entries": 0, "bytes": 0, "hits": 1, "misses": 1, "evictions": 0}
+    assert responses.tags == {}
+
+
+def test_tag_invalidation(clock):
+    responses = ResponseCache(max_entries=10, ttl=10)
+    responses.put("list?a", "candidates", b"1", [])
+    responses.put("list?b", "candidates", b"2", [])
+    responses.put("one", "candidates:1", b"3", [])
+    responses.put("other", "vacancies", b"4", [])
+    responses.invalidate("candidates", "candidates:1", "unknown")
+    assert list(responses.entries) == ["other"]
+    assert responses.size == 1
+
+
+@pytest.fixture
+def counted():
+    """A cached route that counts how often it really runs"""
+    inner = FastAPI()
+    inner.add_middleware(ResponseCacheMiddleware, cache=ResponseCache(max_entries=10, ttl=10))
+    calls = []
+
+    @inner.get("/api/candidates/{candidate_id}")
+    async def candidate(candidate_id: str, response: Response):
+        calls.append(candidate_id)
+        response.headers["x-harry-version"] = str(len(calls))
+        return {"id": candidate_id}
+
+    with TestClient(inner) as client:
+        yield client, calls
+
+
+def test_etag_and_not_modified(counted):
+    client, calls = counted
+    first = client.get("/api/candidates/1")
+    again = client.get("/api/candidates/1")
+    assert calls == ["1"]
+    assert first.json() == again.json() == {"id": "1"}
+    etag = first.headers["etag"]
+    assert again.headers["etag"] == etag
+    assert first.headers["cache-control"] == "no-cache"
+    # The route's own headers survive both the miss and the hit
+    assert first.headers["x-harry-version"] == again.headers["x-harry-version"] == "1"
+    assert again.headers["content-type"] == "application/json"
+
+    unchanged = client.get("/api/candidates/1", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["etag"] == etag
+    assert unchanged.headers["x-harry-version"] == "1"
+    assert client.get("/api/candidates/1", headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert calls == ["1"]
+
+
+def test_transcript_entry_invalidates_interview(monkeypatch):
+    entry = {"id": "cache-1", "speaker": "candidate", "text": "новая реплика", "timestamp": 1}
+
+    async def one_entry(interview_id):
+        await manager.publish(interview_id, {"type": "transcript", "data": entry})
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(manager, "simulate_interview", one_entry)
+    with TestClient(app) as client:
+        # Cached before the interview has any transcript
+        assert "transcript" not in client.get("/api/interviews/2").json()["data"]
+        with client.websocket_connect("/ws/interviews/2") as ws:
+            assert ws.receive_json()["data"] == entry
+        assert client.get("/api/interviews/2").json()["data"]["transcript"][-1] == entry
@@ -0,0 +1,70 @@
+from datetime import timedelta, timezone
+
+from app.columnar import CandidateTable
+from app.data import MOCK_CANDIDATES
+
+from conftest import extra_candidates
+
+
+def table_of(candidates):
+    table = CandidateTable()
+    for candidate in candidates:
+        table.put(candidate)
+    return table
+
+
+def test_rows_round_trip():
+    candidates = MOCK_CANDIDATES + extra_candidates()
+    table = table_of(candidates)
+    assert len(table) == len(candidates)
+    assert list(table) == [c.id for c in candidates]
+    for candidate in candidates:
+        assert candidate.id in table
+        assert table[candidate.id] == candidate
+        assert table[candidate.id].model_dump_json() == candidate.model_dump_json()
+    assert "missing" not in table
+    assert table.get("missing") is None
+
+
+def test_overwrite_keeps_row_and_skills():
+    candidates = extra_candidates(3)
+    table = table_of(candidates)
+    grown = candidates[1].model_copy(update={"skills": ["Rust", "Go", "C", "Zig"], "score": None, "status": "hired"})
+    shrunk = candidates[2].model_copy(update={"skills": []})
+    table.put(grown)
+    table.put(shrunk)
+    assert len(table) == 3
+    assert [table[c.id] for c in candidates] == [candidates[0], grown, shrunk]
+    assert table.has_status(grown.id, "hired")
+    assert not table.has_status(grown.id, candidates[1].status)
+    assert not table.has_status("missing", "hired")
+
+
+def test_skill_compaction():
+    candidates = extra_candidates(10)
+    table = table_of(candidates)
+    for i in range(500):
+        for candidate in candidates:
+            skills = [f"skill {i} {j}" for j in range(i % 5)]
+            table.put(candidate.model_copy(update={"skills": skills}))
+    # Without compaction the superseded spans would add up to ~10k codes
+    assert len(table.skill_codes) < 3000
+    for candidate in candidates:
+        assert table[candidate.id].skills == [f"skill 499 {j}" for j in range(4)]
+
+
+def test_many_timezones():
+    # Well past the 256 codes a byte-sized column holds
+    candidates = [
+        candidate.model_copy(update={
+            "id": f"tz{i}",
+            "created_at": candidate.created_at.replace(tzinfo=timezone(timedelta(minutes=i - 500))),
+        })
+        for i, candidate in enumerate(extra_candidates(1) * 1000)
+    ]
+    naive = extra_candidates(1)[0]
+    table = table_of(candidates + [naive])
+    assert len(table.timezones) == 1001
+    for candidate in candidates + [naive]:
+        assert table[candidate.id].created_at == candidate.created_at
+        assert table[candidate.id].created_at.tzinfo == candidate.created_at.tzinfo
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_serializer
+
+from app.instrumentation import (
+    PROMETHEUS_CONTENT_TYPE, Histogram, HttpMetrics, InstrumentationMiddleware, SlowRequestProfiler,
+    render_histograms,
+)
+from app.main import app
+from app.responses import ModelResponse
+
+HANDLER_SEC = 0.01
+SERIALIZATION_SEC = 0.06
+
+
+class Slow(BaseModel):
+    value: str
+
+    @field_serializer("value")
+    def slowly(self, value: str) -> str:
+        time.sleep(SERIALIZATION_SEC)
+        return value
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def instrumented(profiler=None):
+    inner = FastAPI()
+    metrics = HttpMetrics()
+    inner.add_middleware(InstrumentationMiddleware, metrics=metrics, profiler=profiler)
+
+    @inner.get("/api/items/{item_id}")
+    async def item(item_id: str):
+        await asyncio.sleep(HANDLER_SEC)
+        return ModelResponse(Slow(value=item_id))
+
+    @inner.get("/api/slow")
+    def slow():
+        spin(0.1)
+        return {"ok": True}
+
+    @inner.get("/api/fast")
+    def fast():
+        return {"ok": True}
+
+    return inner, metrics
+
+
+def test_histogram_rendering():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert render_histograms("t_seconds", "Test", [({"route": "/a"}, histogram)]) == [
+        "# HELP t_seconds Test",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{route="/a",le="0.1"} 2',
+        't_seconds_bucket{route="/a",le="1.0"} 3',
+        't_seconds_bucket{route="/a",le="+Inf"} 4',
+        't_seconds_sum{route="/a"} 3.65',
+        't_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_serialization_is_timed_apart_from_the_handler():
+    inner, metrics = instrumented()
+    with TestClient(inner) as client:
+        for item_id in ("1", "2"):
+            assert client.get(f"/api/items/{item_id}").json() == {"value": item_id}
+        assert client.get("/api/missing").status_code == 404
+
+    key = ("GET", "/api/items/{item_id}")
+    # Ids share the route template's series
+    assert list(metrics.handler) == [key, ("GET", "unmatched")]
+    serialization, handler = metrics.serialization[key], metrics.handler[key]
+    total = metrics.duration[key + ("200",)]
+    assert serialization.count == handler.count == total.count == 2
+    assert serialization.sum >= 2 * SERIALIZATION_SEC
+    assert 2 * HANDLER_SEC <= handler.sum < 2 * SERIALIZATION_SEC
+    assert total.sum >= serialization.sum + handler.sum - 0.001
+    assert metrics.response_size[key].sum == 2 * len(b'{"value":"1"}')
+    assert ("GET", "unmatched", "404") in metrics.duration
+
+
+def test_metrics_endpoint():
+    with TestClient(app) as client:
+        client.get("/api/candidates", params={"limit": 3})
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(PROMETHEUS_CONTENT_TYPE)
+    lines = response.text.splitlines()
+    # Other tests share the app's metrics, so only the series is certain
+    assert any(line.startswith('harry_http_request_duration_seconds_count{method="GET",route="/api/candidates",status="200"}')
+               for line in lines)
+    for name in ("harry_http_handler_duration_seconds", "harry_http_serialization_duration_seconds",
+                 "harry_http_response_size_bytes", "harry_ws_sent_messages_total",
+                 "harry_response_cache_hits_total", "harry_notification_jobs"):
+        assert f"# TYPE {name} " in response.text
+    # Every sample line is "name{labels} value"
+    for line in lines:
+        if line and not line.startswith("#"):
+            float(line.rsplit(" ", 1)[1].replace("+Inf", "inf"))
+
+
+def test_slow_requests_are_profiled(tmp_path):
+    profiler = SlowRequestProfiler(threshold_sec=0.05, interval_sec=0.002, out_dir=str(tmp_path))
+    inner, _ = instrumented(profiler)
+    try:
+        with TestClient(inner) as client:
+            client.get("/api/fast")
+            assert os.listdir(tmp_path) == []
+            client.get("/api/slow")
+    finally:
+        profiler.close()
+
+    dump, = os.listdir(tmp_path)
+    assert "GET_api_slow" in dump and dump.endswith(".folded")
+    assert profiler.dumps == 1
+    with open(tmp_path / dump) as folded:
+        stacks = [line.rsplit(" ", 1) for line in folded.read().splitlines()]
+    assert all(int(count) > 0 for _, count in stacks)
+    # The busy handler shows up at the top of a sampled stack
+    assert any(stack.split(";")[-1].startswith("spin (test_instrumentation.py") for stack, _ in stacks)
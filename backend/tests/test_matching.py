@@ -0,0 +1,100 @@
+import random
+from datetime import datetime
+
+from app.matching import EXPERIENCE_WEIGHT, SKILL_WEIGHT, CandidateMatcher, parse_requirements, skill_key
+from app.schemas import Vacancy, VacancyStatus
+
+from conftest import SKILLS, extra_candidates
+
+REQUIREMENTS = SKILLS + ["Опыт с Redux", "Знание Docker", "Experience with Rust", "React"]
+
+
+def vacancy(i, rng, status=VacancyStatus.ACTIVE):
+    requirements = rng.sample(REQUIREMENTS, rng.randint(0, 5))
+    if rng.random() < 0.7:
+        requirements.append(f"{rng.randint(1, 6)}+ лет опыта")
+    return Vacancy(
+        id=f"v{i}", title=f"Vacancy {i}", department="Engineering", location="Москва",
+        requirements=requirements, responsibilities=[], benefits=[], status=status,
+        created_at=datetime(2026, 1, 1),
+    )
+
+
+def score(candidate, vacancy):
+    """One candidate against one vacancy, pair by pair"""
+    skills, min_experience = parse_requirements(vacancy.requirements)
+    has = {skill_key(skill) for skill in candidate.skills}
+    skill_part = len(has & set(skills)) / len(skills) if skills else 1.0
+    experience_part = min(1.0, candidate.experience / min_experience) if min_experience else 1.0
+    return round(100 * (SKILL_WEIGHT * skill_part + EXPERIENCE_WEIGHT * experience_part))
+
+
+def best(candidate, vacancies):
+    scores = [score(candidate, v) for v in vacancies if v.status == VacancyStatus.ACTIVE]
+    return max(scores) if scores else None
+
+
+def test_matches_pairwise_scoring():
+    rng = random.Random(15)
+    candidates = extra_candidates(200)
+    vacancies = [vacancy(i, rng) for i in range(40)]
+    vacancies[3] = vacancy(3, rng, VacancyStatus.CLOSED)
+    matcher = CandidateMatcher()
+    changes = matcher.load(candidates[:150], vacancies[:30])
+    assert changes == {c.id: best(c, vacancies[:30]) for c in candidates[:150] if best(c, vacancies[:30]) is not None}
+
+    # Incremental updates agree with the same scoring
+    for candidate in candidates[150:]:
+        assert matcher.set_candidate(candidate) == best(candidate, vacancies[:30])
+    for v in vacancies[30:]:
+        matcher.set_vacancy(v)
+    vacancies[5] = vacancy(5, rng, VacancyStatus.CLOSED)
+    vacancies[7] = vacancy(7, rng)
+    matcher.set_vacancy(vacancies[5])
+    matcher.set_vacancy(vacancies[7])
+    for candidate in candidates:
+        row = matcher.candidate_row[candidate.id]
+        assert int(matcher.best[row]) == best(candidate, vacancies)
+
+
+def test_no_vacancies():
+    matcher = CandidateMatcher()
+    candidate = extra_candidates(1)[0]
+    assert matcher.set_candidate(candidate) is None
+
+
+def test_rank_leaves_vocabulary_alone():
+    rng = random.Random(3)
+    matcher = CandidateMatcher()
+    candidates = extra_candidates(30)
+    matcher.load(candidates, [vacancy(i, rng) for i in range(5)])
+    vocabulary = dict(matcher.vocabulary)
+    words = matcher.words
+
+    query = vacancy(99, rng, VacancyStatus.CLOSED)
+    query.requirements = ["Python", "Go", "COBOL", "Fortran 77", "2 года опыта"]
+    results = matcher.rank(query, limit=30)
+    assert matcher.vocabulary == vocabulary
+    assert matcher.words == words
+    # Unknown skills still count as required
+    expected = sorted(((-score(c, query), i) for i, c in enumerate(candidates)))
+    assert [(r.candidate_id, r.match_percentage) for r in results] == \
+        [(candidates[i].id, -s) for s, i in expected]
+    top = results[0]
+    assert set(top.matched_skills) <= {"Python", "Go"}
+
+
+def test_bulk_vacancies_grow_geometrically():
+    rng = random.Random(8)
+    matcher = CandidateMatcher()
+    candidates = extra_candidates(20)
+    matcher.load(candidates, [])
+    reallocations = 0
+    for i in range(1000):
+        before = matcher.req_bits
+        matcher.set_vacancy(vacancy(i, rng))
+        reallocations += matcher.req_bits is not before
+    assert reallocations < 15
+    assert len(matcher.vacancy_ids) == 1000
+    state, arrays = matcher.export()
+    assert len(arrays["req_bits"]) == len(arrays["req_counts"]) == 1000
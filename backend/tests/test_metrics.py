@@ -0,0 +1,146 @@
+import random
+
+import pytest
+
+from app.metrics import (
+    DEFAULT_KEYWORDS, NEGATIVE_STEMS, NOMINAL_WORDS_PER_MIN, POSITIVE_STEMS, TARGET_KEYWORDS,
+    KeywordMatcher, MetricsEngine,
+)
+from app.search import tokenize
+
+WORDS = [
+    "я", "работаю", "с", "react", "hook", "form", "и", "TypeScript", "отлично", "сложно",
+    "проблема", "node.js", "ci/cd", "хорошо", "Adobe", "XD", "в", "проекте", "nothing", "good",
+    "React Hook Form", "adobe xd",
+]
+
+
+def transcript(count, seed=7):
+    rng = random.Random(seed)
+    timestamp = 0.0
+    entries = []
+    for i in range(count):
+        # Mostly forward, occasionally out of order
+        timestamp = max(0.0, timestamp + rng.uniform(-2, 12))
+        entries.append({
+            "id": str(i),
+            "speaker": "candidate" if rng.random() < 0.6 else "interviewer",
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))),
+            "timestamp": round(timestamp, 1),
+            "confidence": round(rng.uniform(0.5, 1), 2),
+        })
+    return entries
+
+
+def occurrences(keywords, tokens):
+    """(end, -length, keyword) of every keyword occurrence in `tokens`"""
+    found = []
+    for keyword in keywords:
+        pattern = tokenize(keyword)
+        for start in range(len(tokens) - len(pattern) + 1):
+            if pattern and tokens[start:start + len(pattern)] == pattern:
+                found.append((start + len(pattern), -len(pattern), keyword))
+    return sorted(found)
+
+
+def recompute(entries):
+    """The metrics computed from scratch over the whole transcript"""
+    tokens = [tokenize(entry["text"]) for entry in entries]
+    pauses = candidate_seconds = 0.0
+    for i in range(1, len(entries)):
+        gap = max(0.0, entries[i]["timestamp"] - entries[i - 1]["timestamp"])
+        pauses += max(0.0, gap - len(tokens[i - 1]) * 60.0 / NOMINAL_WORDS_PER_MIN)
+        if entries[i - 1]["speaker"] == "candidate":
+            candidate_seconds += gap
+    said = [t for entry, t in zip(entries, tokens) if entry["speaker"] == "candidate"]
+    words = sum(len(t) for t in said)
+    positive = sum(token.startswith(POSITIVE_STEMS) for t in said for token in t)
+    negative = sum(not token.startswith(POSITIVE_STEMS) and token.startswith(NEGATIVE_STEMS)
+                   for t in said for token in t)
+    keywords = list(dict.fromkeys(keyword for t in said for _, _, keyword in occurrences(DEFAULT_KEYWORDS, t)))
+    avg_confidence = sum(entry["confidence"] for entry in entries) / len(entries) if entries else 0.0
+    speaking_rate = words * 60.0 / candidate_seconds if candidate_seconds else 0.0
+    sentiment = 0.5 + 0.5 * (positive - negative) / (positive + negative) if positive + negative else 0.5
+    technical = 40 + 60 * min(1.0, len(keywords) / TARGET_KEYWORDS) if keywords else 0
+    rate_fit = 1 - min(1.0, abs(speaking_rate - NOMINAL_WORDS_PER_MIN) / NOMINAL_WORDS_PER_MIN) if speaking_rate else 0.0
+    communication = 100 * (0.5 * avg_confidence + 0.3 * rate_fit + 0.2 * sentiment)
+    return {
+        "pauses_sec": round(pauses),
+        "avg_confidence": round(avg_confidence, 2),
+        "speaking_rate": round(speaking_rate),
+        "sentiment_score": round(sentiment, 2),
+        "keywords_used": keywords,
+        "technical_score": round(technical),
+        "communication_score": round(communication),
+        "overall_score": round(0.6 * technical + 0.4 * communication),
+    }
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_incremental_matches_recompute(seed):
+    entries = transcript(120, seed)
+    engine = MetricsEngine()
+    assert engine.snapshot() == recompute([])
+    for i, entry in enumerate(entries):
+        engine.add(entry)
+        assert engine.snapshot() == recompute(entries[:i + 1])
+
+
+def test_deltas_rebuild_snapshot():
+    engine = MetricsEngine()
+    client = {}
+    for i, entry in enumerate(transcript(60)):
+        engine.add(entry)
+        update = engine.keyframe() if i % 10 == 0 else engine.delta()
+        client.update(update)
+        assert client == engine.snapshot()
+    assert engine.delta() == {}
+
+
+def test_voice_activity_replaces_estimates():
+    engine = MetricsEngine()
+    for entry in transcript(20):
+        engine.add(entry)
+    engine.set_voice_activity({"pauses_sec": 7.4, "speech_sec": 30.0, "speech_ratio": 0.8})
+    snapshot = engine.snapshot()
+    assert snapshot["pauses_sec"] == 7
+    assert snapshot["speech_sec"] == 30.0
+    assert snapshot["speech_ratio"] == 0.8
+
+
+def feed_text(matcher, text):
+    return matcher.feed(tokenize(text))
+
+
+def test_keywords_overlap():
+    matcher = KeywordMatcher(["React", "React Hook Form", "Hook", "Form Validation"])
+    # Every keyword ending at a token is reported, longest first
+    assert feed_text(matcher, "react hook form validation") == ["React", "Hook", "React Hook Form", "Form Validation"]
+    matcher.reset()
+    # A broken partial match restarts from the token that broke it
+    assert feed_text(matcher, "react hook react hook form") == ["React", "Hook", "React", "Hook", "React Hook Form"]
+
+
+def test_keywords_across_feeds_until_reset():
+    matcher = KeywordMatcher(["React Hook Form"])
+    assert feed_text(matcher, "react hook") == []
+    assert feed_text(matcher, "form") == ["React Hook Form"]
+    feed_text(matcher, "react hook")
+    matcher.reset()
+    assert feed_text(matcher, "form") == []
+
+
+def test_keywords_case_and_punctuation():
+    matcher = KeywordMatcher(["TypeScript", "Node.js", "CI/CD", ""])
+    assert feed_text(matcher, "TYPESCRIPT, node JS и Ci/Cd") == ["TypeScript", "Node.js", "CI/CD"]
+    matcher.reset()
+    assert feed_text(matcher, "typescripts nodejs") == []
+
+
+def test_keywords_cyrillic():
+    matcher = KeywordMatcher(["Машинное обучение", "Ёмкость", "обучение"])
+    assert feed_text(matcher, "МАШИННОЕ Обучение, емкость") == ["Машинное обучение", "обучение", "Ёмкость"]
+    matcher.reset()
+    assert feed_text(matcher, "машинное, обучение") == ["Машинное обучение", "обучение"]
+    matcher.reset()
+    assert feed_text(matcher, "машинного обучения") == []
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import notifications
+from app.notifications import LEASE_SEC, RECIPIENT_INTERVAL_SEC, NotificationQueue, _claim, _finish
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(notifications, "time", SimpleNamespace(time=clock))
+    monkeypatch.setattr(notifications, "random", SimpleNamespace(random=lambda: 1.0))
+    return clock
+
+
+@pytest.fixture
+def queue(run, tmp_path, clock):
+    """A spool with no workers; tests claim and finish jobs themselves"""
+    queue = NotificationQueue(str(tmp_path / "spool.db"), workers=0, transports={})
+    yield queue
+    run(queue.close())
+
+
+def claim(queue, limit=10):
+    return queue.pool.run_sync(lambda conn: _claim(conn, limit))
+
+
+def finish(queue, results):
+    queue.pool.run_sync(lambda conn: _finish(conn, results))
+
+
+def status(run, queue, job_id):
+    return run(queue.get(job_id)).status
+
+
+def test_expired_lease_is_redelivered(run, queue, clock):
+    job_id, = run(queue.enqueue([("1", "anna@example.com", "Приглашение", "Текст")], transport="file"))
+    first = claim(queue)
+    assert first.transport == "file"
+    assert [d.job_id for d in first.deliveries] == [job_id]
+    assert status(run, queue, job_id) == "sending"
+
+    # Leased to the first worker, which never reports back
+    clock.now += LEASE_SEC - 1
+    assert claim(queue).deliveries == []
+    clock.now += 2
+    again = claim(queue)
+    assert [d.job_id for d in again.deliveries] == [job_id]
+    assert again.deliveries[0].message["Subject"] == "Приглашение"
+
+    finish(queue, [(again.deliveries[0], None)])
+    job = run(queue.get(job_id))
+    assert (job.status, job.attempts) == ("sent", 1)
+    clock.now += LEASE_SEC + 1
+    assert claim(queue).deliveries == []
+
+
+def test_recipient_rate_limit(run, queue, clock):
+    start = clock.now
+    ids = run(queue.enqueue([
+        ("1", "anna@example.com", "a", ""),
+        ("1", "anna@example.com", "b", ""),
+        ("2", "boris@example.com", "c", ""),
+        ("1", "anna@example.com", "d", ""),
+    ], transport="file"))
+    batch = claim(queue)
+    assert [d.job_id for d in batch.deliveries] == [ids[0], ids[2]]
+    finish(queue, [(d, None) for d in batch.deliveries])
+    # The other jobs for anna wait for their slots without using attempts
+    deferred = run(queue.get(ids[1])), run(queue.get(ids[3]))
+    assert [job.next_attempt_at.timestamp() for job in deferred] == \
+        [start + RECIPIENT_INTERVAL_SEC, start + 2 * RECIPIENT_INTERVAL_SEC]
+    assert [job.attempts for job in deferred] == [0, 0]
+
+    clock.now = start + RECIPIENT_INTERVAL_SEC - 1
+    assert claim(queue).deliveries == []
+    for n, job_id in ((1, ids[1]), (2, ids[3])):
+        clock.now = start + n * RECIPIENT_INTERVAL_SEC
+        batch = claim(queue)
+        assert [d.job_id for d in batch.deliveries] == [job_id]
+        finish(queue, [(d, None) for d in batch.deliveries])
+    assert run(queue.stats()) == {"queued": 0, "sending": 0, "sent": 4, "failed": 0}
+
+
+def test_failed_delivery_frees_the_slot(run, queue, clock, monkeypatch):
+    monkeypatch.setattr(notifications, "NOTIFY_MAX_ATTEMPTS", 2)
+    job_id, = run(queue.enqueue([("1", "anna@example.com", "a", "")], transport="file"))
+    delivery, = claim(queue).deliveries
+    finish(queue, [(delivery, "550 mailbox busy")])
+    job = run(queue.get(job_id))
+    assert (job.status, job.attempts, job.last_error) == ("queued", 1, "550 mailbox busy")
+    assert job.next_attempt_at.timestamp() == clock.now + notifications.NOTIFY_BACKOFF_SEC
+
+    # The failed send never reached anna, so the retry isn't held back for
+    # the recipient interval
+    clock.now += notifications.NOTIFY_BACKOFF_SEC
+    batch = claim(queue)
+    assert [d.job_id for d in batch.deliveries] == [job_id]
+    finish(queue, [(batch.deliveries[0], "550 mailbox busy")])
+    job = run(queue.get(job_id))
+    assert (job.status, job.attempts) == ("failed", 2)
+    clock.now += LEASE_SEC + 1
+    assert claim(queue).deliveries == []
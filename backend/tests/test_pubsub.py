@@ -0,0 +1,78 @@
+import asyncio
+
+from app.pubsub import InProcessPubSub, UnixSocketPubSub
+
+
+class Worker:
+    """Records what a bus hands to one worker"""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.messages = []
+        self.produce = []
+        bus.bind(self.on_message, self.on_produce)
+
+    def on_message(self, interview_id, seq, message):
+        self.messages.append((interview_id, seq, message))
+
+    def on_produce(self, interview_id, produce, last_seq):
+        self.produce.append((interview_id, produce, last_seq))
+
+
+async def settle(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_claim_moves_producer_between_workers(run, tmp_path):
+    path = str(tmp_path / "bus.sock")
+
+    async def scenario():
+        first, second = Worker(UnixSocketPubSub(path)), Worker(UnixSocketPubSub(path))
+        try:
+            await first.bus.subscribe("1")
+            await settle(lambda: first.produce == [("1", True, 0)])
+            await second.bus.subscribe("1")
+            # The first worker took the lock and hosts the broker
+            await settle(lambda: len(first.bus._broker.subscribers["1"]) == 2)
+            await first.bus.publish("1", 1, "simulated")
+            await settle(lambda: len(second.messages) == 1)
+
+            assert await second.bus.claim("1")
+            await settle(lambda: first.produce[-1] == ("1", False, 0))
+            assert second.produce == [("1", True, 1)]
+
+            # The old producer's messages are dropped, the claimer's relayed
+            await first.bus.publish("1", 2, "stale")
+            await second.bus.publish("1", 2, "live")
+            await settle(lambda: len(first.messages) == 2)
+            assert first.messages[-1] == ("1", 2, "live")
+            assert second.messages == [("1", 1, "simulated"), ("1", 2, "live")]
+        finally:
+            await second.bus.close()
+            await first.bus.close()
+            # Let the cancelled connections close before the loop does
+            await asyncio.sleep(0.1)
+
+    run(scenario())
+
+
+def test_claim_requires_subscription(run, tmp_path):
+    async def scenario():
+        worker = Worker(UnixSocketPubSub(str(tmp_path / "bus.sock")))
+        try:
+            assert not await worker.bus.claim("1")
+            assert worker.produce == []
+        finally:
+            await worker.bus.close()
+
+    run(scenario())
+
+
+def test_in_process_claim(run):
+    worker = Worker(InProcessPubSub())
+    assert not run(worker.bus.claim("1"))
+    run(worker.bus.subscribe("1"))
+    assert run(worker.bus.claim("1"))
@@ -0,0 +1,41 @@
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.data import MOCK_INTERVIEW_DETAILS, MOCK_REPORTS, MOCK_VACANCIES
+from app.responses import ModelResponse
+from app.schemas import ApiResponse, Candidate, InterviewDetail, Report, Vacancy
+
+from conftest import extra_candidates
+
+ENVELOPES = [
+    ApiResponse[List[Candidate]](data=extra_candidates(12), next_cursor="eyJrIjoiMTIifQ", total=44),
+    ApiResponse[List[Candidate]](data=[], success=True, message="Пусто", total=0),
+    ApiResponse[InterviewDetail](data=next(iter(MOCK_INTERVIEW_DETAILS.values()))),
+    ApiResponse[List[Vacancy]](data=MOCK_VACANCIES, next_cursor=None),
+    ApiResponse[Report](data=MOCK_REPORTS[0], message="ok"),
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    for i, envelope in enumerate(ENVELOPES):
+        model = type(envelope)
+        app.get(f"/default/{i}", response_model=model)(lambda envelope=envelope: envelope)
+        app.get(f"/model/{i}")(lambda envelope=envelope: ModelResponse(envelope))
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("index", range(len(ENVELOPES)))
+def test_bytes_match_default_serialization(client, index):
+    default = client.get(f"/default/{index}")
+    rendered = client.get(f"/model/{index}")
+    assert rendered.content == default.content
+    assert rendered.headers["content-type"] == default.headers["content-type"]
+    body = rendered.json()
+    assert body["next_cursor"] == ENVELOPES[index].next_cursor
+    assert body["total"] == ENVELOPES[index].total
@@ -0,0 +1,111 @@
+from bisect import bisect_left
+
+import pytest
+
+from app.data import MOCK_INTERVIEWS, MOCK_REPORTS, MOCK_VACANCIES
+from app.pagination import ListQuery
+from app.snapshot import Keyed, Snapshot, SnapshotError, build
+from app.storage import MemoryStorage, SnapshotStorage
+
+from conftest import extra_candidates
+from test_storage import pages
+
+
+@pytest.fixture
+def built(run, reference, tmp_path):
+    """A snapshot of `reference` and a SnapshotStorage serving it"""
+    path = str(tmp_path / "harry.snapshot")
+    run(build(reference, path))
+    storage = SnapshotStorage(path)
+    run(storage.open())
+    yield path, storage
+    run(storage.close())
+
+
+def all_candidates(run, storage, **query):
+    return run(storage.list_candidates(ListQuery(limit=1000, **query))).items
+
+
+def unmatched(candidate):
+    # build() recomputes match percentages
+    return candidate.model_copy(update={"match_percentage": None})
+
+
+@pytest.fixture
+def mirror(run, built):
+    """MemoryStorage holding the same rows as the snapshot"""
+    memory = MemoryStorage()
+    run(memory.add_candidates(all_candidates(run, built[1])))
+    return memory
+
+
+def test_keyed_bisect():
+    order = [3, 0, 4, 1, 2]
+    keys = {3: "a", 0: "c", 4: "c", 1: "e", 2: "g"}
+    view = Keyed(order, keys.__getitem__)
+    assert len(view) == 5
+    assert [view[i] for i in range(5)] == ["a", "c", "c", "e", "g"]
+    assert [bisect_left(view, key) for key in ["", "a", "c", "d", "g", "h"]] == [0, 0, 1, 3, 4, 5]
+
+
+def test_snapshot_reads_every_entity(run, reference, built):
+    _, storage = built
+    for candidate in all_candidates(run, reference):
+        assert unmatched(run(storage.get_candidate(candidate.id))) == unmatched(candidate)
+    for interview in MOCK_INTERVIEWS:
+        assert run(storage.get_interview(interview.id)) == run(reference.get_interview(interview.id))
+        assert run(storage.get_interview(interview.id, include_transcript=False)) == \
+            run(reference.get_interview(interview.id, include_transcript=False))
+    for vacancy in MOCK_VACANCIES:
+        assert run(storage.get_vacancy(vacancy.id)) == vacancy
+    for report in MOCK_REPORTS:
+        assert run(storage.get_report_for_candidate(report.candidate_id)) == report
+    assert run(storage.get_candidate("missing")) is None
+    assert run(storage.get_interview("missing")) is None
+
+
+def test_writes_overlay_the_snapshot(run, mirror, built, candidate_count):
+    path, storage = built
+    base = run(storage.get_candidate("t3"))
+    updated = base.model_copy(update={"name": "Ёлкина Мария", "score": 99})
+    added = extra_candidates(41)[40]
+    for backend in (mirror, storage):
+        run(backend.add_candidate(updated))
+        run(backend.add_candidate(added))
+
+    assert run(storage.get_candidate("t3")) == updated
+    assert run(storage.get_candidate(added.id)) == added
+    for sort_by in (None, "score", "created_at"):
+        for sort_order in ("asc", "desc"):
+            query = {"sort_by": sort_by, "sort_order": sort_order}
+            expected = all_candidates(run, mirror, **query)
+            assert all_candidates(run, storage, **query) == expected
+            # Cursors bisect the base order past shadowed rows
+            assert pages(run, storage, ListQuery(limit=7, **query)) == expected
+    page = run(storage.list_candidates(ListQuery(offset=5, limit=10, include_total=True)))
+    assert page.total == candidate_count + 1
+    assert page.items == run(mirror.list_candidates(ListQuery(offset=5, limit=10))).items
+    assert [c.id for c in all_candidates(run, storage, search="ёлкина")] == ["t3"]
+    assert "t3" not in [c.id for c in all_candidates(run, storage, search="Тест Кандидатова 3")]
+
+    # Writes stay in the process; the file still has the old row
+    reopened = SnapshotStorage(path)
+    assert run(reopened.get_candidate("t3")) == base
+    assert run(reopened.get_candidate(added.id)) is None
+
+
+def test_match_percentage_updates(run, mirror, built):
+    _, storage = built
+    for backend in (mirror, storage):
+        run(backend.update_match_percentages({"t1": 42, "t2": None}))
+    assert run(storage.get_candidate("t1")).match_percentage == 42
+    assert run(storage.get_candidate("t2")).match_percentage is None
+    query = {"sort_by": "match_percentage", "sort_order": "desc"}
+    assert all_candidates(run, storage, **query) == all_candidates(run, mirror, **query)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.snapshot"
+    path.write_bytes(b"definitely not a snapshot" * 10)
+    with pytest.raises(SnapshotError):
+        Snapshot(str(path))
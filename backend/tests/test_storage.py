@@ -0,0 +1,187 @@
+import pytest
+
+from app.pagination import InvalidCursor, ListQuery, sort_value
+from app.storage import SQLiteStorage
+
+from conftest import extra_candidates
+
+
+def pages(run, storage, query):
+    """Follow next_cursor from the first page to the last"""
+    items = []
+    while True:
+        page = run(storage.list_candidates(query))
+        items.extend(page.items)
+        if page.next_cursor is None:
+            return items
+        query = query._replace(cursor=page.next_cursor)
+
+
+def test_default_page(run, storage):
+    page = run(storage.list_candidates(ListQuery(include_total=True)))
+    assert len(page.items) == 10
+    assert page.next_cursor is not None
+    assert page.total == 44
+
+
+@pytest.mark.parametrize("limit", [0, -1, -10])
+def test_non_positive_limit_returns_empty_page(run, storage, limit):
+    page = run(storage.list_candidates(ListQuery(limit=limit)))
+    assert page.items == []
+    assert page.next_cursor is None
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_non_positive_limit_with_search(run, storage, limit):
+    assert run(storage.list_candidates(ListQuery(limit=limit, search="developer"))).items == []
+
+
+def test_limit_larger_than_table(run, storage, candidate_count):
+    page = run(storage.list_candidates(ListQuery(limit=1000)))
+    assert len(page.items) == candidate_count
+    assert page.next_cursor is None
+
+
+@pytest.mark.parametrize("sort_by", [None, "created_at", "score", "match_percentage"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 3, 10])
+def test_cursor_walks_every_row_once_in_order(run, storage, candidate_count, sort_by, sort_order, limit):
+    query = ListQuery(limit=limit, sort_by=sort_by, sort_order=sort_order)
+    items = pages(run, storage, query)
+    assert sorted(c.id for c in items) == sorted(c.id for c in run(storage.list_candidates(ListQuery(limit=1000))).items)
+    assert len(items) == candidate_count
+    if sort_by:
+        values = [sort_value(c, sort_by) for c in items]
+        assert values == sorted(values, reverse=sort_order == "desc")
+
+
+@pytest.mark.parametrize("status", ["new", "interviewed", "hired", "rejected"])
+def test_status_filter_with_cursor(run, storage, status):
+    query = ListQuery(limit=3, status=status, sort_by="score", sort_order="desc", include_total=True)
+    items = pages(run, storage, query)
+    everything = run(storage.list_candidates(ListQuery(limit=1000))).items
+    assert sorted(c.id for c in items) == sorted(c.id for c in everything if c.status.value == status)
+    assert run(storage.list_candidates(query)).total == len(items)
+
+
+def test_offset_pages_match_cursor_pages(run, storage):
+    query = ListQuery(limit=7, sort_by="created_at")
+    by_cursor = pages(run, storage, query)
+    by_offset = []
+    for offset in range(0, len(by_cursor), 7):
+        by_offset.extend(run(storage.list_candidates(query._replace(offset=offset))).items)
+    assert [c.id for c in by_offset] == [c.id for c in by_cursor]
+
+
+def test_cursor_must_match_sort(run, storage):
+    page = run(storage.list_candidates(ListQuery(limit=2, sort_by="score")))
+    with pytest.raises(InvalidCursor):
+        run(storage.list_candidates(ListQuery(limit=2, sort_by="created_at", cursor=page.next_cursor)))
+
+
+def test_unknown_sort_field(run, storage):
+    with pytest.raises(InvalidCursor):
+        run(storage.list_candidates(ListQuery(sort_by="name")))
+
+
+SEARCHES = [
+    "script",        # inside "TypeScript" / "JavaScript"
+    "ова",           # inside "Петрова", "Кандидатова"
+    "ПЕТРОВ",        # case-insensitive, Cyrillic
+    "Developer",
+    "end",           # inside "Frontend" / "Backend"
+    "py",            # short tokens only match word prefixes
+    "go",
+    "js",
+    "back ова",      # every token has to match
+    "node.js",
+    "xyz",
+    "!!",
+]
+
+
+def search_ids(run, storage, search, **options):
+    page = run(storage.list_candidates(ListQuery(search=search, limit=1000, include_total=True, **options)))
+    ids = {c.id for c in page.items}
+    assert page.total == len(ids)
+    return ids
+
+
+@pytest.mark.parametrize("search", SEARCHES)
+def test_search_matches_memory_index(run, storage, reference, search):
+    # The in-memory SearchIndex defines the expected matches
+    assert search_ids(run, storage, search) == search_ids(run, reference, search)
+
+
+def test_substring_search(run, storage, reference):
+    assert "1" in search_ids(run, storage, "script")
+    assert {"1", "3"} <= search_ids(run, storage, "ова")
+    assert search_ids(run, storage, "ова", status="hired") == search_ids(run, reference, "ова", status="hired")
+
+
+def test_search_pages_by_offset_cursor(run, storage):
+    everything = search_ids(run, storage, "developer")
+    items = pages(run, storage, ListQuery(search="developer", limit=4))
+    assert len(items) == len(everything)
+    assert {c.id for c in items} == everything
+
+
+def test_search_sees_new_rows(run, storage):
+    candidate = run(storage.list_candidates(ListQuery(limit=1))).items[0]
+    run(storage.add_candidate(candidate.model_copy(update={"id": "new", "name": "Ёлкина Зоя"})))
+    assert search_ids(run, storage, "елкин") == {"new"}
+    assert search_ids(run, storage, "лкин") == {"new"}
+
+
+def test_sqlite_notices_other_workers_writes(run, tmp_path):
+    path = str(tmp_path / "harry.db")
+    first, second = SQLiteStorage(path, pool_size=2), SQLiteStorage(path, pool_size=2)
+    try:
+        assert run(first.changed_elsewhere())
+        assert not run(first.changed_elsewhere())
+        # Own writes don't count
+        run(first.add_candidates(extra_candidates(3)))
+        assert not run(first.changed_elsewhere())
+
+        run(second.update_match_percentages({"t0": 50}))
+        assert run(first.changed_elsewhere())
+        assert not run(first.changed_elsewhere())
+
+        # Noticed even when this worker writes before looking
+        run(second.add_candidate(extra_candidates(2)[1]))
+        run(first.add_candidate(extra_candidates(1)[0]))
+        assert run(first.changed_elsewhere())
+        assert not run(first.changed_elsewhere())
+    finally:
+        run(first.close())
+        run(second.close())
+
+
+def test_sqlite_upgrades_a_v4_database(run, tmp_path):
+    import sqlite3
+
+    from app.storage import MIGRATIONS
+
+    path = str(tmp_path / "harry.db")
+    conn = sqlite3.connect(path, isolation_level=None)
+    for number, migration in enumerate(MIGRATIONS[:4], start=1):
+        migration(conn)
+        conn.execute(f"PRAGMA user_version = {number}")
+    # As written by the v1 upserts
+    candidate = extra_candidates(2)[1]
+    conn.execute(
+        "INSERT INTO candidates (id, status, interview_id, search_text, payload) VALUES (?, ?, ?, ?, ?)",
+        (candidate.id, candidate.status.value, None, candidate.name.casefold(), candidate.model_dump_json()),
+    )
+    conn.close()
+
+    storage = SQLiteStorage(path, pool_size=1)
+    try:
+        run(storage.open())
+        columns = run(storage.pool.run(lambda conn: [row[1] for row in conn.execute("PRAGMA table_info(candidates)")]))
+        assert "search_text" not in columns
+        assert [c.id for c in run(storage.list_candidates(ListQuery(search="андидатов"))).items] == [candidate.id]
+        run(storage.add_candidate(extra_candidates(3)[2]))
+        assert run(storage.get_candidate("t2")) is not None
+    finally:
+        run(storage.close())
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import random
+
+import pytest
+
+from app import transcripts
+from app.pagination import TranscriptWindow, in_time_range
+from app.transcripts import TranscriptLog
+
+
+def entries(count, seed=0):
+    rnd = random.Random(seed)
+    timestamp, result = 0.0, []
+    for i in range(count):
+        timestamp += rnd.choice([0, 0.5, 1.3])
+        result.append({
+            "id": str(i),
+            "speaker": "candidate" if i % 2 else "interviewer",
+            "text": "слово " * rnd.randint(1, 20),
+            "timestamp": timestamp,
+        })
+    return result
+
+
+def expected(logged, window):
+    selected = [e for e in logged if in_time_range(e, window.start, window.end)]
+    return selected[window.offset:window.offset + window.limit], len(selected)
+
+
+def random_windows(logged, count=200):
+    rnd = random.Random(1)
+    last = logged[-1]["timestamp"] + 5
+    for _ in range(count):
+        yield TranscriptWindow(
+            offset=rnd.randint(0, 50),
+            limit=rnd.randint(1, 200),
+            start=rnd.choice([None, rnd.uniform(-5, last)]),
+            end=rnd.choice([None, rnd.uniform(-5, last)]),
+        )
+
+
+def assert_windows(log, interview_id, logged, count=200):
+    for window in random_windows(logged, count):
+        page = log.read(interview_id, window)
+        items, total = expected(logged, window)
+        assert page.items == items, window
+        assert page.total == total, window
+
+
+@pytest.fixture
+def small_segments(monkeypatch):
+    monkeypatch.setattr(transcripts, "SEGMENT_BYTES", 4096)
+
+
+@pytest.fixture
+def log(run, tmp_path):
+    log = TranscriptLog(str(tmp_path), commit_interval=0.01, compact_delay=0)
+    run(log.start())
+    yield log
+    run(log.close())
+
+
+def test_append_and_read_windows(log, small_segments):
+    logged = entries(2000)
+    for position, entry in enumerate(logged):
+        assert log.append("1", entry) == position
+    assert len(log.writers["1"].segments) > 10
+    assert log.count("1") == len(logged)
+    assert log.entries("1") == logged
+    assert_windows(log, "1", logged)
+
+
+def test_unknown_interview(log):
+    assert log.read("missing", TranscriptWindow()) is None
+    assert log.entries("missing") is None
+    assert log.count("missing") == 0
+
+
+def test_out_of_order_entry_is_filed_at_latest_time(log):
+    log.append("1", {"id": "a", "timestamp": 10})
+    log.append("1", {"id": "b", "timestamp": 5})
+    assert [e["id"] for e in log.read("1", TranscriptWindow(start=10)).items] == ["a", "b"]
+    assert log.read("1", TranscriptWindow(end=10)).total == 0
+
+
+def test_reader_follows_writer(run, log, tmp_path, small_segments):
+    logged = entries(300)
+    for entry in logged[:100]:
+        log.append("1", entry)
+    reader = TranscriptLog(str(tmp_path))
+    assert reader.count("1") == 100
+    for entry in logged[100:]:
+        log.append("1", entry)
+    assert reader.count("1") == 300
+    assert_windows(reader, "1", logged, 50)
+
+
+def test_one_writer_per_log(log, tmp_path):
+    log.append("1", {"id": "a", "timestamp": 1})
+    other = TranscriptLog(str(tmp_path))
+    assert other.append("1", {"id": "b", "timestamp": 2}) is None
+    assert log.count("1") == 1
+
+
+def test_commit_fsyncs_appends(run, log):
+    log.append("1", {"id": "a", "timestamp": 1})
+    assert log._dirty
+    run(log.commit())
+    assert not log._dirty
+
+
+def test_compaction_merges_segments_and_drops_duplicates(run, log, tmp_path, small_segments):
+    logged = entries(1000)
+    for entry in logged:
+        log.append("1", entry)
+    fixed = [{**entry, "text": "исправлено"} for entry in logged[:10]]
+    for entry in fixed:
+        log.append("1", entry)
+    log.finish("1")
+    assert log.compact("1")
+
+    path = transcripts._log_dir(str(tmp_path), "1")
+    assert sorted(os.listdir(path)) == ["0001-000000.idx", "0001-000000.seg", "lock"]
+    merged = fixed + logged[10:]
+    fresh = TranscriptLog(str(tmp_path))
+    assert fresh.entries("1") == merged
+    assert_windows(fresh, "1", merged, 50)
+
+    # A later append starts a new segment of the compacted epoch
+    log.append("1", {"id": "late", "timestamp": 10_000})
+    assert log.count("1") == len(merged) + 1
+
+
+def test_compaction_skips_live_logs(log):
+    log.append("1", {"id": "a", "timestamp": 1})
+    assert not log.compact("1")
+
+
+def test_background_compaction(run, log, tmp_path, small_segments):
+    for entry in entries(500):
+        log.append("1", entry)
+    log.finish("1")
+    run(asyncio.sleep(0.3))
+    names = os.listdir(transcripts._log_dir(str(tmp_path), "1"))
+    assert [name for name in names if name.endswith(".seg")] == ["0001-000000.seg"]
+
+
+def test_torn_tail_is_truncated_on_reopen(run, log, tmp_path):
+    logged = entries(100)
+    for entry in logged:
+        log.append("1", entry)
+    run(log.close())
+    path = transcripts._log_dir(str(tmp_path), "1")
+    segment = os.path.join(path, "0000-000000.seg")
+    with open(segment, "ab") as f:
+        f.write(b"\x10\x00\x00\x00torn")
+
+    assert TranscriptLog(str(tmp_path)).count("1") == 100
+    reopened = TranscriptLog(str(tmp_path))
+    reopened.append("1", {"id": "after", "timestamp": 1000})
+    assert reopened.entries("1") == logged + [{"id": "after", "timestamp": 1000}]
+    run(reopened.close())
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import websocket
+from app.main import app, manager
+from app.pubsub import InProcessPubSub
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class Producer:
+    """Stand-in for simulate_interview: a tick every 20 ms once `subscribers` have joined"""
+
+    def __init__(self, subscribers=1):
+        self.subscribers = subscribers
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self, interview_id):
+        self.started += 1
+        try:
+            while len(manager.active_connections.get(interview_id, {})) < self.subscribers:
+                await asyncio.sleep(0.01)
+            tick = 0
+            while True:
+                tick += 1
+                await manager.publish(interview_id, {"type": "tick", "data": tick})
+                await asyncio.sleep(0.02)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+@pytest.fixture
+def producer(monkeypatch):
+    producer = Producer(subscribers=2)
+    monkeypatch.setattr(manager, "simulate_interview", producer)
+    return producer
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_subscribers_share_one_producer(client, producer):
+    with client.websocket_connect("/ws/interviews/1") as first, \
+            client.websocket_connect("/ws/interviews/1") as second:
+        received = [[first.receive_json() for _ in range(3)], [second.receive_json() for _ in range(3)]]
+        assert received[0] == received[1]
+        assert [m["seq"] for m in received[0]] == [1, 2, 3]
+        assert producer.started == 1
+
+        first.close()
+        # The other subscriber keeps the producer and its messages
+        seq = second.receive_json()["seq"]
+        assert second.receive_json()["seq"] == seq + 1
+        wait_for(lambda: len(manager.active_connections.get("1", {})) == 1)
+        assert producer.cancelled == 0
+
+    wait_for(lambda: producer.cancelled == 1)
+    assert producer.started == 1
+    assert "1" not in manager.streams
+
+
+def test_producer_restarts_for_new_subscribers(client, monkeypatch):
+    producer = Producer()
+    monkeypatch.setattr(manager, "simulate_interview", producer)
+    for _ in range(2):
+        with client.websocket_connect("/ws/interviews/2") as ws:
+            assert ws.receive_json()["data"] == 1
+        wait_for(lambda: producer.cancelled == producer.started)
+    assert producer.started == 2
+
+
+def test_streams_per_interview(client, monkeypatch):
+    producer = Producer()
+    monkeypatch.setattr(manager, "simulate_interview", producer)
+    with client.websocket_connect("/ws/interviews/1") as first, \
+            client.websocket_connect("/ws/interviews/2") as second:
+        assert first.receive_json()["seq"] == 1
+        assert second.receive_json()["seq"] == 1
+        assert producer.started == 2
+    wait_for(lambda: producer.cancelled == 2)
+
+
+def test_linger_keeps_stream_for_reconnects(client, monkeypatch):
+    producer = Producer()
+    monkeypatch.setattr(manager, "simulate_interview", producer)
+    monkeypatch.setattr(websocket, "STREAM_LINGER_SEC", 0.5)
+    with client.websocket_connect("/ws/interviews/3") as ws:
+        seen = [ws.receive_json()["seq"] for _ in range(2)]
+    assert producer.cancelled == 0
+    with client.websocket_connect(f"/ws/interviews/3?since={seen[-1]}") as ws:
+        assert ws.receive_json()["seq"] == seen[-1] + 1
+    assert producer.started == 1
+    wait_for(lambda: producer.cancelled == 1, timeout=3)
+    assert "3" not in manager.streams
+
+
+def test_replay_after_reconnect(client, monkeypatch):
+    producer = Producer()
+    monkeypatch.setattr(manager, "simulate_interview", producer)
+    monkeypatch.setattr(websocket, "STREAM_LINGER_SEC", 0.5)
+    with client.websocket_connect("/ws/interviews/4") as ws:
+        first = [ws.receive_json() for _ in range(2)]
+    # The producer keeps publishing while nobody is connected
+    wait_for(lambda: manager.streams["4"].last_seq >= 5)
+    with client.websocket_connect("/ws/interviews/4?since=1") as ws:
+        replayed = [ws.receive_json() for _ in range(4)]
+    assert replayed[0] == first[1]
+    assert [m["seq"] for m in replayed] == [2, 3, 4, 5]
+    wait_for(lambda: producer.cancelled == 1, timeout=3)
+
+
+def test_reset_when_gap_is_not_buffered(client, monkeypatch):
+    producer = Producer()
+    monkeypatch.setattr(manager, "simulate_interview", producer)
+    # A fresh stream can't replay anything from an earlier one
+    with client.websocket_connect("/ws/interviews/1?since=50") as ws:
+        reset = ws.receive_json()
+        assert reset["type"] == "reset"
+        assert reset["data"] == {"last_seq": 0}
+        assert ws.receive_json()["seq"] == 1
+
+
+def test_stream_replay_window(monkeypatch):
+    monkeypatch.setattr(websocket, "REPLAY_BUFFER_SIZE", 3)
+    stream = websocket.InterviewStream()
+    for seq in range(1, 6):
+        stream.append(seq, str(seq))
+    assert stream.replay(5) == []
+    assert stream.replay(2) == ["3", "4", "5"]
+    assert stream.replay(1) is None
+    assert stream.replay(6) is None
+    # A jump in sequence numbers empties the buffer
+    stream.append(9, "9")
+    assert stream.replay(8) == ["9"]
+    assert stream.replay(5) is None
+
+
+class FakeSocket:
+    """Records what it is sent; a slow one never finishes its first send"""
+
+    def __init__(self, slow=False):
+        self.slow = slow
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        if self.slow:
+            await asyncio.Event().wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+@pytest.mark.parametrize("policy", ["drop", "disconnect"])
+def test_slow_subscriber(run, monkeypatch, policy):
+    monkeypatch.setattr(websocket, "SEND_QUEUE_SIZE", 4)
+    monkeypatch.setattr(websocket, "SLOW_CLIENT_POLICY", policy)
+
+    async def scenario():
+        connections = websocket.ConnectionManager(bus=InProcessPubSub())
+
+        async def idle(interview_id):
+            await asyncio.Event().wait()
+
+        connections.simulate_interview = idle
+        fast, slow = FakeSocket(), FakeSocket(slow=True)
+        await connections.connect(fast, "1")
+        await connections.connect(slow, "1")
+        for i in range(20):
+            await connections.publish("1", {"type": "tick", "data": i})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        # The slow socket never holds up the others
+        assert [json.loads(m)["data"] for m in fast.sent] == list(range(20))
+        subscribers = connections.active_connections["1"]
+        if policy == "drop":
+            # One message is stuck in send_text; the outbox keeps the newest
+            queued = subscribers[slow].queue
+            assert [json.loads(queued.get_nowait()[0])["data"] for _ in range(queued.qsize())] == [16, 17, 18, 19]
+            assert connections.dropped_messages == 15
+            assert slow.closed is None
+        else:
+            assert slow not in subscribers
+            assert slow.closed == websocket.CLOSE_TRY_AGAIN_LATER
+            assert connections.slow_disconnects == 1
+        for socket in (fast, slow):
+            connections.disconnect(socket, "1")
+        await asyncio.sleep(0)
+
+    run(scenario())
+
+
+def test_transcript_is_logged_off_the_loop(run, monkeypatch):
+    appended = []
+
+    def append(interview_id, entry):
+        time.sleep(0.05)
+        appended.append((threading.current_thread(), entry["id"]))
+
+    monkeypatch.setattr(websocket.transcript_log, "append", append)
+
+    async def scenario():
+        connections = websocket.ConnectionManager(bus=InProcessPubSub())
+
+        async def idle(interview_id):
+            await asyncio.Event().wait()
+
+        connections.simulate_interview = idle
+        socket = FakeSocket()
+        await connections.connect(socket, "1")
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.create_task(ticker())
+        for i in range(3):
+            await connections.publish("1", {"type": "transcript", "data": {"id": f"e{i}"}})
+        await asyncio.sleep(0.01)
+        ticking.cancel()
+
+        # Logged in order, before each entry went out
+        assert [entry for _, entry in appended] == ["e0", "e1", "e2"]
+        assert [json.loads(m)["data"]["id"] for m in socket.sent] == ["e0", "e1", "e2"]
+        assert all(thread is not threading.main_thread() for thread, _ in appended)
+        # The loop kept running while the entries were written
+        assert len(ticks) > 10
+        connections.disconnect(socket, "1")
+        await asyncio.sleep(0)
+
+    run(scenario())
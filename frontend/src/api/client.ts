@@ -49,8 +49,19 @@ class ApiClient {
     return this.request(`/interviews${queryParams}`);
   }
 
-  async getInterview(id: string) {
-    return this.request(`/interviews/${id}`);
+  async getInterview(id: string, params?: { include_transcript?: boolean }) {
+    const queryParams = params ? `?${new URLSearchParams(params as any)}` : '';
+    return this.request(`/interviews/${id}${queryParams}`);
+  }
+
+  async getInterviewTranscript(id: string, params?: { offset?: number; limit?: number; start?: number; end?: number }) {
+    const queryParams = params ? `?${new URLSearchParams(params as any)}` : '';
+    return this.request(`/interviews/${id}/transcript${queryParams}`);
+  }
+
+  // Analytics
+  async getAnalytics() {
+    return this.request('/analytics');
   }
 
   // Candidates
@@ -63,6 +74,17 @@ class ApiClient {
     return this.request(`/candidates/${id}`);
   }
 
+  // Candidate, interview and report in one request
+  async getCandidateView(id: string, params?: { fields?: string; include_transcript?: boolean }) {
+    const queryParams = params ? `?${new URLSearchParams(params as any)}` : '';
+    return this.request(`/candidates/${id}/view${queryParams}`);
+  }
+
+  async getCandidateViews(ids: string[], params?: { fields?: string; include_transcript?: boolean }) {
+    const queryParams = new URLSearchParams({ ...(params as any), ids: ids.join(',') });
+    return this.request(`/candidates/view?${queryParams}`);
+  }
+
   async createCandidate(candidateData: FormData) {
     return this.request('/candidates', {
       method: 'POST',
@@ -84,6 +106,10 @@ class ApiClient {
     return this.request(`/vacancies${queryParams}`);
   }
 
+  async getVacancyMatches(id: string, limit: number = 20) {
+    return this.request(`/vacancies/${id}/matches?limit=${limit}`);
+  }
+
   async createVacancy(vacancyData: any) {
     return this.request('/vacancies', {
       method: 'POST',
@@ -112,9 +138,21 @@ class ApiClient {
     });
   }
 
-  // WebSocket connection
-  createWebSocket(interviewId: string): WebSocket {
-    const wsUrl = `ws://localhost:8000/ws/interviews/${interviewId}`;
+  async sendNotifications(notifications: any[]) {
+    return this.request('/notifications/batch', {
+      method: 'POST',
+      body: JSON.stringify(notifications),
+    });
+  }
+
+  async getNotification(jobId: string) {
+    return this.request(`/notifications/${jobId}`);
+  }
+
+  // WebSocket connection; pass the last received `seq` to resume after a reconnect
+  createWebSocket(interviewId: string, since?: number): WebSocket {
+    const query = since !== undefined ? `?since=${since}` : '';
+    const wsUrl = `ws://localhost:8000/ws/interviews/${interviewId}${query}`;
     return new WebSocket(wsUrl);
   }
 }
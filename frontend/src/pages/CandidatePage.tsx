@@ -37,19 +37,11 @@ const CandidatePage: React.FC = () => {
     try {
       setLoading(true);
 
-      // Load candidate data
-      const candidateResponse = await apiClient.getCandidate(candidateId) as any;
-      setCandidate(candidateResponse.data);
-
-      // Load interview data if exists
-      if (candidateResponse.data.interviewId) {
-        const interviewResponse = await apiClient.getInterview(candidateResponse.data.interviewId) as any;
-        setInterview(interviewResponse.data);
-      }
-
-      // Load report data
-      const reportResponse = await apiClient.getReport(candidateId) as any;
-      setReport(reportResponse.data);
+      // Load candidate, interview and report in one request
+      const viewResponse = await apiClient.getCandidateView(candidateId) as any;
+      setCandidate(viewResponse.data.candidate);
+      setInterview(viewResponse.data.interview);
+      setReport(viewResponse.data.report);
 
     } catch (error) {
       console.error('Failed to load candidate data:', error);
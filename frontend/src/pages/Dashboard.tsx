@@ -20,11 +20,35 @@ const mockChartData = [
   { month: 'Июн', interviews: 67, hired: 21 },
 ];
 
+const MONTHS = ['Янв', 'Фев', 'Мар', 'Апр', 'Май', 'Июн', 'Июл', 'Авг', 'Сен', 'Окт', 'Ноя', 'Дек'];
+
 const Dashboard: React.FC = () => {
-  const [metrics] = useState(mockMetrics);
+  const [metrics, setMetrics] = useState(mockMetrics);
+  const [chartData, setChartData] = useState(mockChartData);
   const [recentInterviews, setRecentInterviews] = useState([]);
 
   useEffect(() => {
+    // Aggregates are precomputed on the server, so this is one cheap request
+    apiClient.getAnalytics()
+      .then((response: any) => {
+        const analytics = response?.data;
+        if (!analytics) return;
+        const { candidates, interviews, vacancies, series } = analytics;
+        const decided = candidates.by_status.hired + candidates.by_status.rejected;
+        setMetrics({
+          totalCandidates: candidates.total,
+          activeInterviews: interviews.by_status.scheduled + interviews.by_status.in_progress,
+          openVacancies: vacancies.by_status.active,
+          successRate: decided ? Math.round((candidates.by_status.hired / decided) * 100) : 0,
+        });
+        setChartData(series.monthly.slice(-6).map((point: any) => ({
+          month: MONTHS[Number(point.period.slice(5, 7)) - 1],
+          interviews: point.interviews_completed,
+          hired: point.hired,
+        })));
+      })
+      .catch(err => console.error('Failed to load analytics:', err));
+
     // Load recent interviews
     apiClient.getInterviews({ limit: 5 })
       .then((data: any) => setRecentInterviews(data.data || []))
@@ -93,7 +117,7 @@ const Dashboard: React.FC = () => {
           </CardHeader>
           <CardContent>
             <ResponsiveContainer width="100%" height={300}>
-              <LineChart data={mockChartData}>
+              <LineChart data={chartData}>
                 <CartesianGrid strokeDasharray="3 3" />
                 <XAxis dataKey="month" />
                 <YAxis />
@@ -110,7 +134,7 @@ const Dashboard: React.FC = () => {
           </CardHeader>
           <CardContent>
             <ResponsiveContainer width="100%" height={300}>
-              <BarChart data={mockChartData}>
+              <BarChart data={chartData}>
                 <CartesianGrid strokeDasharray="3 3" />
                 <XAxis dataKey="month" />
                 <YAxis />
@@ -34,19 +34,11 @@ const ReportPage: React.FC = () => {
         try {
             setLoading(true);
 
-            // Load report data
-            const reportResponse = await apiClient.getReport(candidateId);
-            setReport((reportResponse as any).data);
-
-            // Load candidate data
-            const candidateResponse = await apiClient.getCandidate(candidateId);
-            setCandidate((candidateResponse as any).data);
-
-            // Load interview data if exists
-            if ((candidateResponse as any).data.interviewId) {
-                const interviewResponse = await apiClient.getInterview((candidateResponse as any).data.interviewId);
-                setInterview((interviewResponse as any).data);
-            }
+            // Load report, candidate and interview in one request
+            const viewResponse = await apiClient.getCandidateView(candidateId) as any;
+            setReport(viewResponse.data.report);
+            setCandidate(viewResponse.data.candidate);
+            setInterview(viewResponse.data.interview);
 
         } catch (error) {
             console.error('Failed to load report data:', error);
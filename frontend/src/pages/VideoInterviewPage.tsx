@@ -18,6 +18,12 @@ import WelcomeModal from '../components/ai/WelcomeModal';
 import CompletionModal from '../components/ai/CompletionModal';
 import RobotAvatar from '../components/ai/RobotAvatar';
 
+// Transcript entries fetched per request
+const TRANSCRIPT_WINDOW = 500;
+
+// Delay before reopening a dropped stream socket
+const RECONNECT_DELAY_MS = 2000;
+
 const VideoInterviewPage: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const [interview, setInterview] = useState<Interview | null>(null);
@@ -31,14 +37,25 @@ const VideoInterviewPage: React.FC = () => {
   const [isMicOn, setIsMicOn] = useState(true);
   const [isVideoOn, setIsVideoOn] = useState(true);
   const wsRef = useRef<WebSocket | null>(null);
+  // Last stream `seq` received, sent back on reconnect to replay what was missed
+  const lastSeqRef = useRef<number | undefined>(undefined);
+  const reconnectRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const closedRef = useRef(false);
 
   useEffect(() => {
     if (id) {
+      closedRef.current = false;
+      lastSeqRef.current = undefined;
       loadInterviewData(id);
       connectWebSocket(id);
     }
 
     return () => {
+      closedRef.current = true;
+      if (reconnectRef.current) {
+        clearTimeout(reconnectRef.current);
+        reconnectRef.current = null;
+      }
       if (wsRef.current) {
         wsRef.current.close();
       }
@@ -47,12 +64,25 @@ const VideoInterviewPage: React.FC = () => {
 
   const loadInterviewData = async (interviewId: string) => {
     try {
-      const response = await apiClient.getInterview(interviewId);
+      // Header first, transcript in windows, so long interviews paint quickly
+      const [response, firstWindow] = await Promise.all([
+        apiClient.getInterview(interviewId, { include_transcript: false }),
+        apiClient.getInterviewTranscript(interviewId, { limit: TRANSCRIPT_WINDOW }),
+      ]);
       if ((response as any) && (response as any).data) {
         setInterview((response as any).data);
-        setTranscript((response as any).data.transcript || []);
         setMetrics((response as any).data.metrics || null);
       }
+      let entries: TranscriptEntry[] = (firstWindow as any)?.data || [];
+      const total: number = (firstWindow as any)?.total || entries.length;
+      setTranscript(entries);
+      while (entries.length < total) {
+        const next = await apiClient.getInterviewTranscript(interviewId, { offset: entries.length, limit: TRANSCRIPT_WINDOW });
+        const batch: TranscriptEntry[] = (next as any)?.data || [];
+        if (batch.length === 0) break;
+        entries = entries.concat(batch);
+        setTranscript(entries);
+      }
     } catch (error) {
       console.error('Failed to load interview:', error);
       // Fallback to mock data
@@ -114,7 +144,7 @@ const VideoInterviewPage: React.FC = () => {
 
   const connectWebSocket = (interviewId: string) => {
     try {
-      const ws = apiClient.createWebSocket(interviewId);
+      const ws = apiClient.createWebSocket(interviewId, lastSeqRef.current);
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -126,10 +156,23 @@ const VideoInterviewPage: React.FC = () => {
         try {
           const message: WebSocketMessage = JSON.parse(event.data);
 
+          if (message.type === 'reset') {
+            // The missed messages are no longer buffered: start over from the API
+            lastSeqRef.current = message.data.last_seq;
+            setTranscript([]);
+            setMetrics(null);
+            loadInterviewData(interviewId);
+            return;
+          }
+          if (message.seq !== undefined) {
+            lastSeqRef.current = message.seq;
+          }
+
           if (message.type === 'transcript') {
             setTranscript(prev => [...prev, message.data]);
           } else if (message.type === 'metrics') {
-            setMetrics(message.data);
+            // Deltas carry only the changed fields
+            setMetrics(prev => (message.delta ? { ...prev, ...message.data } : message.data));
           }
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
@@ -143,6 +186,9 @@ const VideoInterviewPage: React.FC = () => {
       ws.onclose = () => {
         console.log('WebSocket disconnected');
         setIsRecording(false);
+        if (!closedRef.current) {
+          reconnectRef.current = setTimeout(() => connectWebSocket(interviewId), RECONNECT_DELAY_MS);
+        }
       };
     } catch (error) {
       console.error('Failed to connect WebSocket:', error);
@@ -88,15 +88,19 @@ export interface CriteriaWeights {
 }
 
 export interface WebSocketMessage {
-  type: 'transcript' | 'metrics' | 'status';
+  type: 'transcript' | 'metrics' | 'status' | 'reset';
   data: any;
   timestamp: number;
+  seq?: number;
+  delta?: boolean;
 }
 
 export interface ApiResponse<T> {
   data: T;
   success: boolean;
   message?: string;
+  next_cursor?: string | null;
+  total?: number | null;
 }
 
 export interface PaginationParams {